@@ -3,14 +3,14 @@ ar_backend.py
 Flask backend service to handle AR Try-On requests
 """
 
+import atexit
 import os
-import subprocess
-import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import tempfile
-import threading
-import time
+
+from product_cache import ProductAssetCache
+from session_manager import ARSessionManager, SessionLimitError
+from tryon_service import CompositorPool, FrameDecodeError, HeadlessSessionStore, clamp_scale
 
 app = Flask(__name__)
 CORS(app, origins=[
@@ -21,72 +21,47 @@ CORS(app, origins=[
     "https://*.netlify.app",     # If frontend deployed on Netlify
     # Add your actual production domain here when you get one
 ], supports_credentials=True)
-# Store active AR processes
-active_sessions = {}
+# GUI try-on subprocesses: capped, queued and reaped by the manager
+sessions = ARSessionManager(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'center_virtual_tryon.py'),
+    max_running=int(os.environ.get('AR_MAX_SESSIONS', 2)),
+    max_queued=int(os.environ.get('AR_MAX_QUEUED_SESSIONS', 8)),
+    # Off unless set: the frontend does not send heartbeats yet
+    idle_timeout=float(os.environ.get('AR_SESSION_IDLE_TIMEOUT', 0)) or None,
+    max_duration=float(os.environ.get('AR_SESSION_MAX_DURATION', 1800)),
+    max_queue_wait=float(os.environ.get('AR_SESSION_MAX_QUEUE_WAIT', 600)),
+    snapshot_dir=os.environ.get('AR_SNAPSHOT_DIR'),
+)
 
-def download_product_image(image_url, temp_dir):
-    """Download product image from URL to temporary directory"""
-    try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        # Get file extension from URL or default to .jpg
-        ext = '.jpg'
-        if '.' in image_url:
-            ext = '.' + image_url.split('.')[-1].lower()
-            if ext not in ['.jpg', '.jpeg', '.png', '.bmp']:
-                ext = '.jpg'
-        
-        temp_file = os.path.join(temp_dir, f"product{ext}")
-        with open(temp_file, 'wb') as f:
-            f.write(response.content)
-        
-        return temp_file
-    except Exception as e:
-        raise Exception(f"Failed to download image: {str(e)}")
+# Headless sessions: the browser sends frames, a warm worker pool composites them
+compositor = CompositorPool(workers=int(os.environ.get('AR_WORKERS', 0)) or None)
+headless_sessions = HeadlessSessionStore(
+    max_sessions=int(os.environ.get('AR_MAX_HEADLESS_SESSIONS', 64)),
+    idle_timeout=float(os.environ.get('AR_HEADLESS_IDLE_TIMEOUT', 300)),
+)
 
-def run_ar_session(product_image_path, session_id, cam_index=0):
-    """Run the AR try-on script in a separate process"""
-    try:
-        # Path to your AR script
-        ar_script_path = "center_virtual_tryon.py"  # Update this path
-        
-        cmd = [
-            "python", ar_script_path,
-            "--product", product_image_path,
-            "--cam", str(cam_index)
-        ]
-        
-        print(f"Starting AR session {session_id} with command: {' '.join(cmd)}")
-        
-        # Start the AR process
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # Store the process
-        active_sessions[session_id] = {
-            'process': process,
-            'product_path': product_image_path,
-            'started_at': time.time()
-        }
-        
-        # Wait for process to complete or be terminated
-        stdout, stderr = process.communicate()
-        
-        # Clean up
-        if session_id in active_sessions:
-            del active_sessions[session_id]
-        
-        print(f"AR session {session_id} completed")
-        
-    except Exception as e:
-        print(f"Error in AR session {session_id}: {str(e)}")
-        if session_id in active_sessions:
-            del active_sessions[session_id]
+# Decoded product sprites shared by all sessions, keyed by URL and content hash
+product_cache = ProductAssetCache(
+    os.environ.get('AR_ASSET_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'asset_cache')),
+    max_bytes=int(float(os.environ.get('AR_ASSET_CACHE_MAX_MB', 512)) * 1024 * 1024),
+    revalidate_after=float(os.environ.get('AR_ASSET_REVALIDATE_SECONDS', 3600)),
+)
+atexit.register(product_cache.flush)
+
+def resolve_product_image(product_image_url, pin=False):
+    """Cached sprite (.npz) for a remote or uploaded product image; None if not found.
+
+    A pinned sprite stays on disk until product_cache.release(path).
+    """
+    if product_image_url.startswith('http'):
+        try:
+            return product_cache.fetch(product_image_url, pin=pin)
+        except Exception as e:
+            raise Exception(f"Failed to download image: {str(e)}")
+    # Handle local file paths (for uploaded images)
+    # Assuming your uploaded images are in public/uploads/products/
+    local_path = os.path.join('..', 'public', product_image_url.lstrip('/'))
+    return product_cache.fetch_local(local_path, pin=pin) if os.path.exists(local_path) else None
 
 @app.route('/api/ar-tryon', methods=['POST'])
 def start_ar_tryon():
@@ -102,45 +77,45 @@ def start_ar_tryon():
                 'error': 'Product image URL is required'
             }), 400
         
-        # Create temporary directory for this session
-        temp_dir = tempfile.mkdtemp()
-        session_id = str(int(time.time() * 1000))
-        
         try:
-            # Download the product image
-            if product_image_url.startswith('http'):
-                product_image_path = download_product_image(product_image_url, temp_dir)
-            else:
-                # Handle local file paths (for uploaded images)
-                # Assuming your uploaded images are in public/uploads/products/
-                local_path = os.path.join('..', 'public', product_image_url.lstrip('/'))
-                if os.path.exists(local_path):
-                    product_image_path = local_path
-                else:
-                    return jsonify({
-                        'success': False,
-                        'error': 'Product image not found'
-                    }), 404
+            # Cached sprite: no download or mask computation for known products.
+            # Pinned until the session ends, so eviction cannot remove it while queued
+            product_image_path = resolve_product_image(product_image_url, pin=True)
+            if product_image_path is None:
+                return jsonify({
+                    'success': False,
+                    'error': 'Product image not found'
+                }), 404
             
-            # Start AR session in background thread
-            thread = threading.Thread(
-                target=run_ar_session,
-                args=(product_image_path, session_id, cam_index)
-            )
-            thread.daemon = True
-            thread.start()
+            # Starts now, or waits in the queue until a slot frees up
+            try:
+                session_id, state, queue_position = sessions.submit(
+                    product_image_path, cam_index,
+                    on_finish=lambda: product_cache.release(product_image_path))
+            except SessionLimitError:
+                product_cache.release(product_image_path)
+                raise
             
             return jsonify({
                 'success': True,
-                'message': 'AR Try-On session started successfully',
+                'message': 'AR Try-On session started successfully' if state == 'running'
+                           else 'AR Try-On session queued',
                 'sessionId': session_id,
+                'state': state,
+                'queuePosition': queue_position,
                 'instructions': {
                     'start': 'AR Try-On window should open shortly...',
                     'controls': 'Use +/- to resize, p to save snapshot, q/ESC to quit',
-                    'status': 'AR session starting...'
+                    'status': 'AR session starting...' if state == 'running'
+                              else f'Waiting for a free slot (position {queue_position})...'
                 }
             })
             
+        except SessionLimitError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 503
         except Exception as e:
             return jsonify({
                 'success': False,
@@ -157,11 +132,7 @@ def start_ar_tryon():
 def stop_ar_session(session_id):
     """Stop an active AR session"""
     try:
-        if session_id in active_sessions:
-            process = active_sessions[session_id]['process']
-            process.terminate()
-            del active_sessions[session_id]
-            
+        if sessions.stop(session_id):
             return jsonify({
                 'success': True,
                 'message': f'AR session {session_id} stopped'
@@ -178,20 +149,129 @@ def stop_ar_session(session_id):
             'error': str(e)
         }), 500
 
+@app.route('/api/ar-tryon/heartbeat/<session_id>', methods=['POST'])
+def heartbeat_ar_session(session_id):
+    """Keep a session from being reaped as idle while the page is open"""
+    if not sessions.heartbeat(session_id):
+        return jsonify({
+            'success': False,
+            'error': 'Session not found or already stopped'
+        }), 404
+    return jsonify({'success': True})
+
+@app.route('/api/ar-tryon/logs/<session_id>', methods=['GET'])
+def get_ar_session_logs(session_id):
+    """Most recent output lines of a session's process"""
+    lines = sessions.logs(session_id)
+    if lines is None:
+        return jsonify({
+            'success': False,
+            'error': 'Session not found or already stopped'
+        }), 404
+    return jsonify({'success': True, 'lines': lines})
+
 @app.route('/api/ar-tryon/status', methods=['GET'])
 def get_ar_status():
-    """Get status of all AR sessions"""
-    sessions = {}
-    for session_id, session_data in active_sessions.items():
-        sessions[session_id] = {
-            'started_at': session_data['started_at'],
-            'running': session_data['process'].poll() is None
+    """Session counts, queue wait times and per-session resource use"""
+    status = sessions.status()
+    return jsonify({
+        'success': True,
+        'active_sessions': status['running'],
+        **status
+    })
+
+@app.route('/api/ar-tryon/headless', methods=['POST'])
+def start_headless_session():
+    """Create a headless session: the product sprite is loaded and prepared once here"""
+    data = request.get_json(silent=True) or {}
+    product_image_url = data.get('productImageUrl')
+    if not product_image_url:
+        return jsonify({
+            'success': False,
+            'error': 'Product image URL is required'
+        }), 400
+
+    try:
+        scale = clamp_scale(data.get('scale', 0.3))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'scale must be a number'}), 400
+    # Checked again in create(); this one avoids downloading a product for nothing
+    if headless_sessions.full():
+        return jsonify({'success': False, 'error': 'Too many headless try-on sessions'}), 503
+
+    try:
+        product_image_path = resolve_product_image(product_image_url, pin=True)
+        if product_image_path is None:
+            return jsonify({
+                'success': False,
+                'error': 'Product image not found'
+            }), 404
+        try:
+            session = headless_sessions.create(product_image_path, scale)
+        finally:
+            # The session keeps the decoded sprite in memory; the file is no longer needed
+            product_cache.release(product_image_path)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({
+        'success': True,
+        'sessionId': session.session_id,
+        'scale': session.scale,
+        'instructions': {
+            'frame': f'POST JPEG frames to /api/ar-tryon/headless/{session.session_id}/frame',
+            'controls': 'Optional query parameters: scale, quality (1-100)'
         }
-    
+    })
+
+@app.route('/api/ar-tryon/headless/<session_id>/frame', methods=['POST'])
+def composite_headless_frame(session_id):
+    """Composite one JPEG frame (raw body or multipart field 'frame'), respond with JPEG"""
+    session = headless_sessions.get(session_id)
+    if session is None:
+        return jsonify({
+            'success': False,
+            'error': 'Session not found or expired'
+        }), 404
+
+    upload = request.files.get('frame')
+    jpeg_bytes = upload.read() if upload else request.get_data(cache=False)
+    if not jpeg_bytes:
+        return jsonify({'success': False, 'error': 'Frame is required'}), 400
+
+    try:
+        scale = request.args.get('scale', type=float)
+        if scale is not None:
+            session.scale = clamp_scale(scale)
+        quality = min(100, max(1, request.args.get('quality', 80, type=int)))
+        output = compositor.composite(session, jpeg_bytes, quality=quality)
+    except FrameDecodeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return Response(output, mimetype='image/jpeg')
+
+@app.route('/api/ar-tryon/headless/<session_id>', methods=['DELETE'])
+def stop_headless_session(session_id):
+    """Drop a headless session and its sprites"""
+    if headless_sessions.remove(session_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Session not found or already stopped'
+        }), 404
+    return jsonify({
+        'success': True,
+        'message': f'Headless session {session_id} stopped'
+    })
+
+@app.route('/api/ar-tryon/headless/stats', methods=['GET'])
+def get_headless_stats():
+    """Compositor throughput (frames/sec overall and per core) and stage timings"""
     return jsonify({
         'success': True,
-        'active_sessions': len(active_sessions),
-        'sessions': sessions
+        'headless_sessions': len(headless_sessions),
+        'compositor': compositor.stats()
     })
 
 @app.route('/api/health', methods=['GET'])
@@ -200,7 +280,9 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'AR Try-On Backend',
-        'active_sessions': len(active_sessions)
+        'active_sessions': len(sessions),
+        'headless_sessions': len(headless_sessions),
+        'asset_cache': product_cache.stats()
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,207 @@
+"""
+anchor_tracker.py
+Body-anchored product placement: a Haar cascade detector (face or upper body)
+runs every N frames, sparse Lucas-Kanade optical flow carries the anchor box
+between detections, and the box is smoothed before it drives placement.
+
+The detection interval adapts to the frame budget: if detections get
+expensive relative to the per-frame budget the interval grows, and it shrinks
+again when tracking loses its points.
+"""
+
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+CASCADES = {
+    "face": "haarcascade_frontalface_default.xml",
+    "upperbody": "haarcascade_upperbody.xml",
+}
+
+# Where the product goes relative to the anchor box, as (dx, dy) in box units
+# from the box centre to the sprite centre, and the sprite width in box widths
+PLACEMENTS = {
+    "face": ((0.0, 0.0), 1.0),        # glasses, masks
+    "ears": ((0.0, 0.1), 1.3),        # earrings
+    "neck": ((0.0, 1.05), 1.1),       # necklaces, scarves
+    "chest": ((0.0, 0.35), 0.6),      # with the upper-body cascade
+}
+
+
+def load_cascade(target):
+    path = os.path.join(cv2.data.haarcascades, CASCADES[target])
+    cascade = cv2.CascadeClassifier(path)
+    if cascade.empty():
+        raise FileNotFoundError(f"OpenCV cascade not available: {path}")
+    return cascade
+
+
+class CascadeDetector:
+    """Largest face/upper-body box, detected on a downscaled grayscale frame."""
+
+    def __init__(self, target="face", downscale=0.5, min_size=40):
+        self.cascade = load_cascade(target)
+        self.downscale = downscale
+        self.min_size = min_size
+
+    def __call__(self, gray):
+        small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+        small = cv2.equalizeHist(small)
+        min_side = max(8, int(self.min_size * self.downscale))
+        boxes = self.cascade.detectMultiScale(small, scaleFactor=1.15, minNeighbors=4, minSize=(min_side, min_side))
+        if len(boxes) == 0:
+            return None
+        x, y, w, h = max(boxes, key=lambda b: b[2] * b[3])
+        return np.array([x, y, w, h], np.float32) / self.downscale
+
+
+class AnchorTracker:
+    """Detect every ``interval`` frames, track with optical flow in between, smooth the result.
+
+    ``update(frame)`` returns the smoothed anchor box (x, y, w, h) as floats,
+    or None while nothing has been found. After a miss the last box is held
+    for up to ``max_misses`` frames to ride out a failed detection, then
+    dropped, so the product does not stay pinned where the person was.
+    """
+
+    def __init__(self, detector, detect_every=10, min_interval=2, max_interval=30,
+                 frame_budget_ms=33.0, budget_fraction=0.25, smoothing=0.5, min_points=8,
+                 max_fb_error=1.0, motion_scale=0.05, max_misses=15):
+        self.detector = detector
+        self.interval = detect_every
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.frame_budget_ms = frame_budget_ms
+        self.budget_fraction = budget_fraction
+        self.smoothing = smoothing
+        self.min_points = min_points
+        self.max_fb_error = max_fb_error
+        self.motion_scale = motion_scale
+        self.max_misses = max_misses
+
+        self.box = None       # raw tracked box
+        self.smoothed = None  # what placement uses
+        self._points = None
+        self._prev_gray = None
+        self._since_detect = 0
+        self._detect_ms = None
+        self._track_ms = 0.0
+        self.detections = 0
+        self.lost = 0
+        self.misses = 0       # consecutive frames without a box
+
+    def _seed_points(self, gray, box):
+        x, y, w, h = (int(v) for v in box)
+        mask = np.zeros_like(gray)
+        mask[max(y, 0):y + h, max(x, 0):x + w] = 255
+        return cv2.goodFeaturesToTrack(gray, maxCorners=60, qualityLevel=0.01, minDistance=5, mask=mask)
+
+    def _detect(self, gray):
+        start = time.perf_counter()
+        box = self.detector(gray)
+        ms = (time.perf_counter() - start) * 1000
+        self._detect_ms = ms if self._detect_ms is None else 0.8 * self._detect_ms + 0.2 * ms
+        self.detections += 1
+        self._since_detect = 0
+        if box is None:
+            self._points = None
+            return None
+        self._points = self._seed_points(gray, box)
+        return box
+
+    def _track(self, gray):
+        start = time.perf_counter()
+        lk = dict(winSize=(15, 15), maxLevel=2)
+        new, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points, None, **lk)
+        # Forward-backward check: keep points that track back to where they started
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, new, None, **lk)
+        fb_error = np.linalg.norm((back - self._points).reshape(-1, 2), axis=1)
+        ok = (status.reshape(-1) == 1) & (back_status.reshape(-1) == 1) & (fb_error < self.max_fb_error)
+        box = None
+        if ok.sum() >= self.min_points:
+            old, new = self._points[ok].reshape(-1, 2), new[ok].reshape(-1, 2)
+            dx, dy = np.median(new - old, axis=0)
+            # Box scale from the change in point spread around the median
+            spread_old = np.median(np.linalg.norm(old - np.median(old, axis=0), axis=1))
+            spread_new = np.median(np.linalg.norm(new - np.median(new, axis=0), axis=1))
+            s = float(spread_new / spread_old) if spread_old > 1e-3 else 1.0
+            x, y, w, h = self.box
+            cx, cy = x + w / 2 + dx, y + h / 2 + dy
+            w, h = w * s, h * s
+            box = np.array([cx - w / 2, cy - h / 2, w, h], np.float32)
+            self._points = new.reshape(-1, 1, 2)
+        else:
+            # Lost the target: detect again on the next frame and sample more often
+            self.lost += 1
+            self._points = None
+            self.interval = max(self.min_interval, self.interval // 2)
+        ms = (time.perf_counter() - start) * 1000
+        self._track_ms = 0.8 * self._track_ms + 0.2 * ms
+        return box
+
+    def _adapt_interval(self):
+        """Spread detection cost so the average anchoring cost stays within the budget share."""
+        headroom = self.frame_budget_ms * self.budget_fraction - self._track_ms
+        if self._detect_ms is None or headroom <= 0:
+            self.interval = self.max_interval
+            return
+        needed = math.ceil(self._detect_ms / headroom)
+        if needed > self.interval:
+            self.interval = min(self.max_interval, needed)
+        elif needed < self.interval and self.lost == 0:
+            self.interval = max(self.min_interval, self.interval - 1)
+
+    def update(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self._since_detect += 1
+        if self._points is None or self._prev_gray is None or self._since_detect >= self.interval:
+            self.box = self._detect(gray)
+            self._adapt_interval()
+            self.lost = 0
+        else:
+            self.box = self._track(gray)
+        self._prev_gray = gray
+
+        if self.box is None:
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.smoothed = None
+            return self.smoothed
+        self.misses = 0
+        if self.smoothed is None:
+            self.smoothed = self.box.copy()
+        else:
+            # Exponential smoothing that backs off with motion: jitter is damped,
+            # real movement (or a detection elsewhere) is followed without lag
+            motion = np.abs(self.box[:2] - self.smoothed[:2]).max() / max(float(self.smoothed[2]), 1.0)
+            keep = self.smoothing * math.exp(-motion / self.motion_scale)
+            self.smoothed = keep * self.smoothed + (1 - keep) * self.box
+        return self.smoothed
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "detections": self.detections,
+            "detect_ms": round(self._detect_ms, 2) if self._detect_ms is not None else None,
+            "track_ms": round(self._track_ms, 2),
+        }
+
+
+def anchored_placement(box, product_shape, placement, size_multiplier=1.0, step=1.05):
+    """Product scale and top-left position for an anchor box.
+
+    The scale is quantized to powers of ``step`` (5% apart by default), so
+    small box jitter maps onto the same cached sprite instead of resizing
+    every frame, at the same relative precision for small and large sprites.
+    """
+    (dx, dy), width_in_boxes = PLACEMENTS[placement]
+    x, y, w, h = box
+    h0, w0 = product_shape[:2]
+    scale = max(w, 1) * width_in_boxes * size_multiplier / w0
+    scale = step ** round(math.log(scale) / math.log(step))
+    sw, sh = int(w0 * scale), int(h0 * scale)
+    cx, cy = x + w / 2 + dx * w, y + h / 2 + dy * h
+    return scale, int(cx - sw / 2), int(cy - sh / 2)
@@ -0,0 +1,228 @@
+"""
+batch_previews.py
+Offline renderer for static try-on previews: every product composited onto
+every background/model image.
+
+Work is split per product across a process pool, so each worker loads and
+prepares a product sprite once and reuses it (and its decoded backgrounds)
+for all of that product's previews. Outputs are keyed by a hash of the input
+image bytes and the render settings; a preview whose key is already in the
+output manifest is skipped, so re-running over the catalog only renders what
+changed.
+
+    python batch_previews.py --products ../public/uploads/products --backgrounds models/ --out previews/
+    python batch_previews.py --products a.png b.png --backgrounds bg.jpg --quality 90 --format webp
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import cv2
+
+from center_virtual_tryon import PremultipliedSprite, load_product_with_alpha, overlay_center_premultiplied
+
+# Bump when the compositing changes, so existing previews are re-rendered
+RENDER_VERSION = 1
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+# Sprites prepared by product_cache are products; backgrounds go through cv2.imread
+PRODUCT_EXTENSIONS = IMAGE_EXTENSIONS + (".npz",)
+MANIFEST = "manifest.json"
+
+
+def collect_images(paths, extensions=IMAGE_EXTENSIONS):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, f) for f in os.listdir(path)
+                                if f.lower().endswith(extensions)))
+        else:
+            files.append(path)
+    return files
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def encode_params(fmt, quality):
+    if fmt == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if fmt == "png":
+        # quality 0-100 mapped onto zlib level 9-0
+        return [cv2.IMWRITE_PNG_COMPRESSION, max(0, min(9, 9 - quality // 11))]
+    return [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+
+
+def preview_name(product_path, background_path, fmt):
+    """Readable output name, unique per input path pair.
+
+    The stems keep names recognisable; the short hash of each full path tells
+    apart ``dup.png`` and ``dup.jpg``, or same-named files in different folders.
+    """
+    def part(path):
+        digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+        return f"{os.path.splitext(os.path.basename(path))[0]}-{digest}"
+    return f"{part(product_path)}__{part(background_path)}.{fmt}"
+
+
+@lru_cache(maxsize=64)
+def _load_background(path):
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        raise FileNotFoundError(f"Could not read background image: {path}")
+    return img
+
+
+def fit_sprite(prod_bgr, prod_alpha, frame_shape, width_fraction):
+    """Resize the product to ``width_fraction`` of the frame width, never taller than the frame."""
+    H, W = frame_shape[:2]
+    h0, w0 = prod_bgr.shape[:2]
+    scale = min(W * width_fraction / w0, H * 0.9 / h0)
+    size = (max(1, int(w0 * scale)), max(1, int(h0 * scale)))
+    return PremultipliedSprite(
+        cv2.resize(prod_bgr, size, interpolation=cv2.INTER_AREA),
+        cv2.resize(prod_alpha, size, interpolation=cv2.INTER_AREA),
+    )
+
+
+def render_product(product_path, jobs, out_dir, width_fraction, fmt, quality):
+    """Render one product onto each (background_path, output_name, key); runs in a worker."""
+    cv2.setNumThreads(1)
+    try:
+        prod_bgr, prod_alpha = load_product_with_alpha(product_path)
+    except Exception as e:
+        return [(name, key, f"error: {e}", 0.0, 0) for _, name, key in jobs]
+    params = encode_params(fmt, quality)
+    sprites = {}
+    results = []
+    for background_path, name, key in jobs:
+        start = time.perf_counter()
+        try:
+            background = _load_background(background_path)
+            sprite = sprites.get(background.shape[:2])
+            if sprite is None:
+                sprite = sprites[background.shape[:2]] = fit_sprite(prod_bgr, prod_alpha, background.shape,
+                                                                    width_fraction)
+            frame = background.copy()
+            overlay_center_premultiplied(frame, sprite)
+            ok, encoded = cv2.imencode(f".{fmt}", frame, params)
+            if not ok:
+                raise ValueError(f"Could not encode {name}")
+            fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(encoded.tobytes())
+            os.replace(tmp, os.path.join(out_dir, name))
+            results.append((name, key, "rendered", (time.perf_counter() - start) * 1000, len(encoded)))
+        except Exception as e:
+            results.append((name, key, f"error: {e}", (time.perf_counter() - start) * 1000, 0))
+    return results
+
+
+def render_previews(products, backgrounds, out_dir, width_fraction=0.35, fmt="jpg", quality=85,
+                    workers=None, force=False):
+    """Render every product onto every background; returns a summary of the run."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    settings = f"v{RENDER_VERSION}:{width_fraction}:{fmt}:{quality}"
+    errors = []
+    background_hashes = {}
+    for background in backgrounds:
+        try:
+            background_hashes[background] = file_hash(background)
+        except OSError as e:
+            errors.append(f"{background}: error: {e}")
+    tasks, skipped = {}, 0
+    for product in products:
+        try:
+            product_hash = file_hash(product)
+        except OSError as e:
+            errors.append(f"{product}: error: {e}")
+            continue
+        for background in background_hashes:
+            name = preview_name(product, background, fmt)
+            key = hashlib.sha256(f"{product_hash}:{background_hashes[background]}:{settings}".encode()).hexdigest()
+            if not force and manifest.get(name) == key and os.path.exists(os.path.join(out_dir, name)):
+                skipped += 1
+                continue
+            tasks.setdefault(product, []).append((background, name, key))
+
+    start = time.perf_counter()
+    rendered, timings, bytes_written = 0, [], 0
+    try:
+        if tasks:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                futures = {pool.submit(render_product, product, jobs, out_dir, width_fraction, fmt, quality): jobs
+                           for product, jobs in tasks.items()}
+                for future in as_completed(futures):
+                    try:
+                        results = future.result()
+                    except Exception as e:  # the worker died (e.g. out of memory)
+                        results = [(name, key, f"error: {e}", 0.0, 0) for _, name, key in futures[future]]
+                    for name, key, status, ms, size in results:
+                        if status == "rendered":
+                            manifest[name] = key
+                            rendered += 1
+                            timings.append(ms)
+                            bytes_written += size
+                        else:
+                            manifest.pop(name, None)
+                            errors.append(f"{name}: {status}")
+    finally:
+        # Previews finished before an interruption are recorded, so a re-run skips them
+        fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, manifest_path)
+
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "rendered": rendered,
+        "skipped": skipped,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "previews_per_s": round(rendered / elapsed, 1) if rendered and elapsed > 0 else None,
+        "ms_per_preview_p50": round(timings[len(timings) // 2], 2) if timings else None,
+        "bytes_written": bytes_written,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render static try-on previews for the catalog")
+    p.add_argument("--products", nargs="+", required=True, help="Product images or directories")
+    p.add_argument("--backgrounds", nargs="+", required=True, help="Background/model images or directories")
+    p.add_argument("--out", required=True, help="Output directory")
+    p.add_argument("--width-fraction", type=float, default=0.35, help="Product width relative to the background")
+    p.add_argument("--format", choices=["jpg", "webp", "png"], default="jpg")
+    p.add_argument("--quality", type=int, default=85, help="Encoder quality 1-100")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--force", action="store_true", help="Re-render even if the manifest is up to date")
+    args = p.parse_args()
+
+    summary = render_previews(collect_images(args.products, PRODUCT_EXTENSIONS),
+                              collect_images(args.backgrounds), args.out,
+                              width_fraction=args.width_fraction, fmt=args.format,
+                              quality=max(1, min(100, args.quality)), workers=args.workers, force=args.force)
+    print(json.dumps(summary, indent=2))
+    if summary["errors"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+benchmark_tryon.py
+Headless FPS benchmark for the try-on compositing loop on a synthetic video source.
+No webcam or window is needed.
+
+    python benchmark_tryon.py --frames 600 --width 1280 --height 720
+    python benchmark_tryon.py --product ../public/Vase.jpeg
+    python benchmark_tryon.py --workers 1 2 4   # headless JPEG-in/JPEG-out service
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from center_virtual_tryon import (
+    PremultipliedSprite,
+    SpriteCache,
+    load_product_with_alpha,
+    overlay_center,
+    overlay_center_premultiplied,
+    synthetic_frames,
+)
+from tryon_service import CompositorPool, HeadlessSession
+
+
+def synthetic_product(size=1600, seed=1):
+    """Large product on a white background, so the near-white alpha path is exercised."""
+    rng = np.random.default_rng(seed)
+    img = np.full((size, size, 3), 255, np.uint8)
+    cv2.circle(img, (size // 2, size // 2), size // 3, tuple(int(c) for c in rng.integers(0, 200, 3)), -1)
+    cv2.rectangle(img, (size // 4, size // 4), (size // 2, size // 2), (30, 90, 160), -1)
+    return img
+
+
+def scale_schedule(frames, every=60):
+    """Simulated +/- keypresses: the scale changes once every ``every`` frames."""
+    scale = 0.3
+    for i in range(frames):
+        if i and i % every == 0:
+            scale = scale * 1.1 if (i // every) % 2 else scale * 0.9
+        yield scale
+
+
+def run_resize_every_frame(frames, prod_bgr, prod_alpha, n):
+    h0, w0 = prod_bgr.shape[:2]
+    start = time.perf_counter()
+    for i, scale in enumerate(scale_schedule(n)):
+        size = (max(1, int(w0 * scale)), max(1, int(h0 * scale)))
+        bgr = cv2.resize(prod_bgr, size, interpolation=cv2.INTER_AREA)
+        alpha = cv2.resize(prod_alpha, size, interpolation=cv2.INTER_AREA)
+        display = frames[i % len(frames)].copy()
+        overlay_center(display, bgr, alpha)
+    return n / (time.perf_counter() - start)
+
+
+def run_sprite_cache(frames, prod_bgr, prod_alpha, n):
+    sprites = SpriteCache(prod_bgr, prod_alpha)
+    start = time.perf_counter()
+    for i, scale in enumerate(scale_schedule(n)):
+        sprite = sprites.get(scale)
+        display = frames[i % len(frames)].copy()
+        overlay_center(display, sprite.bgr, sprite.alpha)
+    return n / (time.perf_counter() - start)
+
+
+def run_premultiplied(frames, prod_bgr, prod_alpha, n):
+    sprites = SpriteCache(prod_bgr, prod_alpha)
+    display = np.empty_like(frames[0])
+    start = time.perf_counter()
+    for i, scale in enumerate(scale_schedule(n)):
+        # Stands in for cap.read(frame) filling a reused buffer
+        np.copyto(display, frames[i % len(frames)])
+        overlay_center_premultiplied(display, sprites.get(scale))
+    return n / (time.perf_counter() - start)
+
+
+def run_service(frames, prod_bgr, prod_alpha, n, workers, quality=80):
+    """Headless service path: JPEG decode + composite + JPEG encode on a worker pool."""
+    jpegs = [cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes() for f in frames]
+    pool = CompositorPool(workers=workers, window=n)
+    session = HeadlessSession("bench", prod_bgr, prod_alpha, scale=0.3)
+    try:
+        start = time.perf_counter()
+        futures = [pool.submit(session, jpegs[i % len(jpegs)], quality=quality) for i in range(n)]
+        for f in futures:
+            f.result()
+        fps = n / (time.perf_counter() - start)
+        return fps, pool.stats()
+    finally:
+        pool.shutdown()
+
+
+def microbench_composite(frame, sprite, repeat=200):
+    """Per-call cost of the float and the integer compositor on one frame/sprite pair."""
+    work = frame.copy()
+    timings = {}
+    for name, fn in (
+        ("float32", lambda: overlay_center(work, sprite.bgr, sprite.alpha)),
+        ("premultiplied uint8", lambda: overlay_center_premultiplied(work, sprite)),
+    ):
+        fn()  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        timings[name] = (time.perf_counter() - start) / repeat * 1000
+    return timings
+
+
+def check_premultiplied_matches_float(trials=50, seed=0):
+    """Random sprites, alphas and placements (including clipped edges): max abs error vs float."""
+    rng = np.random.default_rng(seed)
+    worst = 0
+    for _ in range(trials):
+        H, W = rng.integers(40, 200, 2)
+        h, w = rng.integers(1, 260, 2)
+        frame = rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+        bgr = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+        alpha = rng.integers(0, 256, (h, w), dtype=np.uint8)
+        alpha[rng.random((h, w)) < 0.3] = 0
+        alpha[rng.random((h, w)) < 0.3] = 255
+
+        expected = overlay_center(frame.copy(), bgr, alpha)
+        actual = overlay_center_premultiplied(frame.copy(), PremultipliedSprite(bgr, alpha))
+        worst = max(worst, int(np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max()))
+    return worst
+
+
+def main():
+    p = argparse.ArgumentParser(description="Headless try-on FPS benchmark")
+    p.add_argument("--product", type=str, default=None, help="Product image (default: synthetic 1600x1600)")
+    p.add_argument("--frames", type=int, default=600)
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--workers", type=int, nargs="*", default=[1, os.cpu_count() or 1],
+                   help="Worker counts for the headless service benchmark")
+    args = p.parse_args()
+
+    if args.product:
+        prod_bgr, prod_alpha = load_product_with_alpha(args.product)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "product.jpg")
+            cv2.imwrite(path, synthetic_product())
+            prod_bgr, prod_alpha = load_product_with_alpha(path)
+
+    frames = synthetic_frames(args.width, args.height)
+    print(f"Product {prod_bgr.shape[1]}x{prod_bgr.shape[0]}, frames {args.width}x{args.height}, n={args.frames}")
+    print(f"  resize every frame : {run_resize_every_frame(frames, prod_bgr, prod_alpha, args.frames):8.1f} FPS")
+    print(f"  SpriteCache        : {run_sprite_cache(frames, prod_bgr, prod_alpha, args.frames):8.1f} FPS")
+    print(f"  + premultiplied    : {run_premultiplied(frames, prod_bgr, prod_alpha, args.frames):8.1f} FPS")
+
+    print("Headless service (JPEG in/out):")
+    for workers in args.workers:
+        fps, stats = run_service(frames, prod_bgr, prod_alpha, args.frames, workers)
+        print(f"  {workers:2d} workers         : {fps:8.1f} FPS, {stats.get('fps_per_core', 0):7.1f} FPS/core "
+              f"(decode {stats.get('decode_ms_p50')} / composite {stats.get('composite_ms_p50')} "
+              f"/ encode {stats.get('encode_ms_p50')} ms p50)")
+
+    sprite = SpriteCache(prod_bgr, prod_alpha).get(0.3)
+    print(f"Compositor microbenchmark ({sprite.shape[1]}x{sprite.shape[0]} sprite):")
+    for name, ms in microbench_composite(frames[0], sprite).items():
+        print(f"  {name:<20}: {ms:7.3f} ms/frame")
+
+    worst = check_premultiplied_matches_float()
+    print(f"Max abs difference premultiplied vs float: {worst} LSB")
+    if worst > 1:
+        raise SystemExit("premultiplied compositor differs from the float reference by more than 1 LSB")
+
+
+if __name__ == "__main__":
+    main()
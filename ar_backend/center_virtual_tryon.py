@@ -1,7 +1,17 @@
 """
 center_virtual_tryon.py
-Simplified version: Always center product on webcam feed.
+Live try-on: the product is centred on the webcam feed, or follows the
+detected face/upper body with --anchor face|ears|neck|chest.
 Controls: +/- to resize, q/ESC to quit, p to save snapshot.
+Use --pipelined to capture on a separate thread and always render the newest frame.
+Use --stats-every N to print pipeline stats every N seconds (off by default).
+
+Performance runs without a camera or window:
+    python center_virtual_tryon.py -p product.png --source synthetic:1280x720 --headless --frames 600
+    python center_virtual_tryon.py -p product.png --source clip.mp4 --headless --report perf.json
+    python center_virtual_tryon.py -p product.png --source synthetic --headless --pipelined --source-fps 30
+With --pipelined, synthetic and image sources are paced at --source-fps (30 by default)
+so dropped frames are counted against a camera rate; 0 reads them unpaced.
 """
 
 import cv2
@@ -9,12 +19,27 @@ import numpy as np
 import os
 import time
 import argparse
+import glob
+import json
+import threading
+from collections import OrderedDict, deque
 
 def load_product_with_alpha(path):
+    if path.endswith(".npz"):  # Sprite prepared by product_cache
+        with np.load(path) as sprite:
+            return sprite["bgr"], sprite["alpha"]
     img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
     if img is None:
         raise FileNotFoundError(f"Could not read product image: {path}")
+    return product_with_alpha(img)
+
+def decode_product_with_alpha(data):
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError("Could not decode product image")
+    return product_with_alpha(img)
 
+def product_with_alpha(img):
     if img.ndim == 3 and img.shape[2] == 4:  # Already RGBA
         bgr = img[:, :, :3]
         alpha = img[:, :, 3]
@@ -54,57 +79,567 @@ def overlay_center(frame, prod_bgr, prod_alpha):
     frame[y1:y2, x1:x2] = blended.astype(np.uint8)
     return frame
 
-def main_loop(product_path, cam_index=0):
+def clip_placement(frame_shape, sprite_shape, x, y):
+    """Intersect a sprite placed with its top-left at (x, y) with the frame.
+
+    Returns (frame_rows, frame_cols, sprite_rows, sprite_cols) slices, or None
+    when the sprite is entirely outside the frame.
+    """
+    H, W = frame_shape[:2]
+    h, w = sprite_shape[:2]
+    x1 = max(x, 0); y1 = max(y, 0)
+    x2 = min(x+w, W); y2 = min(y+h, H)
+    if x1 >= x2 or y1 >= y2:
+        return None
+    fx1 = x1 - x; fy1 = y1 - y
+    return (slice(y1, y2), slice(x1, x2),
+            slice(fy1, fy1 + (y2 - y1)), slice(fx1, fx1 + (x2 - x1)))
+
+class PremultipliedSprite:
+    """Product sprite prepared once for integer compositing.
+
+    ``premul`` holds BGR already multiplied by alpha and ``inv_alpha`` holds
+    255 - alpha on all three channels, so compositing a frame is one
+    saturating multiply and one add in uint8, written straight into the frame.
+    A sprite owns a scratch buffer, so one sprite must not be composited from
+    two threads at the same time unless each thread passes its own ``scratch``
+    to overlay_premultiplied.
+    """
+
+    def __init__(self, bgr, alpha):
+        self.bgr = bgr
+        self.alpha = alpha
+        alpha3 = cv2.merge([alpha, alpha, alpha])
+        self.premul = cv2.multiply(bgr, alpha3, scale=1/255)
+        self.inv_alpha = cv2.bitwise_not(alpha3)
+        self._scratch = np.empty_like(self.premul)
+
+    @property
+    def shape(self):
+        return self.premul.shape
+
+def overlay_premultiplied(frame, sprite, x, y, scratch=None):
+    """Composite ``sprite`` with its top-left at (x, y), in place, without temporaries.
+
+    Matches overlay_center's float blend within +/-1 per channel. ``scratch``
+    is an optional uint8 buffer at least as large as the sprite, for callers
+    that share one sprite between threads.
+    """
+    placement = clip_placement(frame.shape, sprite.shape, x, y)
+    if placement is None:
+        return frame
+    rows, cols, srows, scols = placement
+
+    roi = frame[rows, cols]
+    scratch = (sprite._scratch if scratch is None else scratch)[srows, scols]
+    cv2.multiply(roi, sprite.inv_alpha[srows, scols], dst=scratch, scale=1/255)
+    cv2.add(scratch, sprite.premul[srows, scols], dst=roi)
+    return frame
+
+def overlay_center_premultiplied(frame, sprite, scratch=None):
+    H, W = frame.shape[:2]
+    h, w = sprite.shape[:2]
+    return overlay_premultiplied(frame, sprite, W//2 - w//2, H//2 - h//2, scratch)
+
+class SpriteCache:
+    """Resized, premultiplied product sprites keyed by output size.
+
+    The scale only changes on a keypress, so the resize runs once per scale
+    step instead of on every frame. Recently used sizes are kept so stepping
+    back and forth with +/- does not resize again. ``get`` is thread-safe.
+    """
+
+    def __init__(self, prod_bgr, prod_alpha, max_entries=16):
+        self.prod_bgr = prod_bgr
+        self.prod_alpha = prod_alpha
+        self.h0, self.w0 = prod_bgr.shape[:2]
+        self.max_entries = max_entries
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scale):
+        size = (max(1, int(self.w0 * scale)), max(1, int(self.h0 * scale)))
+        with self._lock:
+            sprite = self._sprites.get(size)
+            if sprite is not None:
+                self._sprites.move_to_end(size)
+                return sprite
+        sprite = PremultipliedSprite(
+            cv2.resize(self.prod_bgr, size, interpolation=cv2.INTER_AREA),
+            cv2.resize(self.prod_alpha, size, interpolation=cv2.INTER_AREA),
+        )
+        with self._lock:
+            sprite = self._sprites.setdefault(size, sprite)
+            self._sprites.move_to_end(size)
+            if len(self._sprites) > self.max_entries:
+                self._sprites.popitem(last=False)
+        return sprite
+
+class PipelineStats:
+    """Per-stage latency samples (ms, rolling window) and event counters, thread-safe."""
+
+    def __init__(self, window=300):
+        self.window = window
+        self._samples = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, ms):
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=self.window)).append(ms)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def set(self, **values):
+        """Overwrite counters with current values (gauges such as the tracker interval)."""
+        with self._lock:
+            self._counters.update(values)
+
+    def summary(self):
+        with self._lock:
+            samples = {stage: sorted(v) for stage, v in self._samples.items() if v}
+            counters = dict(self._counters)
+        stages = {
+            stage: {"mean": sum(v) / len(v), "p50": v[len(v) // 2],
+                    "p95": v[min(len(v) - 1, int(len(v) * 0.95))], "p99": v[min(len(v) - 1, int(len(v) * 0.99))]}
+            for stage, v in samples.items()
+        }
+        return {"stages_ms": stages, "counters": counters}
+
+    def format(self):
+        summary = self.summary()
+        stages = " | ".join(f"{k} p50 {v['p50']:.1f} p95 {v['p95']:.1f}" for k, v in summary["stages_ms"].items())
+        counters = " ".join(f"{k}={v}" for k, v in summary["counters"].items())
+        return f"{stages} || {counters}"
+
+class LatestFrameBuffer:
+    """Small ring of frame buffers shared by one capture thread and one reader.
+
+    The reader always gets the newest frame; a frame that is replaced before
+    anyone read it counts as dropped. The writer never touches the slot being
+    read or the newest slot, so three slots are enough and frames are
+    composited in place without copying.
+    """
+
+    def __init__(self, slots=3):
+        self._frames = [None] * slots
+        self._stamps = [0.0] * slots
+        self._latest = None
+        self._reading = None
+        self._unread = False
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def writable_slot(self):
+        with self._cond:
+            for i, frame in enumerate(self._frames):
+                if i != self._latest and i != self._reading:
+                    return i, frame
+
+    def publish(self, slot, frame, captured_at):
+        with self._cond:
+            self._frames[slot] = frame
+            self._stamps[slot] = captured_at
+            if self._unread:
+                self.dropped += 1
+            self._latest = slot
+            self._unread = True
+            self._cond.notify()
+
+    def acquire(self, timeout=None):
+        """Newest unread (frame, captured_at), or None on timeout. Call release() when done."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._unread, timeout):
+                return None
+            self._reading = self._latest
+            self._unread = False
+            return self._frames[self._reading], self._stamps[self._reading]
+
+    def release(self):
+        with self._cond:
+            self._reading = None
+
+class CaptureThread(threading.Thread):
+    """Reads frames as fast as the camera delivers them into a LatestFrameBuffer."""
+
+    def __init__(self, cap, stats, slots=3):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.stats = stats
+        self.buffer = LatestFrameBuffer(slots)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            slot, buf = self.buffer.writable_slot()
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read(buf)
+            captured_at = time.perf_counter()
+            if not ret:
+                break
+            self.stats.record("capture", (captured_at - t0) * 1000)
+            self.stats.count("captured")
+            self.buffer.publish(slot, frame, captured_at)
+
+    def stop(self):
+        self._stop_event.set()
+
+def synthetic_frames(width, height, count=32, seed=0):
+    """A short ring of noisy moving-gradient frames, generated once up front."""
+    rng = np.random.default_rng(seed)
+    xs = np.linspace(0, 255, width, dtype=np.float32)
+    frames = []
+    for i in range(count):
+        row = (xs + i * 8) % 256
+        base = np.repeat(row[None, :], height, axis=0)
+        frame = np.dstack([base, np.roll(base, height // 3, axis=0), 255 - base])
+        frame += rng.normal(0, 8, frame.shape).astype(np.float32)
+        frames.append(np.clip(frame, 0, 255).astype(np.uint8))
+    return frames
+
+class FramePacer:
+    """Delivers frames at most ``fps`` times a second, like a camera; None or 0 is unpaced.
+
+    A reader that falls behind is not sent a burst to catch up: the next frame
+    is due one period after the late one.
+    """
+
+    def __init__(self, fps=None):
+        self.fps = fps or None
+        self._period = 1.0 / fps if fps else 0.0
+        self._next = None
+
+    def wait(self):
+        if not self._period:
+            return
+        now = time.perf_counter()
+        if self._next is None or self._next < now:
+            self._next = now
+        else:
+            time.sleep(self._next - now)
+        self._next += self._period
+
+class SyntheticSource:
+    """Generated NumPy frames behind the cv2.VideoCapture interface (no camera needed)."""
+
+    def __init__(self, width=1280, height=720, max_frames=None, seed=0, fps=None):
+        self._frames = synthetic_frames(width, height, seed=seed)
+        self.max_frames = max_frames
+        self.pacer = FramePacer(fps)
+        self._index = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self, frame=None):
+        if self.max_frames is not None and self._index >= self.max_frames:
+            return False, None
+        self.pacer.wait()
+        src = self._frames[self._index % len(self._frames)]
+        self._index += 1
+        if frame is None or frame.shape != src.shape:
+            return True, src.copy()
+        np.copyto(frame, src)
+        return True, frame
+
+    def release(self):
+        pass
+
+class ImageSequenceSource:
+    """Still images read in order behind the cv2.VideoCapture interface."""
+
+    def __init__(self, paths, loop=False, fps=None):
+        self.paths = list(paths)
+        self.loop = loop
+        self.pacer = FramePacer(fps)
+        self._index = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self, frame=None):
+        if self._index >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self._index = 0
+        self.pacer.wait()
+        img = cv2.imread(self.paths[self._index], cv2.IMREAD_COLOR)
+        self._index += 1
+        if img is None:
+            return False, None
+        if frame is None or frame.shape != img.shape:
+            return True, img
+        np.copyto(frame, img)
+        return True, frame
+
+    def release(self):
+        pass
+
+def open_frame_source(source, width=1280, height=720, max_frames=None, fps=None):
+    """Open a webcam index, video file, image directory/glob or 'synthetic[:WxH]'.
+
+    ``fps`` paces the synthetic and image sources at a camera rate; webcams
+    and video files are read as they are.
+    """
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source))
+    source = str(source)
+    if source.startswith("synthetic"):
+        if ":" in source:
+            width, height = (int(v) for v in source.split(":", 1)[1].lower().split("x"))
+        return SyntheticSource(width, height, max_frames=max_frames, fps=fps)
+    if os.path.isdir(source):
+        exts = (".jpg", ".jpeg", ".png", ".bmp")
+        return ImageSequenceSource(sorted(os.path.join(source, f) for f in os.listdir(source)
+                                          if f.lower().endswith(exts)), fps=fps)
+    if any(c in source for c in "*?["):
+        return ImageSequenceSource(sorted(glob.glob(source)), fps=fps)
+    return cv2.VideoCapture(source)
+
+def memory_mb():
+    """Current and peak RSS of this process in MB (None where unavailable)."""
+    current = peak = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return {"rss": current, "peak_rss": peak}
+
+def stats_overlay_lines(stats, scale, dropped=None):
+    summary = stats.summary()["stages_ms"]
+    frame = summary.get("frame", {})
+    lines = [f"Scale {scale:.2f}"]
+    if frame:
+        lines.append(f"FPS {1000 / max(frame['mean'], 1e-6):.1f} (p95 frame {frame['p95']:.1f} ms)")
+    for stage in ("anchor", "composite", "frame_age", "glass_to_glass"):
+        if stage in summary:
+            lines.append(f"{stage} {summary[stage]['p50']:.1f} ms")
+    if dropped is not None:
+        lines.append(f"dropped {dropped}")
+    return lines
+
+def draw_text_lines(frame, lines):
+    for i, line in enumerate(lines):
+        cv2.putText(frame, line, (10, 30 + 24 * i),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200,200,200), 2, cv2.LINE_AA)
+
+def performance_report(stats, seconds=None, source_fps=None):
+    """JSON-ready summary; with the run time, frame counts are also given as rates.
+
+    ``dropped_pct`` is the share of captured frames that were never shown, so
+    with a paced source it is measured against the camera rate.
+    """
+    summary = stats.summary()
+    summary["stages_ms"] = {stage: {k: round(v, 3) for k, v in values.items()}
+                            for stage, values in summary["stages_ms"].items()}
+    frame = summary["stages_ms"].get("frame")
+    if frame:
+        # Frame-time percentiles as FPS: "p5" is the rate of the slowest 5% of frames
+        summary["fps"] = {
+            "mean": round(1000 / max(frame["mean"], 1e-6), 1),
+            "p50": round(1000 / max(frame["p50"], 1e-6), 1),
+            "p5": round(1000 / max(frame["p95"], 1e-6), 1),
+            "p1": round(1000 / max(frame["p99"], 1e-6), 1),
+        }
+    if seconds:
+        counters = summary["counters"]
+        captured, displayed = counters.get("captured", 0), counters.get("displayed", 0)
+        summary["source"] = {
+            "target_fps": source_fps or None,
+            "captured_fps": round(captured / seconds, 1),
+            "displayed_fps": round(displayed / seconds, 1),
+            "dropped_pct": round(100 * (captured - displayed) / captured, 1) if captured else None,
+        }
+    summary["memory_mb"] = memory_mb()
+    return summary
+
+def main_loop(product_path, cam_index=0, pipelined=False, source=None, headless=False,
+              max_frames=None, scale_every=0, stats_overlay=False, report_path=None,
+              anchor=None, detect_every=10, stats_every=0, source_fps=None):
+    """Run the try-on loop.
+
+    ``source`` overrides ``cam_index`` with anything open_frame_source accepts.
+    In headless mode nothing is shown: each frame is JPEG-encoded instead
+    (as the headless service would), ``scale_every`` simulates a +/- press
+    every N frames, and a JSON performance report is printed at the end.
+    With ``anchor`` (a key of anchor_tracker.PLACEMENTS) the product follows
+    the detected face/upper body and +/- changes its size relative to it.
+    With a window, ``stats_every`` > 0 prints a ``[stats]`` line every that
+    many seconds; a summary line is always printed on exit. ``source_fps``
+    paces synthetic and image sources like a camera, so the pipelined path's
+    drops in the report are measured against that rate.
+    """
     prod_bgr_orig, prod_alpha_orig = load_product_with_alpha(product_path)
-    prod_h0, prod_w0 = prod_bgr_orig.shape[:2]
+    sprites = SpriteCache(prod_bgr_orig, prod_alpha_orig)
 
     scale = 0.3  # default small size
+    tracker = None
+    if anchor:
+        from anchor_tracker import AnchorTracker, CascadeDetector, anchored_placement
+        target = "upperbody" if anchor == "chest" else "face"
+        tracker = AnchorTracker(CascadeDetector(target), detect_every=detect_every)
+        scale = 1.0  # relative to the anchor box
 
-    cap = cv2.VideoCapture(cam_index)
+    cap = open_frame_source(cam_index if source is None else source, max_frames=max_frames, fps=source_fps)
     if not cap.isOpened():
-        raise RuntimeError(f"Could not open webcam (index {cam_index})")
+        raise RuntimeError(f"Could not open frame source ({cam_index if source is None else source})")
+
+    if not headless:
+        print("\nControls: +/-: scale | p: snapshot | q/ESC: quit\n")
+
+    stats = PipelineStats(window=max(300, max_frames or 0) if headless else 300)
+    capture = CaptureThread(cap, stats) if pipelined else None
+    if capture:
+        capture.start()
+    started = last_report = last_overlay = time.perf_counter()
+    overlay_lines = []
+    frames_done = 0
+
+    frame = None
+    try:
+        while max_frames is None or frames_done < max_frames:
+            t_frame = time.perf_counter()
+            if capture:
+                item = capture.buffer.acquire(timeout=1.0)
+                if item is None:
+                    if not capture.is_alive():
+                        if not headless:
+                            print("[!] Frame source exhausted or not available, exiting.")
+                        break
+                    continue
+                frame, captured_at = item
+            else:
+                # Reuses the previous frame buffer; the frame is composited in place
+                t0 = time.perf_counter()
+                ret, frame = cap.read(frame)
+                captured_at = time.perf_counter()
+                if not ret:
+                    if not headless:
+                        print("[!] Frame source exhausted or not available, exiting.")
+                    break
+                stats.record("capture", (captured_at - t0) * 1000)
+                stats.count("captured")
+
+            t_resize = time.perf_counter()
+            stats.record("frame_age", (t_resize - captured_at) * 1000)
+
+            if headless and scale_every and frames_done and frames_done % scale_every == 0:
+                scale = scale * 1.1 if (frames_done // scale_every) % 2 else scale * 0.9
 
-    print("\nControls: +/-: scale | p: snapshot | q/ESC: quit\n")
+            box = None
+            if tracker:
+                box = tracker.update(frame)
+                t_anchor = time.perf_counter()
+                stats.record("anchor", (t_anchor - t_resize) * 1000)
+                t_resize = t_anchor
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[!] Webcam frame not available, exiting.")
-            break
+            # Product at the current scale (resized only when the scale changes)
+            if box is not None:
+                sprite_scale, x, y = anchored_placement(box, prod_bgr_orig.shape, anchor, scale)
+                sprite = sprites.get(sprite_scale)
+            else:
+                sprite = sprites.get(scale * 0.3 if tracker else scale)
+            t_compose = time.perf_counter()
+            stats.record("resize", (t_compose - t_resize) * 1000)
 
-        # Resize product according to scale
-        cur_w = max(1, int(prod_w0 * scale))
-        cur_h = max(1, int(prod_h0 * scale))
-        prod_bgr = cv2.resize(prod_bgr_orig, (cur_w, cur_h), interpolation=cv2.INTER_AREA)
-        prod_alpha = cv2.resize(prod_alpha_orig, (cur_w, cur_h), interpolation=cv2.INTER_AREA)
+            display = frame
+            if box is not None:
+                overlay_premultiplied(display, sprite, x, y)
+            else:
+                overlay_center_premultiplied(display, sprite)
 
-        display = frame.copy()
-        overlay_center(display, prod_bgr, prod_alpha)
+            if stats_overlay:
+                if t_compose - last_overlay > 0.5 or not overlay_lines:
+                    overlay_lines = stats_overlay_lines(stats, scale, capture.buffer.dropped if capture else None)
+                    last_overlay = t_compose
+                draw_text_lines(display, overlay_lines)
+            else:
+                cv2.putText(display, f"Scale:{scale:.2f}", (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200,200,200), 2, cv2.LINE_AA)
 
-        cv2.putText(display, f"Scale:{scale:.2f}", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200,200,200), 2, cv2.LINE_AA)
+            t_display = time.perf_counter()
+            stats.record("composite", (t_display - t_compose) * 1000)
+            if headless:
+                cv2.imencode(".jpg", display, [cv2.IMWRITE_JPEG_QUALITY, 80])
+                key = 255
+                t_done = time.perf_counter()
+                stats.record("encode", (t_done - t_display) * 1000)
+            else:
+                cv2.imshow("Centered Try-On (q to quit)", display)
+                key = cv2.waitKey(1) & 0xFF
+                t_done = time.perf_counter()
+                stats.record("display", (t_done - t_display) * 1000)
+            # Capture-to-shown latency (excludes sensor and compositor latency outside the process)
+            stats.record("glass_to_glass", (t_done - captured_at) * 1000)
+            stats.record("frame", (t_done - t_frame) * 1000)
+            stats.count("displayed")
+            frames_done += 1
 
-        cv2.imshow("Centered Try-On (q to quit)", display)
-        key = cv2.waitKey(1) & 0xFF
+            if key in [27, ord('q')]:
+                break
+            elif key in [ord('+'), ord('=')]:
+                scale = min(2.5, scale*1.1)
+                print(f"[+] Scale: {scale:.2f}")
+            elif key in [ord('-'), ord('_')]:
+                scale = max(0.05, scale*0.9)
+                print(f"[-] Scale: {scale:.2f}")
+            elif key == ord('p'):
+                fname = f"snapshot_{int(time.time())}.png"
+                cv2.imwrite(fname, display)
+                print(f"[+] Snapshot saved: {fname}")
 
-        if key in [27, ord('q')]:
-            break
-        elif key in [ord('+'), ord('=')]:
-            scale = min(2.5, scale*1.1)
-        elif key in [ord('-'), ord('_')]:
-            scale = max(0.05, scale*0.9)
-        elif key == ord('p'):
-            fname = f"snapshot_{int(time.time())}.png"
-            cv2.imwrite(fname, display)
-            print(f"[+] Snapshot saved: {fname}")
+            if capture:
+                capture.buffer.release()
+            if tracker:
+                stats.set(**tracker.stats())
+            if not headless and stats_every > 0 and t_done - last_report > stats_every:
+                if capture:
+                    stats.set(dropped=capture.buffer.dropped)
+                print(f"[stats] {stats.format()}")
+                last_report = t_done
+    finally:
+        if capture:
+            capture.stop()
+            capture.join(timeout=2.0)
+            stats.set(dropped=capture.buffer.dropped)
+        cap.release()
+        if not headless:
+            cv2.destroyAllWindows()
+            print(f"[stats] {stats.format()}")
 
-    cap.release()
-    cv2.destroyAllWindows()
+    if headless:
+        report = performance_report(stats, time.perf_counter() - started, source_fps)
+        print(json.dumps(report, indent=2))
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    return stats
 
 def parse_args():
     p = argparse.ArgumentParser(description="Centered live virtual try-on")
     p.add_argument("--product","-p",type=str,default="painting.png",help="Product image path")
     p.add_argument("--cam",type=int,default=0,help="Camera index")
+    p.add_argument("--pipelined",action="store_true",help="Capture on a separate thread, render the newest frame")
+    p.add_argument("--source",type=str,default=None,
+                   help="Frame source instead of --cam: video file, image directory/glob or synthetic[:WxH]")
+    p.add_argument("--headless",action="store_true",help="No window: encode frames and print a performance report")
+    p.add_argument("--frames",type=int,default=None,help="Stop after this many frames")
+    p.add_argument("--scale-every",type=int,default=0,help="Headless: change scale every N frames")
+    p.add_argument("--stats-overlay",action="store_true",help="Draw live FPS/latency stats instead of the scale text")
+    p.add_argument("--report",type=str,default=None,help="Headless: also write the report to this JSON file")
+    p.add_argument("--anchor",choices=["face","ears","neck","chest"],default=None,
+                   help="Follow the detected face/upper body instead of centring the product")
+    p.add_argument("--detect-every",type=int,default=10,help="Initial detection interval in frames (adapts)")
+    p.add_argument("--stats-every",type=float,default=0,help="Print pipeline stats every N seconds (0: only on exit)")
+    p.add_argument("--source-fps",type=float,default=None,
+                   help="Pace synthetic/image sources at this camera rate (default 30 with --pipelined)")
     return p.parse_args()
 
 
@@ -117,4 +652,13 @@ if __name__ == "__main__":
     if not os.path.exists(args.product):
         print(f"[!] Product image not found: {args.product}")
         raise SystemExit(1)
-    main_loop(args.product, cam_index=args.cam)
+    if args.headless and args.frames is None and args.source and args.source.startswith("synthetic"):
+        args.frames = 600
+    if args.source_fps is None and args.pipelined:
+        # Unpaced, the capture thread outruns any compositor and nearly every frame counts as dropped
+        args.source_fps = 30
+    main_loop(args.product, cam_index=args.cam, pipelined=args.pipelined, source=args.source,
+              headless=args.headless, max_frames=args.frames, scale_every=args.scale_every,
+              stats_overlay=args.stats_overlay, report_path=args.report,
+              anchor=args.anchor, detect_every=args.detect_every, stats_every=args.stats_every,
+              source_fps=args.source_fps)
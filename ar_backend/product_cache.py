@@ -0,0 +1,237 @@
+"""
+product_cache.py
+Shared on-disk cache of decoded product sprites for AR sessions.
+
+Sprites (BGR + alpha, alpha already derived from the near-white background)
+are stored once per image content hash as compressed .npz files. An index maps
+each product URL to its content hash and HTTP validators (ETag /
+Last-Modified), so a repeat session for the same product needs no download
+and no mask computation. Stale entries are revalidated with a conditional
+GET, and the least recently used sprites are evicted when the cache grows
+past its size limit. Callers that hand a sprite path to a session fetch it
+with ``pin=True`` and ``release`` it when the session ends; pinned sprites are
+never evicted.
+
+Cache hits only update access times in memory. The index is written when
+entries change (store, eviction), on release, on ``flush`` (at shutdown) and
+otherwise at most every ``save_every`` seconds, so lookups do not queue
+behind disk writes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+from center_virtual_tryon import decode_product_with_alpha
+
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+
+
+class ProductAssetCache:
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, revalidate_after=3600, timeout=10, save_every=60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.timeout = timeout
+        self.save_every = save_every
+        self._index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        # key (URL or local path) -> {hash, etag, last_modified, checked_at}
+        # content hash -> {size, used_at}
+        self._entries, self._assets = self._load_index()
+        # content hash -> number of sessions using the sprite
+        self._pins = {}
+        # Access times changed since the index was last written
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.hits = self.revalidated = self.downloads = self.evictions = 0
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            entries, assets = payload["entries"], payload["assets"]
+        except (OSError, ValueError, KeyError):
+            return {}, {}
+        # Drop anything whose sprite file has gone missing
+        assets = {h: a for h, a in assets.items() if os.path.exists(self.asset_path(h))}
+        entries = {k: e for k, e in entries.items() if e["hash"] in assets}
+        return entries, assets
+
+    def _save_index_locked(self):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"entries": self._entries, "assets": self._assets}, f)
+        os.replace(tmp, self._index_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """Write access times kept in memory since the last save (call on shutdown)."""
+        with self._lock:
+            if self._dirty:
+                self._save_index_locked()
+
+    def asset_path(self, content_hash):
+        return os.path.join(self.root, f"{content_hash}.npz")
+
+    def fetch(self, url, pin=False):
+        """Path of the cached sprite (.npz) for a product image URL.
+
+        With ``pin`` the sprite is kept out of eviction until ``release``.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry and time.time() - entry["checked_at"] < self.revalidate_after:
+                return self._hit_locked(entry, pin)
+            entry = dict(entry) if entry else None
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = requests.get(url, headers=headers, timeout=self.timeout, stream=True)
+
+        if response.status_code == 304 and entry:
+            response.close()
+            with self._lock:
+                # The sprite may have been evicted or replaced while the request was in flight
+                current = self._entries.get(url)
+                if current and current["hash"] == entry["hash"]:
+                    current["checked_at"] = time.time()
+                    self.revalidated += 1
+                    return self._hit_locked(current, pin)
+            response = requests.get(url, timeout=self.timeout, stream=True)
+
+        response.raise_for_status()
+        data = self._read_limited(response)
+        return self._store(url, data, response.headers.get("ETag"), response.headers.get("Last-Modified"), pin)
+
+    def fetch_local(self, path, pin=False):
+        """Same as fetch for an uploaded file on disk; mtime and size act as the validator."""
+        stat = os.stat(path)
+        validator = f"{stat.st_mtime_ns}:{stat.st_size}"
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.get("etag") == validator:
+                return self._hit_locked(entry, pin)
+        with open(path, "rb") as f:
+            data = f.read()
+        return self._store(key, data, validator, None, pin)
+
+    def release(self, path):
+        """Unpin a sprite returned by a fetch with ``pin=True``."""
+        content_hash = os.path.splitext(os.path.basename(path))[0]
+        with self._lock:
+            # Eviction may have been held back by this pin
+            evicted = self._unpin_locked(content_hash) and self._evict_locked()
+            if evicted or self._dirty:
+                self._save_index_locked()
+
+    def _pin_locked(self, content_hash):
+        self._pins[content_hash] = self._pins.get(content_hash, 0) + 1
+
+    def _unpin_locked(self, content_hash):
+        """Drop one pin; True when the sprite is no longer pinned."""
+        count = self._pins.get(content_hash, 0) - 1
+        if count > 0:
+            self._pins[content_hash] = count
+            return False
+        self._pins.pop(content_hash, None)
+        return True
+
+    def _hit_locked(self, entry, pin=False):
+        self.hits += 1
+        content_hash = entry["hash"]
+        self._assets[content_hash]["used_at"] = time.time()
+        if pin:
+            self._pin_locked(content_hash)
+        # Access (and revalidation) times survive restarts for LRU eviction, written in batches
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_every:
+            self._save_index_locked()
+        return self.asset_path(content_hash)
+
+    def _read_limited(self, response):
+        chunks, total = [], 0
+        for chunk in response.iter_content(64 * 1024):
+            total += len(chunk)
+            if total > MAX_DOWNLOAD_BYTES:
+                response.close()
+                raise ValueError(f"Product image larger than {MAX_DOWNLOAD_BYTES} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _store(self, key, data, etag, last_modified, pin=False):
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self.asset_path(content_hash)
+        with self._lock:
+            self.downloads += 1
+            known = content_hash in self._assets
+            if known:  # keep the existing file until the entry below points at it
+                self._pin_locked(content_hash)
+
+        if not known:
+            # Decoding and the alpha mask are the expensive part; do them outside the lock
+            bgr, alpha = decode_product_with_alpha(data)
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".npz.tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, bgr=bgr, alpha=alpha)
+            os.replace(tmp, path)
+
+        with self._lock:
+            now = time.time()
+            asset = self._assets.setdefault(content_hash, {"size": os.path.getsize(path), "used_at": now})
+            asset["used_at"] = now
+            if pin:
+                self._pin_locked(content_hash)
+            if known:
+                self._unpin_locked(content_hash)
+            self._entries[key] = {"hash": content_hash, "etag": etag,
+                                  "last_modified": last_modified, "checked_at": now}
+            self._evict_locked(keep=content_hash)
+            self._save_index_locked()
+        return path
+
+    def _evict_locked(self, keep=None):
+        """Remove least recently used, unpinned sprites until under ``max_bytes``; True if any went."""
+        total = sum(a["size"] for a in self._assets.values())
+        evicted = False
+        for content_hash, asset in sorted(self._assets.items(), key=lambda item: item[1]["used_at"]):
+            if total <= self.max_bytes:
+                break
+            if content_hash == keep or content_hash in self._pins:
+                continue
+            try:
+                os.remove(self.asset_path(content_hash))
+            except FileNotFoundError:
+                pass
+            total -= asset["size"]
+            del self._assets[content_hash]
+            self._entries = {k: e for k, e in self._entries.items() if e["hash"] != content_hash}
+            self.evictions += 1
+            evicted = True
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                "urls": len(self._entries),
+                "sprites": len(self._assets),
+                "pinned": len(self._pins),
+                "bytes": sum(a["size"] for a in self._assets.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "downloads": self.downloads,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,330 @@
+"""
+session_manager.py
+Bounded, thread-safe manager for the GUI try-on subprocesses.
+
+At most ``max_running`` sessions run at once; further requests wait in a FIFO
+queue of up to ``max_queued`` and are rejected beyond that. Each child runs
+in its own temporary working directory with stdout/stderr
+streamed line by line into a bounded log buffer instead of being collected by
+``communicate()``. A reaper thread stops sessions that exceed the maximum
+duration or, when ``idle_timeout`` is set, stay idle (no heartbeat and no
+user-driven output; periodic ``[stats]`` lines do not count). The idle check
+is off by default because a user watching the try-on produces neither;
+enable it only for clients that send heartbeats. The reaper also drops
+queued sessions that waited too long, collects dead processes, starts queued
+sessions as slots free up and removes orphaned working directories left
+behind by earlier runs. Snapshots a child
+saved in its working directory are moved to ``snapshot_dir/<session id>``
+before the directory is removed.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from glob import glob
+
+WORKDIR_PREFIX = "ar_session_"
+SNAPSHOT_PATTERN = "snapshot_*.png"
+# Output the child prints on its own; it says nothing about whether anyone is using it
+PASSIVE_OUTPUT_PREFIXES = ("[stats]",)
+
+
+class SessionLimitError(RuntimeError):
+    pass
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def process_usage(pid):
+    """RSS (MB) and CPU seconds of a child process, read from /proc (None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next((int(line.split()[1]) / 1024 for line in f if line.startswith("VmRSS:")), None)
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        return {"rss_mb": round(rss, 1) if rss is not None else None, "cpu_s": round(cpu, 2)}
+    except (OSError, ValueError, IndexError):
+        return {"rss_mb": None, "cpu_s": None}
+
+
+class ARSession:
+    def __init__(self, session_id, product_path, cam_index, on_finish=None):
+        self.session_id = session_id
+        self.product_path = product_path
+        self.cam_index = cam_index
+        self.state = "queued"
+        self.queued_at = time.time()
+        self.started_at = None
+        self.last_activity = self.queued_at
+        self.process = None
+        self.workdir = None
+        self.log = deque(maxlen=200)
+        self.exit_reason = None
+        self.on_finish = on_finish
+
+    def info(self):
+        info = {
+            "state": self.state,
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "last_activity": self.last_activity,
+        }
+        if self.process is not None:
+            info["pid"] = self.process.pid
+            info["running"] = self.process.poll() is None
+            info.update(process_usage(self.process.pid))
+        return info
+
+
+class ARSessionManager:
+    def __init__(self, script_path, max_running=2, max_queued=8, idle_timeout=None,
+                 max_duration=1800, max_queue_wait=600, reap_interval=5.0, snapshot_dir=None):
+        self.script_path = os.path.abspath(script_path)
+        self.snapshot_dir = os.path.abspath(snapshot_dir or os.path.join(
+            os.path.dirname(self.script_path), "snapshots"))
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.max_queue_wait = max_queue_wait
+        self.reap_interval = reap_interval
+        self._sessions = {}
+        self._queue = deque()
+        self._lock = threading.RLock()
+        self._wait_times = deque(maxlen=500)
+        self.counters = {"started": 0, "finished": 0, "rejected": 0,
+                         "idle_timeouts": 0, "duration_timeouts": 0, "queue_timeouts": 0,
+                         "snapshots_saved": 0, "orphan_dirs_removed": 0}
+        self._stop_event = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self._reaper.start()
+
+    # -- public API ---------------------------------------------------------
+
+    def submit(self, product_path, cam_index=0, on_finish=None):
+        """Start a session now or queue it; raises SessionLimitError when the queue is full.
+
+        ``on_finish`` is called once when the session ends, however it ends.
+        """
+        with self._lock:
+            running = sum(1 for s in self._sessions.values() if s.state == "running")
+            if running >= self.max_running and len(self._queue) >= self.max_queued:
+                self.counters["rejected"] += 1
+                raise SessionLimitError("AR service is at capacity, try again shortly")
+            session = ARSession(uuid.uuid4().hex, product_path, cam_index, on_finish)
+            self._sessions[session.session_id] = session
+            self._queue.append(session.session_id)
+            self._start_queued_locked()
+            return session.session_id, session.state, self._queue_position_locked(session.session_id)
+
+    def stop(self, session_id, reason="stopped"):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            if session.state == "queued":
+                self._queue.remove(session_id)
+                self._finish_locked(session, reason)
+                return True
+        self._terminate(session, reason)
+        return True
+
+    def heartbeat(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            session.last_activity = time.time()
+            return True
+
+    def logs(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return list(session.log) if session else None
+
+    def status(self):
+        with self._lock:
+            sessions = {sid: s.info() for sid, s in self._sessions.items()}
+            waits = list(self._wait_times)
+            counters = dict(self.counters)
+            queued = len(self._queue)
+        running = sum(1 for s in sessions.values() if s["state"] == "running")
+        return {
+            "running": running,
+            "queued": queued,
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "wait_s": {"p50": _percentile(waits, 50), "p95": _percentile(waits, 95), "count": len(waits)},
+            "counters": counters,
+            "sessions": sessions,
+        }
+
+    def shutdown(self):
+        self._stop_event.set()
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._queue.clear()
+        for session in sessions:
+            self._terminate(session, "shutdown")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    # -- internals ----------------------------------------------------------
+
+    def _queue_position_locked(self, session_id):
+        return self._queue.index(session_id) + 1 if session_id in self._queue else 0
+
+    def _start_queued_locked(self):
+        running = sum(1 for s in self._sessions.values() if s.state == "running")
+        while self._queue and running < self.max_running:
+            session = self._sessions[self._queue.popleft()]
+            try:
+                self._launch_locked(session)
+            except OSError as e:
+                session.log.append(f"failed to start: {e}")
+                self._finish_locked(session, "launch_failed")
+                continue
+            running += 1
+
+    def _launch_locked(self, session):
+        session.workdir = tempfile.mkdtemp(prefix=WORKDIR_PREFIX)
+        cmd = [sys.executable, "-u", self.script_path,
+               "--product", session.product_path, "--cam", str(session.cam_index)]
+        print(f"Starting AR session {session.session_id} with command: {' '.join(cmd)}")
+        session.process = subprocess.Popen(
+            cmd, cwd=session.workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL, text=True, bufsize=1,
+        )
+        session.state = "running"
+        session.started_at = session.last_activity = time.time()
+        self._wait_times.append(session.started_at - session.queued_at)
+        self.counters["started"] += 1
+        threading.Thread(target=self._drain, args=(session,), daemon=True).start()
+
+    def _drain(self, session):
+        """Stream child output line by line into the session's bounded log.
+
+        Output other than the child's periodic reports (a resize, a saved
+        snapshot) follows something the user did, so it counts as activity.
+        """
+        for line in session.process.stdout:
+            line = line.rstrip()
+            session.log.append(line)
+            if not line.startswith(PASSIVE_OUTPUT_PREFIXES):
+                session.last_activity = time.time()
+        session.process.stdout.close()
+
+    def _terminate(self, session, reason):
+        process = session.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        with self._lock:
+            if session.session_id in self._sessions:
+                self._finish_locked(session, reason)
+                self._start_queued_locked()
+
+    def _finish_locked(self, session, reason):
+        session.state = "finished"
+        session.exit_reason = reason
+        self._sessions.pop(session.session_id, None)
+        self.counters["finished"] += 1
+        if session.workdir:
+            self._keep_snapshots(session.workdir, session.session_id)
+            shutil.rmtree(session.workdir, ignore_errors=True)
+        if session.on_finish is not None:
+            try:
+                session.on_finish()
+            except Exception as e:
+                print(f"AR session {session.session_id} cleanup failed: {e}")
+        print(f"AR session {session.session_id} completed ({reason})")
+
+    def _keep_snapshots(self, workdir, name):
+        """Move the snapshots saved in ``workdir`` to ``snapshot_dir/name``."""
+        saved = glob(os.path.join(workdir, SNAPSHOT_PATTERN))
+        if not saved:
+            return
+        target = os.path.join(self.snapshot_dir, name)
+        os.makedirs(target, exist_ok=True)
+        for path in saved:
+            try:
+                shutil.move(path, os.path.join(target, os.path.basename(path)))
+            except OSError as e:
+                print(f"Could not keep snapshot {path}: {e}")
+                continue
+            self.counters["snapshots_saved"] += 1
+        print(f"Saved {len(saved)} snapshot(s) to {target}")
+
+    def _reap_loop(self):
+        while True:
+            self.reap()
+            self._remove_orphan_workdirs()
+            if self._stop_event.wait(self.reap_interval):
+                return
+
+    def reap(self):
+        now = time.time()
+        expired = []
+        with self._lock:
+            for session in list(self._sessions.values()):
+                if session.state == "queued":
+                    if now - session.queued_at > self.max_queue_wait:
+                        self.counters["queue_timeouts"] += 1
+                        self._queue.remove(session.session_id)
+                        self._finish_locked(session, "queue_timeout")
+                    continue
+                if session.state != "running":
+                    continue
+                if session.process.poll() is not None:
+                    self._finish_locked(session, f"exited ({session.process.returncode})")
+                elif now - session.started_at > self.max_duration:
+                    self.counters["duration_timeouts"] += 1
+                    expired.append((session, "max_duration"))
+                elif self.idle_timeout and now - session.last_activity > self.idle_timeout:
+                    self.counters["idle_timeouts"] += 1
+                    expired.append((session, "idle"))
+            self._start_queued_locked()
+        for session, reason in expired:
+            self._terminate(session, reason)
+
+    def _remove_orphan_workdirs(self):
+        """Working directories of sessions that did not end cleanly (e.g. a crashed server).
+
+        Only directories older than the maximum session duration are removed,
+        so a second server on the same host never loses a live session's files.
+        """
+        root = tempfile.gettempdir()
+        cutoff = time.time() - self.max_duration
+        with self._lock:
+            live = {s.workdir for s in self._sessions.values() if s.workdir}
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if not name.startswith(WORKDIR_PREFIX) or path in live:
+                continue
+            try:
+                stale = os.path.isdir(path) and os.path.getmtime(path) < cutoff
+            except OSError:
+                continue
+            if stale:
+                with self._lock:
+                    self._keep_snapshots(path, name[len(WORKDIR_PREFIX):])
+                    self.counters["orphan_dirs_removed"] += 1
+                shutil.rmtree(path, ignore_errors=True)
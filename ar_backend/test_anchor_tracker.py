@@ -0,0 +1,56 @@
+"""Tests for anchor_tracker: log-step scale quantization, placement offsets and losing the target."""
+
+import math
+
+import numpy as np
+import pytest
+
+from anchor_tracker import PLACEMENTS, AnchorTracker, anchored_placement
+
+PRODUCT = (200, 400, 3)  # h, w
+
+
+def test_box_jitter_maps_onto_the_same_scale():
+    scales = {anchored_placement((100, 100, w, w), PRODUCT, "face")[0] for w in (398, 400, 402)}
+    assert len(scales) == 1
+
+
+@pytest.mark.parametrize("width", [10, 37, 200, 400, 1500])
+def test_scale_is_a_power_of_the_step_within_half_a_step(width):
+    scale = anchored_placement((0, 0, width, width), PRODUCT, "face")[0]
+    exponent = math.log(scale) / math.log(1.05)
+    assert exponent == pytest.approx(round(exponent))
+    assert abs(math.log(scale / (width / PRODUCT[1]))) <= math.log(1.05) / 2 + 1e-9
+
+
+def test_small_boxes_are_not_clamped_to_a_fixed_minimum():
+    tiny = anchored_placement((0, 0, 8, 8), PRODUCT, "face")[0]
+    small = anchored_placement((0, 0, 16, 16), PRODUCT, "face")[0]
+    assert tiny < 0.05 and small / tiny == pytest.approx(2, rel=0.06)
+
+
+def test_size_multiplier_scales_the_product():
+    base = anchored_placement((0, 0, 200, 200), PRODUCT, "face")[0]
+    bigger = anchored_placement((0, 0, 200, 200), PRODUCT, "face", size_multiplier=1.5)[0]
+    assert bigger / base == pytest.approx(1.5, rel=0.06)
+
+
+@pytest.mark.parametrize("placement", sorted(PLACEMENTS))
+def test_product_is_centred_on_the_offset_anchor(placement):
+    (dx, dy), _ = PLACEMENTS[placement]
+    x, y, w, h = 120, 80, 160, 200
+    scale, left, top = anchored_placement((x, y, w, h), PRODUCT, placement)
+    sw, sh = int(PRODUCT[1] * scale), int(PRODUCT[0] * scale)
+    assert left + sw / 2 == pytest.approx(x + w / 2 + dx * w, abs=1)
+    assert top + sh / 2 == pytest.approx(y + h / 2 + dy * h, abs=1)
+
+
+def test_tracker_drops_the_box_after_repeated_misses():
+    boxes = iter([np.array([40, 30, 50, 50], np.float32)] + [None] * 5)
+    tracker = AnchorTracker(lambda gray: next(boxes), detect_every=1, max_misses=3)
+    frame = np.random.default_rng(0).integers(0, 256, (120, 160), dtype=np.uint8)
+    assert tracker.update(frame) is not None
+    held = [tracker.update(frame) for _ in range(3)]
+    assert all(box is not None for box in held)
+    assert tracker.update(frame) is None
+    assert tracker.smoothed is None
@@ -0,0 +1,49 @@
+"""Tests for the premultiplied uint8 compositor against the float reference blend."""
+
+import numpy as np
+import pytest
+
+from center_virtual_tryon import (
+    PremultipliedSprite,
+    overlay_center,
+    overlay_center_premultiplied,
+    overlay_premultiplied,
+)
+
+
+def random_case(rng):
+    H, W = rng.integers(40, 200, 2)
+    h, w = rng.integers(1, 260, 2)
+    frame = rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+    bgr = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    alpha = rng.integers(0, 256, (h, w), dtype=np.uint8)
+    alpha[rng.random((h, w)) < 0.3] = 0
+    alpha[rng.random((h, w)) < 0.3] = 255
+    return frame, bgr, alpha
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_premultiplied_matches_float_within_one_lsb(seed):
+    # Sprites larger than the frame exercise the clipped edges as well
+    frame, bgr, alpha = random_case(np.random.default_rng(seed))
+    expected = overlay_center(frame.copy(), bgr, alpha).astype(np.int16)
+    actual = overlay_center_premultiplied(frame.copy(), PremultipliedSprite(bgr, alpha)).astype(np.int16)
+    assert np.abs(expected - actual).max() <= 1
+
+
+def test_opaque_and_transparent_pixels_are_exact():
+    frame = np.full((4, 4, 3), 50, dtype=np.uint8)
+    bgr = np.full((2, 2, 3), 200, dtype=np.uint8)
+    alpha = np.array([[0, 255], [255, 0]], dtype=np.uint8)
+    out = overlay_premultiplied(frame, PremultipliedSprite(bgr, alpha), 1, 1)
+    assert out[1, 1].tolist() == [50, 50, 50] and out[1, 2].tolist() == [200, 200, 200]
+    assert out[0, 0].tolist() == [50, 50, 50]
+
+
+def test_placement_outside_the_frame_leaves_it_untouched():
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    sprite = PremultipliedSprite(np.full((4, 4, 3), 255, np.uint8), np.full((4, 4), 255, np.uint8))
+    overlay_premultiplied(frame, sprite, 20, -20, scratch=np.empty((4, 4, 3), np.uint8))
+    assert not frame.any()
+    overlay_premultiplied(frame, sprite, -2, -2)
+    assert frame[:2, :2].all() and not frame[2:, :].any()
@@ -0,0 +1,190 @@
+"""
+tryon_service.py
+Headless, in-process try-on compositing for frames sent by the browser.
+
+The browser captures the webcam, sends each frame as JPEG and gets the
+composited JPEG back. Decoding, compositing and encoding run on a warm pool
+of worker threads (OpenCV releases the GIL for all three), so a session costs
+one preloaded sprite set instead of a Python process with its own camera and
+window.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from center_virtual_tryon import SpriteCache, load_product_with_alpha, overlay_center_premultiplied
+
+# Scales a session's sprites are prepared for up front (the UI steps by 10%)
+PRELOAD_SCALES = (0.2, 0.3, 0.4, 0.5)
+# Same limits as the +/- keys of the GUI try-on
+MIN_SCALE, MAX_SCALE = 0.05, 2.5
+DEFAULT_JPEG_QUALITY = 80
+
+
+class FrameDecodeError(ValueError):
+    pass
+
+
+def clamp_scale(scale):
+    return min(MAX_SCALE, max(MIN_SCALE, float(scale)))
+
+
+class HeadlessSession:
+    def __init__(self, session_id, prod_bgr, prod_alpha, scale=0.3):
+        self.session_id = session_id
+        scale = clamp_scale(scale)
+        self.sprites = SpriteCache(prod_bgr, prod_alpha)
+        for s in (*PRELOAD_SCALES, scale):
+            self.sprites.get(s)
+        self.scale = scale
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    def touch(self):
+        """Record a frame; frames of one session are submitted from several request threads."""
+        with self._lock:
+            self.last_used = time.time()
+            self.frames += 1
+
+
+class CompositorPool:
+    """Warm worker threads that decode, composite and re-encode JPEG frames.
+
+    Sprites are shared between workers, so each worker composites through its
+    own scratch buffer. Throughput is tracked both as wall-clock frames/sec
+    and as frames per CPU-second spent in the workers (frames/sec per core).
+    """
+
+    def __init__(self, workers=None, window=500):
+        self.workers = workers or os.cpu_count() or 1
+        # One worker per core; stop OpenCV from spawning its own threads inside each
+        cv2.setNumThreads(1)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tryon")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (finished_at, cpu_s, decode_ms, composite_ms, encode_ms) per frame
+        self._samples = deque(maxlen=window)
+        self.frames = 0
+        self.errors = 0
+        for f in [self._executor.submit(self._warm) for _ in range(self.workers)]:
+            f.result()
+
+    def _warm(self):
+        frame = np.zeros((64, 64, 3), np.uint8)
+        cv2.imdecode(cv2.imencode(".jpg", frame)[1], cv2.IMREAD_COLOR)
+
+    def _scratch(self, shape):
+        buf = getattr(self._local, "scratch", None)
+        if buf is None or buf.shape[0] < shape[0] or buf.shape[1] < shape[1]:
+            h = max(shape[0], buf.shape[0] if buf is not None else 0)
+            w = max(shape[1], buf.shape[1] if buf is not None else 0)
+            buf = self._local.scratch = np.empty((h, w, 3), np.uint8)
+        return buf
+
+    def _process(self, session, jpeg_bytes, scale, quality):
+        cpu0 = time.thread_time()
+        t0 = time.perf_counter()
+        frame = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            with self._lock:
+                self.errors += 1
+            raise FrameDecodeError("Frame is not a decodable image")
+        t1 = time.perf_counter()
+        sprite = session.sprites.get(scale)
+        overlay_center_premultiplied(frame, sprite, self._scratch(sprite.shape))
+        t2 = time.perf_counter()
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        t3 = time.perf_counter()
+        with self._lock:
+            self.frames += 1
+            self._samples.append((t3, time.thread_time() - cpu0,
+                                  (t1 - t0) * 1000, (t2 - t1) * 1000, (t3 - t2) * 1000))
+        return encoded.tobytes()
+
+    def submit(self, session, jpeg_bytes, scale=None, quality=DEFAULT_JPEG_QUALITY):
+        """Future resolving to the composited frame as JPEG bytes."""
+        session.touch()
+        return self._executor.submit(self._process, session, jpeg_bytes,
+                                     session.scale if scale is None else scale, quality)
+
+    def composite(self, session, jpeg_bytes, scale=None, quality=DEFAULT_JPEG_QUALITY):
+        return self.submit(session, jpeg_bytes, scale, quality).result()
+
+    def stats(self):
+        with self._lock:
+            samples = list(self._samples)
+            frames, errors = self.frames, self.errors
+        result = {"workers": self.workers, "frames": frames, "errors": errors}
+        if len(samples) < 2:
+            return result
+        span = samples[-1][0] - samples[0][0]
+        cpu_s = sum(s[1] for s in samples)
+        result["fps"] = round((len(samples) - 1) / span, 1) if span > 0 else None
+        result["fps_per_core"] = round(len(samples) / cpu_s, 1) if cpu_s > 0 else None
+        for i, stage in enumerate(("decode", "composite", "encode"), start=2):
+            values = sorted(s[i] for s in samples)
+            result[f"{stage}_ms_p50"] = round(values[len(values) // 2], 2)
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class HeadlessSessionStore:
+    """Headless sessions by id, with a cap and an idle timeout."""
+
+    def __init__(self, max_sessions=64, idle_timeout=300):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._reserved = 0  # slots held by sessions still loading their sprites
+        self._lock = threading.Lock()
+
+    def create(self, product_path, scale=0.3):
+        # Take a slot before the (expensive) sprite load, so a full store rejects at once
+        with self._lock:
+            self._expire_locked()
+            if len(self._sessions) + self._reserved >= self.max_sessions:
+                raise RuntimeError("Too many headless try-on sessions")
+            self._reserved += 1
+        try:
+            prod_bgr, prod_alpha = load_product_with_alpha(product_path)
+            session = HeadlessSession(uuid.uuid4().hex, prod_bgr, prod_alpha, scale)
+            with self._lock:
+                self._sessions[session.session_id] = session
+        finally:
+            with self._lock:
+                self._reserved -= 1
+        return session
+
+    def full(self):
+        with self._lock:
+            self._expire_locked()
+            return len(self._sessions) + self._reserved >= self.max_sessions
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def remove(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def _expire_locked(self):
+        cutoff = time.time() - self.idle_timeout
+        for session_id in [s for s, v in self._sessions.items() if v.last_used < cutoff]:
+            del self._sessions[session_id]
+
+    def __len__(self):
+        with self._lock:
+            self._expire_locked()
+            return len(self._sessions)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Throughput of scheme categorisation on synthetic scheme descriptions.
+
+Compares ``SchemeClassifier`` (per scheme and in batch mode) with two
+substring baselines:
+
+- the previous first-match chain (one ``any(word in text)`` scan per
+  category, stopping at the first hit), which does less work than scoring
+  and is the floor for any classifier that looks at every category
+- the same substring checks scoring every category with the classifier's
+  weights, the like-for-like way to get the classifier's output without it
+
+It then breaks down how the top label differs from the previous result: the
+previous chain found nothing, its first-in-order category lost to a
+better-scoring one, or its substring hit is not a keyword match at a word
+start (e.g. "fair" in "affairs"). A second run multiplies the keyword lists
+with filler keywords to show how each approach scales with the keyword count.
+
+    python benchmark_classifier.py --schemes 5000
+"""
+
+import argparse
+import random
+import time
+
+from scheme_classifier import CATEGORY_KEYWORDS, SchemeClassifier
+
+LEGACY_KEYWORDS = [
+    ('Cluster Development', ['cluster', 'group', 'cooperative', 'nhdp']),
+    ('Skill Training', ['training', 'skill', 'capacity']),
+    ('Marketing Support', ['marketing', 'exhibition', 'fair', 'promotion']),
+    ('Financial Assistance', ['financial', 'loan', 'subsidy', 'grant']),
+    ('Infrastructure', ['infrastructure', 'building', 'facility', 'chcds']),
+    ('Women Empowerment', ['women', 'female', 'lady']),
+    ('Export Promotion', ['export', 'international', 'global']),
+]
+
+FILLER = ('scheme programme government ministry artisans craft handicraft handloom sector support '
+          'development india national state district beneficiaries eligible apply portal assistance '
+          'implementation guidelines component objective rural traditional products design quality '
+          'technology livelihood income').split()
+
+
+def legacy_categorize(name, description, keywords=LEGACY_KEYWORDS):
+    """The previous categorize_scheme: first category with any substring hit wins."""
+    text = (name + " " + description).lower()
+    for category, words in keywords:
+        if any(word in text for word in words):
+            return category
+    return 'General Support'
+
+
+def substring_scores(name, description, keywords=CATEGORY_KEYWORDS, name_weight=2.0):
+    """Weighted score of every category from plain substring checks."""
+    name, description = name.lower(), description.lower()
+    scores = {}
+    for category, words in keywords.items():
+        for word, weight in words.items():
+            hit = (name_weight if word in name else 0.0) + (1.0 if word in description else 0.0)
+            if hit:
+                scores[category] = scores.get(category, 0.0) + weight * hit
+    return scores
+
+
+def synthetic_schemes(n, seed=0):
+    rng = random.Random(seed)
+    keywords = [w for words in CATEGORY_KEYWORDS.values() for w in words]
+    schemes = []
+    for _ in range(n):
+        name_words = rng.sample(FILLER, 3) + rng.sample(keywords, rng.randint(0, 2))
+        rng.shuffle(name_words)
+        body = [rng.choice(FILLER) for _ in range(rng.randint(25, 60))]
+        for _ in range(rng.randint(0, 4)):
+            body.insert(rng.randrange(len(body) + 1), rng.choice(keywords))
+        schemes.append((' '.join(name_words).title() + ' Scheme', ' '.join(body) + '.'))
+    return schemes
+
+
+def inflated_keywords(factor, seed=1):
+    """Each category's keywords plus ``factor`` x as many filler keywords that never match."""
+    rng = random.Random(seed)
+    inflated = {}
+    for category, words in CATEGORY_KEYWORDS.items():
+        extra = {''.join(rng.choice('qxzjv') for _ in range(8)): 1.0 for _ in range(len(words) * factor)}
+        inflated[category] = {**words, **extra}
+    legacy = [(c, list(w)) for c, w in inflated.items()]
+    return inflated, legacy
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(schemes, keywords, legacy_keywords, label):
+    classifier = SchemeClassifier(keywords)
+    legacy, t_legacy = timed(lambda: [legacy_categorize(n, d, legacy_keywords) for n, d in schemes])
+    _, t_substring = timed(lambda: [substring_scores(n, d, keywords) for n, d in schemes])
+    single, t_single = timed(lambda: [classifier.classify(n, d) for n, d in schemes])
+    batch, t_batch = timed(lambda: classifier.classify_batch(schemes))
+    assert single == batch, 'batch and per-scheme results differ'
+
+    n = len(schemes)
+    agree = sum(1 for old, new in zip(legacy, single) if old == new[0][0]) / n
+    changed = {'previously unmatched': 0, 'outscored by another category': 0, 'not a word-start match': 0}
+    for (name, description), old, new in zip(schemes, legacy, single):
+        if old == new[0][0]:
+            continue
+        if old == 'General Support':
+            changed['previously unmatched'] += 1
+        elif old in classifier.scores(name, description):
+            changed['outscored by another category'] += 1
+        else:
+            changed['not a word-start match'] += 1
+    # Texts hitting a single legacy category, where first-match order cannot matter
+    single_topic = [i for i, (name, desc) in enumerate(schemes)
+                    if sum(any(w in (name + ' ' + desc).lower() for w in words)
+                           for _, words in legacy_keywords) == 1]
+    agree_single = sum(1 for i in single_topic if legacy[i] == single[i][0][0]) / max(len(single_topic), 1)
+    multi = sum(1 for labels in single if len(labels) > 1) / n
+    keyword_count = sum(len(w) for w in keywords.values())
+    print(f"\n{label}: {n} schemes, {keyword_count} keywords")
+    for name, seconds in (('previous first-match chain', t_legacy),
+                          ('substring, every category', t_substring),
+                          ('compiled, per scheme', t_single),
+                          ('compiled, batch', t_batch)):
+        print(f"  {name:<28}{seconds * 1000:>9.1f} ms {n / seconds:>11,.0f} schemes/s")
+    print(f"  top label agrees with previous: {agree:.1%} overall, {agree_single:.1%} on "
+          f"{len(single_topic)} single-topic texts; multi-label results: {multi:.1%}")
+    print('  relabelled: ' + ', '.join(f'{reason} {count / n:.1%}' for reason, count in changed.items()))
+
+
+def main():
+    p = argparse.ArgumentParser(description='Scheme categorisation benchmark')
+    p.add_argument('--schemes', type=int, default=5000)
+    p.add_argument('--inflate', type=int, default=20, help='Filler keywords per real keyword in the scaling run')
+    args = p.parse_args()
+
+    schemes = synthetic_schemes(args.schemes)
+    run(schemes, CATEGORY_KEYWORDS, LEGACY_KEYWORDS, 'Shipped keywords')
+    keywords, legacy = inflated_keywords(args.inflate)
+    run(schemes, keywords, legacy, f'Keyword lists x{args.inflate + 1}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Profile-to-scheme matching cost on synthetic schemes and artisan profiles.
+
+Three ways to answer "which schemes does this artisan qualify for":
+
+- text scan: parse every scheme's eligibility text on each request
+- predicate scan: precomputed predicates, still checked scheme by scheme
+- index: ``EligibilityIndex.match`` bitset lookups, on the index read back
+  from the JSON the ``/api/schemes/eligible`` route serves
+
+The index result is checked against the predicate scan for every profile.
+
+    python benchmark_eligibility.py --schemes 5000 --profiles 2000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from eligibility import CRAFTS, STATES, EligibilityIndex, parse_eligibility, predicate_matches
+
+GENERIC_LINES = ['Registered handicraft artisans', 'Indian citizenship', 'Willingness to participate',
+                 'Good track record', 'Quality standards compliance', 'No criminal record']
+
+
+def synthetic_schemes(n, seed=0):
+    rng = random.Random(seed)
+    crafts = [aliases[0] for aliases in CRAFTS.values()]
+    schemes = []
+    for i in range(n):
+        lines = rng.sample(GENERIC_LINES, 3)
+        if rng.random() < 0.15:
+            lines.append('Women artisans only' if rng.random() < 0.5 else 'Women artisans (priority)')
+        if rng.random() < 0.3:
+            low = rng.choice([18, 21, 25])
+            lines.append(f'Age {low}-{low + rng.choice([20, 30, 40])} years')
+        if rng.random() < 0.25:
+            lines.append(f'Minimum {rng.randint(1, 10)} years of experience')
+        if rng.random() < 0.1:
+            lines.append('Artisans from ' + ' and '.join(rng.sample(STATES, rng.randint(1, 3))).title())
+        if rng.random() < 0.1:
+            lines.append(f'Practising {rng.choice(crafts)} artisans')
+        schemes.append({'id': f'scheme-{i}', 'name': f'Synthetic Scheme {i}', 'eligibility': lines})
+    return schemes
+
+
+def synthetic_profiles(n, seed=1):
+    rng = random.Random(seed)
+    crafts = list(CRAFTS)
+    profiles = []
+    for _ in range(n):
+        profiles.append({
+            'gender': rng.choice(['female', 'male', None]),
+            'age': rng.choice([None] + list(range(16, 70))),
+            'state': rng.choice(STATES).title() if rng.random() < 0.9 else None,
+            'craftType': rng.choice(crafts + [None]),
+            'experience': rng.choice([None] + list(range(0, 25))),
+        })
+    return profiles
+
+
+def scan(schemes, predicates, profile):
+    eligible, maybe = set(), set()
+    for scheme, predicate in zip(schemes, predicates):
+        status = predicate_matches(predicate, profile)
+        if status == 'eligible':
+            eligible.add(scheme['id'])
+        elif status == 'maybe':
+            maybe.add(scheme['id'])
+    return eligible, maybe
+
+
+def main():
+    p = argparse.ArgumentParser(description='Eligibility matching benchmark')
+    p.add_argument('--schemes', type=int, default=5000)
+    p.add_argument('--profiles', type=int, default=2000)
+    p.add_argument('--text-profiles', type=int, default=20, help='Profiles for the (slow) text scan')
+    args = p.parse_args()
+
+    schemes = synthetic_schemes(args.schemes)
+    profiles = synthetic_profiles(args.profiles)
+
+    start = time.perf_counter()
+    predicates = [parse_eligibility(s['eligibility']) for s in schemes]
+    t_parse = time.perf_counter() - start
+    for scheme, predicate in zip(schemes, predicates):
+        scheme['eligibilityCriteria'] = predicate
+    start = time.perf_counter()
+    built = EligibilityIndex.build(schemes)
+    t_build = time.perf_counter() - start
+    persisted = json.dumps(built.to_json())
+    start = time.perf_counter()
+    index = EligibilityIndex.from_json(json.loads(persisted))
+    t_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for profile in profiles[:args.text_profiles]:
+        scan(schemes, [parse_eligibility(s['eligibility']) for s in schemes], profile)
+    t_text = (time.perf_counter() - start) / args.text_profiles
+
+    start = time.perf_counter()
+    expected = [scan(schemes, predicates, profile) for profile in profiles]
+    t_scan = (time.perf_counter() - start) / len(profiles)
+
+    start = time.perf_counter()
+    results = [index.match(profile) for profile in profiles]
+    t_index = (time.perf_counter() - start) / len(profiles)
+
+    start = time.perf_counter()
+    top = [index.match(profile, limit=20) for profile in profiles]
+    t_top = (time.perf_counter() - start) / len(profiles)
+
+    for (eligible, maybe), result in zip(expected, results):
+        assert set(result['eligible']) == eligible and set(result['maybe']) == maybe, 'index disagrees with scan'
+    assert all(t['eligible'] == r['eligible'][:20] for t, r in zip(top, results)), 'limit changes the ranking'
+
+    restricted = {d: bin(mask).count('1') for d, mask in index.restricted.items()}
+    mean_eligible = sum(len(r['eligible']) for r in results) / len(results)
+    print(f"{args.schemes} schemes, {args.profiles} profiles; restricted per dimension: {restricted}")
+    print(f"  predicates parsed once in {t_parse * 1000:.0f} ms, index built in {t_build * 1000:.0f} ms, "
+          f"persisted as {len(persisted) / 1024:.0f} KB and loaded in {t_load * 1000:.0f} ms")
+    print(f"  mean eligible schemes per profile: {mean_eligible:.0f}")
+    for name, seconds in (('text scan', t_text), ('predicate scan', t_scan), ('index', t_index),
+                          ('index, top 20', t_top)):
+        print(f"  {name:<16}{seconds * 1000:>9.2f} ms/profile {1 / seconds:>10,.0f} profiles/s")
+    print('index results match the predicate scan for every profile')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Link-following crawl on a large local fixture site.
+
+A separate process serves a generated indian.handicrafts.gov.in look-alike:
+the /en listing links to paginated scheme indexes, each index links to 50
+scheme detail pages, and every detail page links to related schemes written
+the ways real sites write links (fragments, tracking parameters, ``../``
+segments), to an archive that robots.txt disallows, and to its guidelines PDF.
+
+Two measurements:
+
+- seen-set memory: bytes per URL for the Bloom filter used by the frontier
+  against a set of URL strings and a set of 64-bit URL hashes
+- end-to-end crawl: pages/s, peak RSS, requests saved by normalisation, and
+  that every scheme page was fetched exactly once
+
+    python benchmark_frontier.py --schemes 5000
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import httpx
+
+from crawler import IndianHandicraftsSource, crawl_sources
+from frontier import BloomFilter
+from scraper import GovernmentSchemeScraper
+
+PER_INDEX = 50
+ROBOTS = 'User-agent: *\nDisallow: /en/schemes/archive/\n'
+CRAFTS = ['pottery', 'handloom weaving', 'wood carving', 'metal craft', 'embroidery', 'bamboo craft']
+
+
+def detail_page(i, schemes):
+    rng = random.Random(i)
+    related = []
+    for j in rng.sample(range(schemes), 5):
+        related.append(rng.choice([f'/en/schemes/s{j}', f'/en/schemes/s{j}#eligibility',
+                                   f'/en/schemes/s{j}?utm_source=related', f'/en/schemes/../schemes/s{j}',
+                                   f'./s{j}?utm_medium=web&utm_source=x']))
+    links = ''.join(f'<li><a href="{href}">Related scheme</a></li>' for href in related)
+    craft = rng.choice(CRAFTS)
+    return f'''<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">
+<title>Scheme {i} | Office of the Development Commissioner (Handicrafts)</title></head>
+<body><header><nav><ul><li><a href="/en">Home</a></li><li><a href="/en/schemes?page=0">Schemes</a></li></ul></nav></header>
+<main><h1>Handicraft {craft.title()} Support Scheme {i}</h1>
+<p>Scheme {i} supports {craft} artisans with training, marketing and financial assistance through the
+Office of the Development Commissioner (Handicrafts).</p>
+<h2>Benefits</h2><ul><li>Toolkits for {craft} artisans</li><li>Stall space at crafts fairs</li>
+<li>Design workshops</li></ul>
+<h2>Eligibility</h2><ul><li>Artisans holding a Pehchan card</li><li>Age {18 + i % 10}-{50 + i % 15} years</li>
+<li>Minimum {i % 5} years of experience</li></ul>
+<h2>How to Apply</h2><ol><li>Register on the portal</li><li>Submit the application to the regional office</li></ol>
+<h2>Financial Assistance</h2><p>Up to Rs {(i % 9 + 1) * 5000} per artisan.</p>
+<p><a href="/sites/default/files/s{i}-guidelines.pdf">Guidelines (PDF)</a></p>
+<h3>Related schemes</h3><ul>{links}<li><a href="/en/schemes/archive/s{i}">Archived version</a></li></ul>
+</main><footer><a href="/en/website-policies">Website Policies</a></footer></body></html>'''
+
+
+def index_page(k, schemes):
+    pages = (schemes + PER_INDEX - 1) // PER_INDEX
+    items = ''.join(f'<li><a href="/en/schemes/s{i}">Scheme {i}</a></li>'
+                    for i in range(k * PER_INDEX, min((k + 1) * PER_INDEX, schemes)))
+    pager = ''.join(f'<a href="/en/schemes?page={p}">{p + 1}</a>' for p in (k - 1, k + 1) if 0 <= p < pages)
+    return f'<html><body><main><h1>Schemes</h1><ul>{items}</ul><div class="pager">{pager}</div></main></body></html>'
+
+
+def home_page(schemes):
+    pages = (schemes + PER_INDEX - 1) // PER_INDEX
+    links = ''.join(f'<li><a href="/en/schemes?page={k}&amp;utm_source=home">Schemes page {k + 1}</a></li>'
+                    for k in range(pages))
+    return f'<html><body><nav><ul>{links}</ul></nav><main><h2>Our Schemes</h2></main></body></html>'
+
+
+def serve(schemes, ready):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            path = parts.path
+            self.server.requests[path + ('?' + parts.query if parts.query else '')] += 1
+            if path == '/robots.txt':
+                body = ROBOTS
+            elif path == '/en':
+                body = home_page(schemes)
+            elif path == '/en/schemes' and parts.query.startswith('page='):
+                body = index_page(int(parts.query[5:]), schemes)
+            elif path.startswith('/en/schemes/s') and path[13:].isdigit():
+                body = detail_page(int(path[13:]), schemes)
+            elif path == '/__stats':
+                body = json.dumps(self.server.requests)
+            else:
+                body = None
+            data = (body or '').encode('utf-8')
+            self.send_response(200 if body is not None else 404)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = Counter()
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def seen_set_memory(n):
+    urls = [f'https://indian.handicrafts.gov.in/en/schemes/{hashlib.md5(str(i).encode()).hexdigest()[:12]}-{i}'
+            for i in range(n)]
+
+    def bloom():
+        seen = BloomFilter(n)
+        for u in urls:
+            seen.add(u)
+        return seen
+
+    rows = []
+    for name, build in (('set of URL strings', lambda: set(urls)),
+                        ('set of 64-bit hashes', lambda: {hash(u) for u in urls}),
+                        ('Bloom filter, p=1e-6', bloom)):
+        start = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        seen = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del seen
+        # The string set only references the URLs; count the strings it keeps alive
+        if name == 'set of URL strings':
+            size += sum(sys.getsizeof(u) for u in urls)
+        rows.append((name, size / n, n / elapsed))
+    return rows
+
+
+def main():
+    p = argparse.ArgumentParser(description='Link-following crawl benchmark')
+    p.add_argument('--schemes', type=int, default=5000)
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--seen', type=int, default=200000, help='URLs for the seen-set memory comparison')
+    args = p.parse_args()
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(args.schemes, ready), daemon=True)
+    server.start()
+    base = f"http://127.0.0.1:{ready.get()}"
+
+    pages = args.schemes + (args.schemes + PER_INDEX - 1) // PER_INDEX + 1
+    source = IndianHandicraftsSource(base, max_depth=3, max_pages=pages + 100)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    reports = crawl_sources([source], GovernmentSchemeScraper(), per_host_concurrency=args.concurrency,
+                            per_host_rate=None, deadline=3600)
+    wall = time.perf_counter() - start
+    report = reports[source.name]
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    requests = json.loads(httpx.get(base + '/__stats').text)
+    server.terminate()
+    repeats = sum(count - 1 for count in requests.values())
+    detail_schemes = sum(1 for s in report.schemes if s['pdfUrl'].endswith('-guidelines.pdf'))
+
+    print(f"\nCrawl of {pages:,} pages ({args.schemes:,} schemes), depth 3, concurrency {args.concurrency}")
+    print(f"  {report.pages:,} pages, {len(report.schemes):,} schemes, {report.bytes / 1e6:.1f} MB "
+          f"in {wall:.1f}s: {report.pages / wall:,.0f} pages/s")
+    print(f"  links dropped as duplicates after normalisation: {report.duplicates:,}; "
+          f"blocked by robots.txt: {report.blocked:,}")
+    print(f"  peak RSS {rss_after / 1024:.0f} MB ({rss_before / 1024:.0f} MB before the crawl)")
+    assert report.status == 'ok', report.errors[:3]
+    assert detail_schemes == args.schemes, 'every scheme page produces a scheme'
+    assert repeats == 0, f'{repeats} URLs requested more than once'
+    assert not any('/archive/' in path for path in requests), 'robots.txt disallowed pages were fetched'
+    print('every page fetched once, no disallowed page fetched')
+
+    print(f"\nSeen-set memory for {args.seen:,} URLs")
+    for name, per_url, rate in seen_set_memory(args.seen):
+        print(f"  {name:<24}{per_url:>8.1f} B/URL {rate:>12,.0f} adds/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Parse time and memory of scheme page extraction on saved pages.
+
+Compares the previous approach (BeautifulSoup with ``html.parser`` plus
+separate ``find_all`` regex scans for links, headings and scheme blocks),
+the same scans on BeautifulSoup's lxml backend, and ``page_parser`` (lxml
+with one compiled XPath pass). Every approach must extract the same links,
+headings and blocks; the benchmark fails if they differ.
+
+Memory is the RSS growth per document tree, measured in a fresh subprocess
+per approach and page by holding many parsed copies of the page (lxml trees live
+outside the Python heap, so tracemalloc would under-count them). The tree is
+what dominates peak memory while a page is being processed.
+
+    python benchmark_parser.py                         # fixtures/*.html
+    python benchmark_parser.py --pages saved/*.html --repeat 50
+    python benchmark_parser.py --inflate 40            # also a ~200 KB page built from the fixtures
+"""
+
+import argparse
+import gc
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from page_parser import SCHEME_BLOCK_CLASS, SCHEME_HEADING, parse_document, parse_scheme_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def extract_bs4(html, backend='html.parser'):
+    """The scans the scraper used to run, returning the same shape as ``parse_scheme_page``."""
+    soup = BeautifulSoup(html, backend)
+    links = [(a['href'], a.get_text(' ', strip=True)) for a in soup.find_all('a', href=True)]
+    headings = [h.get_text(' ', strip=True) for h in soup.find_all(['h2', 'h3', 'h4'])
+                if SCHEME_HEADING.search(h.get_text(' ', strip=True))]
+    blocks = [e.get_text(strip=True) for e in soup.find_all(['div', 'section'], class_=SCHEME_BLOCK_CLASS)]
+    return links, headings, blocks
+
+
+def extract_lxml(html):
+    page = parse_scheme_page(html)
+    return page.links, page.headings, page.blocks
+
+
+APPROACHES = {
+    'bs4 html.parser (previous)': lambda html: extract_bs4(html, 'html.parser'),
+    'bs4 lxml': lambda html: extract_bs4(html, 'lxml'),
+    'lxml xpath (page_parser)': extract_lxml,
+}
+
+
+def inflate(html, times):
+    """A larger page: the <main> content of ``html`` repeated ``times`` times."""
+    text = html.decode('utf-8')
+    match = re.search(r'(<main\b.*?</main>)', text, re.S)
+    if not match:
+        return html
+    return text.replace(match.group(1), match.group(1) * times).encode('utf-8')
+
+
+def load_pages(patterns, inflate_times):
+    pages = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, 'rb') as f:
+                pages[os.path.basename(path)] = f.read()
+    if not pages:
+        raise FileNotFoundError(f"No pages matched {patterns}")
+    if inflate_times > 1:
+        name = max(pages, key=lambda n: len(pages[n]))
+        pages[f"{name} x{inflate_times}"] = inflate(pages[name], inflate_times)
+    return pages
+
+
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+DOCUMENT_BUILDERS = {
+    'bs4 html.parser (previous)': lambda html: BeautifulSoup(html, 'html.parser'),
+    'bs4 lxml': lambda html: BeautifulSoup(html, 'lxml'),
+    'lxml xpath (page_parser)': parse_document,
+}
+
+
+def measure_memory(approach, html, copies=30):
+    """RSS growth (KB) per parsed document tree; run in a fresh process."""
+    build = DOCUMENT_BUILDERS[approach]
+    build(b'<html><body><a href="/">warm up</a></body></html>')
+    gc.collect()
+    before = rss_kb()
+    trees = [build(html) for _ in range(copies)]
+    growth = (rss_kb() - before) / copies
+    del trees
+    return round(growth, 1)
+
+
+def memory_in_subprocess(approach, page, patterns, inflate_times):
+    cmd = [sys.executable, os.path.abspath(__file__), '--memory-worker', approach, page,
+           '--inflate', str(inflate_times), '--pages', *patterns]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def bench(pages, repeat):
+    reference = None
+    results = {}
+    for approach, fn in APPROACHES.items():
+        outputs, timings = {}, {}
+        for name, html in pages.items():
+            outputs[name] = fn(html)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn(html)
+            timings[name] = (time.perf_counter() - start) / repeat * 1000
+        if reference is None:
+            reference = outputs
+        elif outputs != reference:
+            bad = [n for n in pages if outputs[n] != reference[n]]
+            raise AssertionError(f"{approach} extracted different content for {bad}")
+        results[approach] = timings
+    return results
+
+
+def main():
+    p = argparse.ArgumentParser(description='Scheme page parsing benchmark')
+    p.add_argument('--pages', nargs='+', default=[os.path.join(FIXTURES, '*.html')],
+                   help='Saved HTML pages (globs allowed)')
+    p.add_argument('--repeat', type=int, default=30)
+    p.add_argument('--inflate', type=int, default=40,
+                   help='Also benchmark the largest page with its main content repeated N times (1 = off)')
+    p.add_argument('--memory-worker', nargs=2, help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    pages = load_pages(args.pages, args.inflate)
+    if args.memory_worker:
+        approach, page = args.memory_worker
+        print(json.dumps(measure_memory(approach, pages[page])))
+        return
+
+    timings = bench(pages, args.repeat)
+    memory = {a: {n: memory_in_subprocess(a, n, args.pages, args.inflate) for n in pages} for a in APPROACHES}
+    baseline = next(iter(APPROACHES))
+
+    print(f"{'page':<34}{'KB':>7}  {'approach':<28}{'ms/page':>9}{'speedup':>9}{'KB/tree':>9}")
+    for name, html in pages.items():
+        for approach in APPROACHES:
+            ms = timings[approach][name]
+            speedup = timings[baseline][name] / ms if ms else float('inf')
+            print(f"{name:<34}{len(html) / 1024:>7.1f}  {approach:<28}{ms:>9.3f}{speedup:>8.1f}x"
+                  f"{memory[approach][name]:>9}")
+    print('all approaches extracted identical links, headings and blocks')
+
+
+if __name__ == '__main__':
+    main()
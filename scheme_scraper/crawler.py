@@ -0,0 +1,411 @@
+"""
+Concurrent crawler core for the scheme scraper.
+
+Each government site is a ``SchemeSource`` plug-in: a name, the URLs to fetch
+and a ``parse`` method that turns a fetched page into scheme dicts. All
+sources are crawled concurrently through one pooled ``httpx.AsyncClient``;
+requests to the same host share a concurrency cap and a rate limit, failed
+requests are retried with exponential backoff (honouring ``Retry-After``),
+and the whole crawl stops at a global deadline, keeping whatever the slower
+sources produced so far. Total crawl time therefore tracks the slowest
+source instead of the sum of all of them.
+
+Sources that set ``max_depth`` are crawled breadth-first: the links a page
+yields go through a ``CrawlFrontier`` (normalised, deduplicated, kept on the
+source's hosts) and are fetched in turn, up to ``max_pages`` per source.
+Every URL is checked against its host's robots.txt first, fetched once per
+host and crawl; a robots.txt Crawl-delay slows that host's rate limit.
+
+With a ``PageCache`` the crawl is incremental: requests are conditional, and
+pages that come back 304 or with an unchanged body reuse their cached
+schemes (and links) instead of being parsed again.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+from frontier import ROBOTS_AGENT, CrawlFrontier, RobotsRules
+from http_cache import PageCache
+from page_parser import SCHEME_LINK, parse_scheme_detail, parse_scheme_page
+
+logger = logging.getLogger(__name__)
+
+# The name robots.txt rules are checked against, so sites see who is crawling
+USER_AGENT = f'{ROBOTS_AGENT}/1.0'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class Page:
+    url: str
+    status: int
+    content: bytes
+    headers: Dict[str, str]
+    elapsed: float
+    attempts: int
+    depth: int = 0
+
+
+@dataclass
+class SourceReport:
+    name: str
+    status: str = 'pending'   # ok | partial | error | deadline
+    pages: int = 0
+    bytes: int = 0
+    retries: int = 0
+    not_modified: int = 0   # 304 responses
+    skipped: int = 0        # pages whose parse was skipped (304 or same content hash)
+    blocked: int = 0        # URLs disallowed by robots.txt
+    duplicates: int = 0     # discovered links already seen
+    elapsed: float = 0.0
+    schemes: List[Dict] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> Dict:
+        return {
+            'status': self.status,
+            'pages': self.pages,
+            'schemes': len(self.schemes),
+            'bytes': self.bytes,
+            'retries': self.retries,
+            'not_modified': self.not_modified,
+            'skipped': self.skipped,
+            'blocked': self.blocked,
+            'duplicates': self.duplicates,
+            'elapsed': round(self.elapsed, 3),
+            'errors': self.errors,
+        }
+
+
+class SchemeSource:
+    """Base class for a scheme source plug-in."""
+
+    name = 'source'
+    # Per-host overrides of the crawler defaults
+    max_concurrency: Optional[int] = None
+    requests_per_second: Optional[float] = None
+    # Link following: 0 fetches only the start URLs
+    max_depth: int = 0
+    max_pages: int = 200
+
+    def start_urls(self) -> List[str]:
+        raise NotImplementedError
+
+    def parse(self, page: Page, builder) -> List[Dict]:
+        """Turn a fetched page into scheme dicts; ``builder`` is the GovernmentSchemeScraper."""
+        raise NotImplementedError
+
+    def parse_page(self, page: Page, builder) -> Tuple[List[Dict], List[str]]:
+        """Schemes on the page plus the links to follow from it (relative to ``page.url``)."""
+        return self.parse(page, builder), []
+
+
+class IndianHandicraftsSource(SchemeSource):
+    """The /en listing page, then (with ``max_depth`` >= 1) the scheme pages it links to."""
+
+    name = 'indian.handicrafts.gov.in'
+
+    def __init__(self, base_url: str = 'https://indian.handicrafts.gov.in',
+                 max_depth: int = 1, max_pages: int = 200):
+        self.base_url = base_url.rstrip('/')
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+
+    def start_urls(self) -> List[str]:
+        return [f"{self.base_url}/en"]
+
+    def parse(self, page: Page, builder) -> List[Dict]:
+        return self.parse_page(page, builder)[0]
+
+    def parse_page(self, page: Page, builder) -> Tuple[List[Dict], List[str]]:
+        follow = page.depth < self.max_depth
+        if page.depth == 0:
+            listing = parse_scheme_page(page.content)
+            schemes = builder.schemes_from_handicrafts_listing(listing, self.base_url,
+                                                               following_links=bool(self.max_depth))
+            links = listing.links
+        else:
+            detail = parse_scheme_detail(page.content)
+            scheme = builder.create_scheme_from_detail(detail, page.url, self.base_url, source=self.name)
+            schemes = [scheme] if scheme else []
+            links = detail.links
+        return schemes, [href for href, _ in links if follow and SCHEME_LINK.search(href)]
+
+
+class SchemeListSource(SchemeSource):
+    """A portal page that lists schemes as links; each matching link becomes a scheme."""
+
+    link_pattern = re.compile(r'scheme|yojana|programme|mission|fund', re.I)
+
+    def __init__(self, name: str, base_url: str, paths: List[str], limit: int = 25):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.paths = paths
+        self.limit = limit
+
+    def start_urls(self) -> List[str]:
+        return [urljoin(self.base_url + '/', p.lstrip('/')) for p in self.paths]
+
+    def parse(self, page: Page, builder) -> List[Dict]:
+        schemes, seen = [], set()
+        for href, title in parse_scheme_page(page.content).links:
+            if len(title) < 12 or title.lower() in seen:
+                continue
+            if not (self.link_pattern.search(title) or self.link_pattern.search(href)):
+                continue
+            seen.add(title.lower())
+            scheme = builder.create_scheme_from_name(title, self.base_url, source=self.name)
+            if scheme:
+                scheme['pdfUrl'] = urljoin(page.url, href)
+                schemes.append(scheme)
+            if len(schemes) >= self.limit:
+                break
+        return schemes
+
+
+def default_sources() -> List[SchemeSource]:
+    return [
+        IndianHandicraftsSource(),
+        SchemeListSource('msme.gov.in', 'https://msme.gov.in', ['/all-schemes']),
+        SchemeListSource('startupindia.gov.in', 'https://www.startupindia.gov.in',
+                         ['/content/sih/en/government-schemes.html']),
+        SchemeListSource('pmkisan.gov.in', 'https://pmkisan.gov.in', ['/']),
+    ]
+
+
+class HostLimiter:
+    """Concurrency cap plus a minimum spacing between request starts, for one host."""
+
+    def __init__(self, concurrency: int, rate: Optional[float]):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        if self.interval:
+            async with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class SchemeCrawler:
+    def __init__(
+        self,
+        sources: List[SchemeSource],
+        builder,
+        max_connections: int = 20,
+        per_host_concurrency: int = 2,
+        per_host_rate: Optional[float] = 2.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+        deadline: float = 120.0,
+        cache: Optional[PageCache] = None,
+        respect_robots: bool = True,
+    ):
+        self.sources = sources
+        self.builder = builder
+        self.max_connections = max_connections
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.deadline = deadline
+        self.cache = cache
+        self.respect_robots = respect_robots
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._robots: Dict[str, asyncio.Task] = {}
+
+    def _limiter(self, url: str, source: SchemeSource) -> HostLimiter:
+        host = urlparse(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = HostLimiter(
+                source.max_concurrency or self.per_host_concurrency,
+                source.requests_per_second or self.per_host_rate,
+            )
+        return limiter
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def fetch(self, client: httpx.AsyncClient, url: str, source: SchemeSource,
+                    report: SourceReport, headers: Optional[Dict[str, str]] = None) -> Page:
+        last_error = None
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                async with self._limiter(url, source):
+                    start = time.monotonic()
+                    response = await client.get(url, headers=headers)
+                    elapsed = time.monotonic() - start
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code == 304:
+                        report.not_modified += 1
+                    else:
+                        response.raise_for_status()
+                    report.pages += 1
+                    report.bytes += len(response.content)
+                    return Page(str(response.url), response.status_code, response.content,
+                                dict(response.headers), elapsed, attempt + 1)
+                last_error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {e}"
+            if attempt < self.retries:
+                report.retries += 1
+                await asyncio.sleep(self._retry_delay(attempt, response))
+        raise RuntimeError(f"{url}: giving up after {self.retries + 1} attempts ({last_error})")
+
+    async def _fetch_robots(self, client: httpx.AsyncClient, url: str, source: SchemeSource) -> RobotsRules:
+        parts = urlparse(url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        scratch = SourceReport(parts.netloc)
+        try:
+            page = await self.fetch(client, robots_url, source, scratch)
+            rules = RobotsRules(page.status, page.content.decode('utf-8', 'replace'))
+        except httpx.HTTPStatusError as e:
+            rules = RobotsRules(e.response.status_code)
+        except RuntimeError as e:
+            logger.warning(f"robots.txt unavailable, not crawling {parts.netloc}: {e}")
+            rules = RobotsRules(503)
+        delay = rules.crawl_delay()
+        if delay:
+            limiter = self._limiter(url, source)
+            limiter.interval = max(limiter.interval, delay)
+        return rules
+
+    async def _rules(self, client: httpx.AsyncClient, url: str, source: SchemeSource) -> Optional[RobotsRules]:
+        """robots.txt rules for the URL's host (fetched once per crawl), or None when not respected."""
+        if not self.respect_robots:
+            return None
+        host = urlparse(url).netloc
+        task = self._robots.get(host)
+        if task is None:
+            task = self._robots[host] = asyncio.ensure_future(self._fetch_robots(client, url, source))
+        # Shielded: a source cut off at the deadline must not cancel a fetch other sources wait on
+        return await asyncio.shield(task)
+
+    async def _crawl_source(self, client: httpx.AsyncClient, source: SchemeSource, report: SourceReport):
+        start = time.monotonic()
+        frontier = CrawlFrontier(source.start_urls(), source.max_depth, source.max_pages)
+
+        async def one(url, depth):
+            rules = await self._rules(client, url, source)
+            if rules is not None and not rules.allowed(url, ROBOTS_AGENT):
+                report.blocked += 1
+                return
+            headers = self.cache.conditional_headers(source.name, url) if self.cache is not None else None
+            page = await self.fetch(client, url, source, report, headers=headers)
+            page.depth = depth
+            if page.url != url:
+                frontier.mark_seen(page.url)
+            cached = self.cache.unchanged(source.name, url, page.status, page.content) if self.cache is not None else None
+            if cached is not None:
+                report.skipped += 1
+                report.schemes.extend(cached)
+                links = self.cache.links(source.name, url)
+            else:
+                # Parsing is CPU work; keep it off the event loop so other fetches proceed
+                schemes, links = await asyncio.to_thread(source.parse_page, page, self.builder)
+                if self.cache is not None:
+                    self.cache.store(source.name, url, page.headers, page.content, schemes, links)
+                report.schemes.extend(schemes)
+            # Disallowed links on this host are dropped here, before they take a slot
+            # in the page budget; links to other hosts are checked when fetched
+            allowed = None
+            if rules is not None:
+                host = urlparse(url).netloc
+                allowed = lambda link: urlparse(link).netloc != host or rules.allowed(link, ROBOTS_AGENT)
+            for link in links:
+                frontier.add(link, depth + 1, base=page.url, allowed=allowed)
+
+        in_flight = 0
+        wake = asyncio.Event()
+
+        async def worker():
+            nonlocal in_flight
+            while True:
+                item = frontier.pop()
+                if item is None:
+                    if not in_flight:
+                        return
+                    # Pages still being fetched may add more links
+                    wake.clear()
+                    await wake.wait()
+                    continue
+                in_flight += 1
+                try:
+                    await one(*item)
+                except Exception as e:
+                    report.errors.append(str(e))
+                finally:
+                    in_flight -= 1
+                    wake.set()
+
+        # Twice the host's concurrency, so fetches continue while pages are parsed
+        workers = 2 * (source.max_concurrency or self.per_host_concurrency)
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            report.duplicates = frontier.duplicates
+            report.blocked += frontier.blocked
+        if not report.errors:
+            report.status = 'ok'
+        else:
+            report.status = 'partial' if report.pages else 'error'
+        report.elapsed = time.monotonic() - start
+
+    async def crawl(self) -> Dict[str, SourceReport]:
+        reports = {s.name: SourceReport(s.name) for s in self.sources}
+        self._robots = {}
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        start = time.monotonic()
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True,
+                                     headers={'User-Agent': USER_AGENT}) as client:
+            tasks = {asyncio.create_task(self._crawl_source(client, s, reports[s.name])): s
+                     for s in self.sources}
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+            for task in pending:
+                task.cancel()
+                report = reports[tasks[task].name]
+                report.status = 'deadline'
+                report.elapsed = time.monotonic() - start
+                report.errors.append(f"stopped at the {self.deadline}s crawl deadline")
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            # robots.txt fetches only sources cut off at the deadline were waiting on
+            for task in self._robots.values():
+                task.cancel()
+            await asyncio.gather(*self._robots.values(), return_exceptions=True)
+        if self.cache is not None:
+            self.cache.save()
+        for report in reports.values():
+            logger.info(f"{report.name}: {report.summary()}")
+        return reports
+
+
+def crawl_sources(sources: List[SchemeSource], builder, **options) -> Dict[str, SourceReport]:
+    return asyncio.run(SchemeCrawler(sources, builder, **options).crawl())
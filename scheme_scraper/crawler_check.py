@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Local check for the concurrent scheme crawler.
+
+Serves the saved pages in fixtures/ from several local HTTP servers (one per
+"host", each with its own response delay), then crawls them and checks that:
+
+- sources run concurrently: wall time tracks the slowest source, not the sum
+- a transient 503 is retried and the source still succeeds
+- the per-host rate limit spaces out requests to the same host
+- a source slower than the crawl deadline is reported as 'deadline' while
+  the others keep their results
+- with a PageCache, a second crawl sends conditional requests: 304s and
+  unchanged bodies skip parsing, and only a changed page is parsed again
+- link following: scheme detail pages linked from the listing are fetched
+  once each despite differently written links, robots.txt disallowed pages
+  are never requested, schemes carry the detail pages' real sections, and
+  requests identify the crawler by the agent name robots.txt is checked for
+
+Usage: python crawler_check.py
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawler import USER_AGENT, IndianHandicraftsSource, SchemeListSource, crawl_sources
+from frontier import ROBOTS_AGENT, BloomFilter, CrawlFrontier, normalize_url
+from http_cache import PageCache
+from scraper import GovernmentSchemeScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def make_server(pages, delay=0.0, fail_first=0, etag=False, robots=None):
+    """Serve ``pages`` ({path: fixture file}) after ``delay`` seconds; the first
+    ``fail_first`` requests get a 503. With ``etag`` the server sends ETags and
+    answers a matching If-None-Match with 304. ``robots`` is the robots.txt
+    body (404 without it), served at once. Requested paths go to state['paths'],
+    User-Agent headers to state['agents']."""
+    state = {'failures': fail_first, 'paths': [], 'agents': set()}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            with lock:
+                state['paths'].append(path)
+                state['agents'].add(self.headers.get('User-Agent'))
+            if path == '/robots.txt':
+                body = (robots or '').encode('utf-8')
+                self.send_response(200 if robots is not None else 404)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            with lock:
+                fail = state['failures'] > 0
+                if fail:
+                    state['failures'] -= 1
+            time.sleep(delay)
+            if fail or path not in pages:
+                self.send_response(503 if fail else 404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            with open(os.path.join(FIXTURES, pages[path]), 'rb') as f:
+                body = f.read()
+            tag = '"%s"' % hashlib.md5(body).hexdigest()
+            if etag and self.headers.get('If-None-Match') == tag:
+                self.send_response(304)
+                self.send_header('ETag', tag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if etag:
+                self.send_header('ETag', tag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def base(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    failures = []
+
+    def check(ok, message):
+        print(f"{'ok  ' if ok else 'FAIL'} {message}")
+        if not ok:
+            failures.append(message)
+
+    handicrafts, _ = make_server({'/en': 'handicrafts_en.html'}, delay=0.3)
+    msme, _ = make_server({'/all-schemes': 'msme_all_schemes.html'}, delay=0.5, fail_first=1)
+    startup, _ = make_server({f'/page{i}': 'startupindia_schemes.html' for i in range(4)}, delay=1.0)
+    slow, _ = make_server({'/': 'msme_all_schemes.html'}, delay=5.0)
+
+    sources = [
+        IndianHandicraftsSource(base(handicrafts), max_depth=0),
+        SchemeListSource('msme.gov.in', base(msme), ['/all-schemes']),
+        SchemeListSource('startupindia.gov.in', base(startup), [f'/page{i}' for i in range(4)]),
+    ]
+    scraper = GovernmentSchemeScraper()
+
+    # 1. Concurrency across hosts, with one retried 503 on msme
+    start = time.monotonic()
+    reports = crawl_sources(sources, scraper, per_host_concurrency=4, per_host_rate=None,
+                            backoff=0.1, deadline=10)
+    wall = time.monotonic() - start
+    for name, report in reports.items():
+        print(f"     {name}: {report.summary()}")
+    check(all(r.status == 'ok' for r in reports.values()), "all sources ok")
+    check(reports['msme.gov.in'].retries == 1, "msme 503 retried once")
+    check(wall < 1.0 + 0.5 + 0.3, f"wall time {wall:.2f}s below the serial sum of 1.8s")
+    check(len(reports['indian.handicrafts.gov.in'].schemes) > 0, "handicrafts schemes parsed")
+    check(len(reports['msme.gov.in'].schemes) > 0, "msme schemes parsed")
+
+    # 2. Per-host rate limit: 4 pages at 2 req/s start >= 1.5s apart end to end
+    rate_sources = [SchemeListSource('startupindia.gov.in', base(startup), [f'/page{i}' for i in range(4)])]
+    start = time.monotonic()
+    reports = crawl_sources(rate_sources, scraper, per_host_concurrency=4, per_host_rate=2.0,
+                            deadline=10)
+    wall = time.monotonic() - start
+    check(reports['startupindia.gov.in'].pages == 4, "rate-limited source fetched all pages")
+    check(wall >= 1.5, f"4 requests at 2 req/s took {wall:.2f}s (>= 1.5s)")
+
+    # 3. Deadline: the slow source is cut off, the fast one keeps its schemes
+    deadline_sources = [
+        IndianHandicraftsSource(base(handicrafts), max_depth=0),
+        SchemeListSource('slow.example', base(slow), ['/']),
+    ]
+    start = time.monotonic()
+    reports = crawl_sources(deadline_sources, scraper, deadline=1.5)
+    wall = time.monotonic() - start
+    check(reports['slow.example'].status == 'deadline', "slow source marked 'deadline'")
+    check(reports['indian.handicrafts.gov.in'].status == 'ok', "fast source unaffected by the deadline")
+    check(wall < 2.5, f"crawl returned at the deadline ({wall:.2f}s)")
+
+    # 4. The scraper entry point dedupes across sources
+    schemes = scraper.scrape_all_sources(sources=sources[:2], per_host_rate=None, deadline=10)
+    names = [s['name'].lower() for s in schemes]
+    check(len(names) == len(set(names)), f"scrape_all_sources returned {len(schemes)} unique schemes")
+
+    # 5. Incremental re-crawl through the on-disk cache
+    pages = {'/en': 'handicrafts_en.html'}
+    tagged, _ = make_server(pages, etag=True)
+    untagged, _ = make_server({'/all-schemes': 'msme_all_schemes.html'})
+    cached_sources = [
+        IndianHandicraftsSource(base(tagged), max_depth=0),
+        SchemeListSource('msme.gov.in', base(untagged), ['/all-schemes']),
+    ]
+    cache_dir = tempfile.mkdtemp(prefix='scheme_http_cache_')
+    try:
+        first = crawl_sources(cached_sources, scraper, per_host_rate=None, cache=PageCache(cache_dir))
+        second = crawl_sources(cached_sources, scraper, per_host_rate=None, cache=PageCache(cache_dir))
+        for name in first:
+            print(f"     {name}: first {first[name].bytes} B, {first[name].skipped} skipped; "
+                  f"second {second[name].bytes} B, {second[name].skipped} skipped")
+        check(all(r.skipped == 0 for r in first.values()), "cold crawl parses every page")
+        check(second['indian.handicrafts.gov.in'].not_modified == 1 and
+              second['indian.handicrafts.gov.in'].bytes == 0, "ETag source answered 304 with no body")
+        check(second['msme.gov.in'].skipped == 1, "validator-less source skipped on unchanged hash")
+        check(all(len(second[n].schemes) == len(first[n].schemes) for n in first),
+              "skipped pages return their cached schemes")
+
+        pages['/en'] = 'startupindia_schemes.html'  # the page changes upstream
+        third = crawl_sources(cached_sources[:1], scraper, per_host_rate=None, cache=PageCache(cache_dir))
+        check(third['indian.handicrafts.gov.in'].skipped == 0 and third['indian.handicrafts.gov.in'].bytes > 0,
+              "changed page is fetched and parsed again")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    # 6. URL normalisation and the seen-set
+    variants = ['http://Example.GOV.in:80/en/schemes/./nhdp#top', 'http://example.gov.in/en/x/../schemes/nhdp',
+                'http://example.gov.in//en/schemes/nhdp?utm_source=a', 'http://example.gov.in/en/schemes/%6Ehdp']
+    check(len({normalize_url(v) for v in variants}) == 1, "link variants normalise to one URL")
+    check(normalize_url('b=2&a=1', 'https://x.in/p?') == 'https://x.in/b=2&a=1' and
+          normalize_url('?b=2&a=1', 'https://x.in/p') == 'https://x.in/p?a=1&b=2', "query parameters sorted")
+    check(normalize_url('mailto:dc@nic.in') is None and normalize_url('javascript:void(0)') is None,
+          "non-http links rejected")
+    bloom = BloomFilter(10000)
+    check(all(bloom.add(f'https://x.in/{i}') for i in range(10000)) and
+          not any(bloom.add(f'https://x.in/{i}') for i in range(10000)), "Bloom filter adds once, no false negatives")
+    frontier = CrawlFrontier(['https://x.in/en'], max_depth=1, max_pages=3)
+    frontier.add('https://other.in/a', 1)
+    frontier.add('/doc.pdf', 1, base='https://x.in/en')
+    frontier.add('/en/a', 2, base='https://x.in/en')
+    frontier.add('/en/b', 1, base='https://x.in/en')
+    frontier.add('/en/b#x', 1, base='https://x.in/en')
+    check((frontier.queued, frontier.rejected, frontier.duplicates) == (2, 2, 1),
+          "frontier keeps to its hosts, depth and page budget")
+
+    # 7. Following scheme links from the listing page
+    robots = ('User-agent: *\nAllow: /en/schemes/nhdp\nAllow: /en/schemes/marketing-support\n'
+              'Disallow: /en/schemes\n')
+    site, site_state = make_server({'/en': 'handicrafts_en.html',
+                                    '/en/schemes/nhdp': 'handicrafts_scheme_nhdp.html',
+                                    '/en/schemes/marketing-support': 'handicrafts_scheme_marketing.html'},
+                                   robots=robots)
+    reports = crawl_sources([IndianHandicraftsSource(base(site), max_depth=2)], scraper, per_host_rate=None)
+    report = reports['indian.handicrafts.gov.in']
+    print(f"     {report.summary()}")
+    paths = site_state['paths']
+    by_name = {s['name']: s for s in report.schemes}
+    nhdp = by_name.get('National Handicrafts Development Programme (NHDP)', {})
+    check(report.status == 'ok', "link-following crawl ok")
+    check(sorted(paths) == ['/en', '/en/schemes/marketing-support', '/en/schemes/nhdp', '/robots.txt'],
+          f"each allowed page requested once, disallowed ones never ({len(paths)} requests)")
+    check(report.blocked == 5 and report.duplicates > 0, "robots.txt blocks counted, duplicate links dropped")
+    check(site_state['agents'] == {USER_AGENT} and USER_AGENT.startswith(ROBOTS_AGENT + '/'),
+          f"requests sent as {USER_AGENT!r}, the agent robots.txt is checked for")
+    check('Women artisans (priority)' in nhdp.get('eligibility', []) and
+          nhdp.get('pdfUrl', '').endswith('NHDP-guidelines-2021-26.pdf'), "scheme built from its detail page")
+    check(nhdp.get('eligibilityCriteria', {}).get('ageMax') == 60, "detail eligibility parsed into criteria")
+    check('Marketing Support and Services Scheme' in by_name and
+          'Comprehensive Handicrafts Cluster Development Scheme (CHCDS)' not in by_name,
+          "linked schemes come from detail pages only")
+
+    site_state['paths'].clear()
+    cache_dir = tempfile.mkdtemp(prefix='scheme_http_cache_')
+    try:
+        source = IndianHandicraftsSource(base(site), max_depth=2)
+        crawl_sources([source], scraper, per_host_rate=None, cache=PageCache(cache_dir))
+        again = crawl_sources([source], scraper, per_host_rate=None, cache=PageCache(cache_dir))
+        report = again['indian.handicrafts.gov.in']
+        check(report.skipped == 3 and len(report.schemes) == 2,
+              "unchanged pages replay their cached links and schemes")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    site_state['paths'].clear()
+    crawl_sources([IndianHandicraftsSource(base(site), max_depth=0)], scraper, per_host_rate=None)
+    check(sorted(site_state['paths']) == ['/en', '/robots.txt'], "max_depth=0 fetches only the listing")
+
+    for server in (handicrafts, msme, startup, slow, tagged, untagged, site):
+        server.shutdown()
+    print(f"\n{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+Structured eligibility predicates and a profile-to-scheme matching index.
+
+At scrape time each scheme's free-text ``eligibility`` lines are turned into
+a predicate over the artisan profile fields stored in the marketplace
+(``gender``, ``age``, ``state``, ``craftType``, ``experience``):
+
+    {"gender": "female", "preferGender": null, "ageMin": 18, "ageMax": 55,
+     "minExperience": null, "states": [], "crafts": ["weaving"]}
+
+``EligibilityIndex`` inverts the predicates of all schemes into postings,
+stored as integer bitsets: for each dimension, the schemes that restrict it
+and, per value (gender, state, craft, each age, each year of experience), the
+schemes that allow it. A match is a handful of bitset operations,
+excluded |= restricted & ~allowed[value] per dimension, and everything else
+is eligible. A dimension the profile leaves empty moves the schemes
+restricting it to ``maybe`` instead of excluding them.
+
+The index is written as JSON with the postings as hex bitsets, the range
+postings as step functions and the profile normalisation tables (state and
+gender aliases, the craft pattern). The ``/api/schemes/eligible`` route
+loads those postings and runs the same bitset operations as
+``EligibilityIndex.match``; ``EligibilityIndex.load`` reads the file back, so
+the Python side can be checked against exactly what the route serves.
+"""
+
+import json
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+ELIGIBILITY_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eligibility_index.json')
+INDEX_VERSION = 2
+MAX_AGE = 120
+DIMENSIONS = ('gender', 'age', 'experience', 'state', 'craft')
+
+STATES = [
+    'andhra pradesh', 'arunachal pradesh', 'assam', 'bihar', 'chhattisgarh', 'goa', 'gujarat', 'haryana',
+    'himachal pradesh', 'jharkhand', 'karnataka', 'kerala', 'madhya pradesh', 'maharashtra', 'manipur',
+    'meghalaya', 'mizoram', 'nagaland', 'odisha', 'punjab', 'rajasthan', 'sikkim', 'tamil nadu',
+    'telangana', 'tripura', 'uttar pradesh', 'uttarakhand', 'west bengal', 'andaman and nicobar islands',
+    'chandigarh', 'dadra and nagar haveli and daman and diu', 'delhi', 'jammu and kashmir', 'ladakh',
+    'lakshadweep', 'puducherry',
+]
+NORTH_EASTERN_STATES = ['arunachal pradesh', 'assam', 'manipur', 'meghalaya', 'mizoram', 'nagaland',
+                        'sikkim', 'tripura']
+# alias -> canonical state
+STATE_ALIASES = {
+    **{s: s for s in STATES},
+    'orissa': 'odisha', 'pondicherry': 'puducherry', 'uttaranchal': 'uttarakhand',
+    'j&k': 'jammu and kashmir', 'jammu & kashmir': 'jammu and kashmir', 'nct of delhi': 'delhi',
+    'new delhi': 'delhi', 'andaman & nicobar': 'andaman and nicobar islands',
+}
+# canonical craft -> words that name it in scheme text or in a profile's craftType
+CRAFTS = {
+    'pottery': ['pottery', 'potter', 'terracotta', 'ceramic'],
+    'weaving': ['weaving', 'weaver', 'handloom', 'loom'],
+    'jewelry': ['jewelry', 'jewellery', 'jeweller'],
+    'embroidery': ['embroidery', 'zari', 'chikankari', 'phulkari'],
+    'woodwork': ['woodwork', 'wood carving', 'woodcraft', 'carpentry'],
+    'metalwork': ['metalwork', 'metal craft', 'brass', 'bell metal', 'dhokra'],
+    'carpet': ['carpet', 'durrie', 'rug'],
+    'bamboo': ['bamboo', 'cane'],
+    'painting': ['painting', 'madhubani', 'warli', 'pattachitra'],
+    'leather': ['leather'],
+    'stone carving': ['stone carving', 'stone craft'],
+    'block printing': ['block print', 'bandhani', 'tie and dye'],
+}
+CRAFT_ALIASES = {alias: craft for craft, aliases in CRAFTS.items() for alias in aliases}
+GENDER_ALIASES = {'f': 'female', 'woman': 'female', 'm': 'male', 'man': 'male'}
+
+
+def _alternation(words: Iterable[str]) -> str:
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_STATE_RE = re.compile(rf'\b({_alternation(STATE_ALIASES)})\b')
+_NORTH_EAST_RE = re.compile(r'\bnorth[- ]?east(?:ern)?\b')
+_CRAFT_RE = re.compile(rf'\b({_alternation(CRAFT_ALIASES)})\w*')
+_WOMEN_RE = re.compile(r'\b(?:women|woman|female|mahila|girls?)\b')
+_ONLY_RE = re.compile(r'\b(?:only|exclusively|solely)\b')
+_AGE_WORD_RE = re.compile(r'\bage[ds]?\b')
+_AGE_RANGE_RE = re.compile(r'\bage[ds]?\b\D{0,20}?(\d{1,2})\s*(?:-|–|to|and)\s*(\d{1,2})')
+_AGE_MIN_RE = re.compile(r'\b(?:above|over|at least|minimum(?: age)?(?: of)?)\s*(\d{1,2})\s*(?:years?)?')
+_AGE_MAX_RE = re.compile(r'\b(?:below|under|up to|upto|maximum(?: age)?(?: of)?|not exceeding)\s*(\d{1,2})\s*(?:years?)?')
+_EXPERIENCE_RE = re.compile(
+    r'\b(?:minimum|at least|min\.?)\s*(\d{1,2})\+?\s*years?\s*(?:of\s*)?(?:experience|operation|standing|work)'
+    r'|\b(\d{1,2})\+?\s*years?\s*(?:of\s*)?experience')
+_ONE = re.compile('1')
+
+
+def empty_predicate() -> Dict:
+    return {'gender': None, 'preferGender': None, 'ageMin': None, 'ageMax': None,
+            'minExperience': None, 'states': [], 'crafts': []}
+
+
+def parse_eligibility(lines: Iterable[str]) -> Dict:
+    """Structured predicate from free-text eligibility lines; unrecognised lines add nothing."""
+    predicate = empty_predicate()
+    states, crafts = set(), set()
+    for line in lines:
+        text = line.lower()
+        if _WOMEN_RE.search(text):
+            if _ONLY_RE.search(text):
+                predicate['gender'] = 'female'
+            else:
+                predicate['preferGender'] = 'female'
+
+        if _AGE_WORD_RE.search(text):
+            age_range = _AGE_RANGE_RE.search(text)
+            if age_range:
+                low, high = sorted(int(v) for v in age_range.groups())
+                predicate['ageMin'], predicate['ageMax'] = low, high
+            else:
+                low, high = _AGE_MIN_RE.search(text), _AGE_MAX_RE.search(text)
+                if low:
+                    predicate['ageMin'] = int(low.group(1))
+                if high:
+                    predicate['ageMax'] = int(high.group(1))
+        else:
+            experience = _EXPERIENCE_RE.search(text)
+            if experience:
+                years = int(experience.group(1) or experience.group(2))
+                predicate['minExperience'] = max(predicate['minExperience'] or 0, years)
+
+        if 'all states' not in text:
+            states.update(STATE_ALIASES[m] for m in _STATE_RE.findall(text))
+            if _NORTH_EAST_RE.search(text):
+                states.update(NORTH_EASTERN_STATES)
+        crafts.update(CRAFT_ALIASES[m] for m in _CRAFT_RE.findall(text))
+
+    if predicate['gender']:
+        predicate['preferGender'] = None
+    predicate['states'] = sorted(states)
+    predicate['crafts'] = sorted(crafts)
+    return predicate
+
+
+def normalise_state(state: Optional[str]) -> Optional[str]:
+    if not state:
+        return None
+    text = re.sub(r'\s+', ' ', state).strip().lower()
+    return STATE_ALIASES.get(text, text)
+
+
+def normalise_craft(craft: Optional[str]) -> Optional[str]:
+    if not craft:
+        return None
+    match = _CRAFT_RE.search(craft.lower())
+    return CRAFT_ALIASES[match.group(1)] if match else craft.strip().lower()
+
+
+def normalise_gender(gender: Optional[str]) -> Optional[str]:
+    if not gender:
+        return None
+    gender = gender.strip().lower()
+    return GENDER_ALIASES.get(gender, gender)
+
+
+def predicate_matches(predicate: Dict, profile: Dict) -> Optional[str]:
+    """'eligible', 'maybe' (profile lacks a field the scheme restricts) or None, checked directly."""
+    unknown = False
+    gender = normalise_gender(profile.get('gender'))
+    if predicate['gender']:
+        if gender is None:
+            unknown = True
+        elif gender != predicate['gender']:
+            return None
+    age = profile.get('age')
+    if predicate['ageMin'] is not None or predicate['ageMax'] is not None:
+        if age is None:
+            unknown = True
+        elif not ((predicate['ageMin'] or 0) <= age <= (predicate['ageMax'] or MAX_AGE)):
+            return None
+    experience = profile.get('experience')
+    if predicate['minExperience'] is not None:
+        if experience is None:
+            unknown = True
+        elif experience < predicate['minExperience']:
+            return None
+    for field, values, normalise in (('state', predicate['states'], normalise_state),
+                                     ('craftType', predicate['crafts'], normalise_craft)):
+        if values:
+            value = normalise(profile.get(field))
+            if value is None:
+                unknown = True
+            elif value not in values:
+                return None
+    return 'maybe' if unknown else 'eligible'
+
+
+def _restrictions(predicate: Dict) -> int:
+    return sum((bool(predicate['gender']),
+                predicate['ageMin'] is not None or predicate['ageMax'] is not None,
+                predicate['minExperience'] is not None,
+                bool(predicate['states']),
+                bool(predicate['crafts'])))
+
+
+class EligibilityIndex:
+    """Postings as integer bitsets; bit i is the i-th scheme in ranking order.
+
+    Schemes are ranked once at build time (most restrictions first, i.e. most
+    targeted, then by name), so decoding a result bitset in bit order yields
+    ranked ids without a per-request sort.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []                  # bit position -> scheme id
+        self.schemes: Dict[str, Dict] = {}
+        self.all_mask = 0
+        self.restricted = {d: 0 for d in DIMENSIONS}
+        self.gender: Dict[str, int] = {}
+        self.prefer_gender: Dict[str, int] = {}
+        self.states: Dict[str, int] = {}
+        self.crafts: Dict[str, int] = {}
+        self.age_groups: Dict[tuple, int] = {}       # (min, max) -> mask
+        self.experience_groups: Dict[int, int] = {}  # minimum years -> mask
+        self.allowed_by_age: List[int] = []          # age -> mask of age-restricted schemes allowing it
+        self.allowed_by_experience: List[int] = []   # years -> mask, up to the highest threshold
+        self.levels: List[int] = []                  # masks per restriction count, most restricted first
+
+    @classmethod
+    def build(cls, schemes: Iterable[Dict]) -> 'EligibilityIndex':
+        index = cls()
+        entries = []
+        for scheme in schemes:
+            predicate = scheme.get('eligibilityCriteria') or parse_eligibility(scheme.get('eligibility', []))
+            entries.append((scheme, predicate, _restrictions(predicate)))
+        entries.sort(key=lambda e: (-e[2], e[0]['name']))
+
+        levels: Dict[int, int] = {}
+        for position, (scheme, predicate, restrictions) in enumerate(entries):
+            bit = 1 << position
+            index.ids.append(scheme['id'])
+            index.all_mask |= bit
+            levels[restrictions] = levels.get(restrictions, 0) | bit
+            if predicate['gender']:
+                index.restricted['gender'] |= bit
+                index.gender[predicate['gender']] = index.gender.get(predicate['gender'], 0) | bit
+            if predicate['preferGender']:
+                g = predicate['preferGender']
+                index.prefer_gender[g] = index.prefer_gender.get(g, 0) | bit
+            if predicate['ageMin'] is not None or predicate['ageMax'] is not None:
+                index.restricted['age'] |= bit
+                key = (predicate['ageMin'] or 0, predicate['ageMax'] or MAX_AGE)
+                index.age_groups[key] = index.age_groups.get(key, 0) | bit
+            if predicate['minExperience'] is not None:
+                index.restricted['experience'] |= bit
+                years = predicate['minExperience']
+                index.experience_groups[years] = index.experience_groups.get(years, 0) | bit
+            for dimension, postings, values in (('state', index.states, predicate['states']),
+                                                ('craft', index.crafts, predicate['crafts'])):
+                if values:
+                    index.restricted[dimension] |= bit
+                    for value in values:
+                        postings[value] = postings.get(value, 0) | bit
+            index.schemes[scheme['id']] = {
+                'name': scheme['name'],
+                'category': scheme.get('category'),
+                'shortDescription': scheme.get('shortDescription'),
+                'officialWebsite': scheme.get('officialWebsite'),
+                'criteria': predicate,
+                'restrictions': restrictions,
+            }
+
+        # Range predicates become one precomputed mask per age / year of experience
+        for age in range(MAX_AGE + 1):
+            mask = 0
+            for (low, high), ids in index.age_groups.items():
+                if low <= age <= high:
+                    mask |= ids
+            index.allowed_by_age.append(mask)
+        mask = 0
+        for years in range(max(index.experience_groups, default=-1) + 1):
+            mask |= index.experience_groups.get(years, 0)
+            index.allowed_by_experience.append(mask)
+        index.levels = [levels[r] for r in sorted(levels, reverse=True)]
+        return index
+
+    def _decode(self, bits: int) -> List[str]:
+        if not bits:
+            return []
+        return [self.ids[m.start()] for m in _ONE.finditer(format(bits, 'b')[::-1])]
+
+    def match(self, profile: Dict, limit: Optional[int] = None) -> Dict[str, List[str]]:
+        """Scheme ids the profile is eligible for (most targeted first) and ones that need more profile data."""
+        gender = normalise_gender(profile.get('gender'))
+        age, experience = profile.get('age'), profile.get('experience')
+        if experience is not None:
+            experience = min(int(experience), len(self.allowed_by_experience) - 1)
+        allowed = {
+            'gender': None if gender is None else self.gender.get(gender, 0),
+            'age': None if age is None else self.allowed_by_age[min(max(int(age), 0), MAX_AGE)],
+            'experience': None if experience is None else
+            (self.allowed_by_experience[experience] if experience >= 0 else 0),
+            'state': None if not profile.get('state') else self.states.get(normalise_state(profile['state']), 0),
+            'craft': None if not profile.get('craftType') else
+            self.crafts.get(normalise_craft(profile['craftType']), 0),
+        }
+        excluded = maybe = 0
+        for dimension, restricted in self.restricted.items():
+            if allowed[dimension] is None:
+                maybe |= restricted
+            else:
+                excluded |= restricted & ~allowed[dimension]
+        maybe &= ~excluded
+        eligible = self.all_mask & ~excluded & ~maybe
+
+        # Within a restriction level, schemes preferring the profile's gender come first
+        preferred = self.prefer_gender.get(gender, 0) if gender else 0
+        ranked: List[str] = []
+        for level in self.levels:
+            in_level = eligible & level
+            ranked += self._decode(in_level & preferred)
+            ranked += self._decode(in_level & ~preferred)
+            if limit and len(ranked) >= limit:
+                return {'eligible': ranked[:limit], 'maybe': self._decode(maybe)}
+        return {'eligible': ranked, 'maybe': self._decode(maybe)}
+
+    def to_json(self) -> Dict:
+        as_hex = lambda postings: {k: format(v, 'x') for k, v in postings.items()}  # noqa: E731
+        return {
+            'version': INDEX_VERSION,
+            'ids': self.ids,
+            'schemes': self.schemes,
+            'all': format(self.all_mask, 'x'),
+            'levels': [format(level, 'x') for level in self.levels],
+            'restricted': as_hex(self.restricted),
+            'gender': as_hex(self.gender),
+            'preferGender': as_hex(self.prefer_gender),
+            'states': as_hex(self.states),
+            'crafts': as_hex(self.crafts),
+            'maxAge': MAX_AGE,
+            'allowedByAge': _steps(self.allowed_by_age),
+            'allowedByExperience': _steps(self.allowed_by_experience),
+            'normalise': {
+                'gender': GENDER_ALIASES,
+                'state': STATE_ALIASES,
+                'craft': CRAFT_ALIASES,
+                'craftPattern': _CRAFT_RE.pattern,
+            },
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'EligibilityIndex':
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"eligibility index version {data.get('version')}, expected {INDEX_VERSION}")
+        from_hex = lambda postings: {k: int(v, 16) for k, v in postings.items()}  # noqa: E731
+        index = cls()
+        index.ids = data['ids']
+        index.schemes = data['schemes']
+        index.all_mask = int(data['all'], 16)
+        index.levels = [int(level, 16) for level in data['levels']]
+        index.restricted = from_hex(data['restricted'])
+        index.gender = from_hex(data['gender'])
+        index.prefer_gender = from_hex(data['preferGender'])
+        index.states = from_hex(data['states'])
+        index.crafts = from_hex(data['crafts'])
+        index.allowed_by_age = _expand_steps(data['allowedByAge'], MAX_AGE + 1)
+        steps = data['allowedByExperience']
+        index.allowed_by_experience = _expand_steps(steps, steps[-1][0] + 1 if steps else 0)
+        return index
+
+    @classmethod
+    def load(cls, path: str = ELIGIBILITY_INDEX_PATH) -> 'EligibilityIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_json(json.load(f))
+
+    def save(self, path: str = ELIGIBILITY_INDEX_PATH):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.json.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def _steps(masks: List[int]) -> List[List]:
+    """[[from, hex mask], ...] for a per-value mask list: one entry where the mask changes."""
+    steps: List[List] = []
+    for value, mask in enumerate(masks):
+        if not steps or mask != int(steps[-1][1], 16):
+            steps.append([value, format(mask, 'x')])
+    return steps
+
+
+def _expand_steps(steps: List[List], length: int) -> List[int]:
+    masks: List[int] = []
+    for i, (start, mask) in enumerate(steps):
+        end = steps[i + 1][0] if i + 1 < len(steps) else length
+        masks.extend([int(mask, 16)] * (end - start))
+    return masks
@@ -0,0 +1,214 @@
+"""
+Breadth-first crawl frontier for following scheme links.
+
+Discovered links are normalised before they are compared, so the variants a
+site links the same page by (fragments, tracking parameters, reordered query
+strings, ``./`` and ``../`` segments, default ports, host case) are fetched
+once. Seen URLs are kept in a Bloom filter: a fixed bit array sized from the
+page budget, a few bytes per URL instead of the URL string itself. A false
+positive skips a page that was never fetched, at ``error_rate`` odds per
+link; there are no false negatives, so no page is fetched twice.
+
+``RobotsRules`` wraps the standard library robots.txt parser with the
+status-code handling of ``RobotFileParser.read`` for a body the crawler
+fetched itself.
+"""
+
+import hashlib
+import math
+import re
+from collections import deque
+from typing import Callable, Iterable, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|msclkid|phpsessid|jsessionid|sid)$', re.I)
+# Links to documents and media are recorded by the parser, not crawled
+SKIP_EXTENSIONS = re.compile(r'\.(pdf|docx?|xlsx?|pptx?|zip|rar|jpe?g|png|gif|svg|mp4|mp3)$', re.I)
+ROBOTS_AGENT = 'scheme-scraper'
+
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+
+
+def _normalise_escapes(text: str) -> str:
+    """Decode escaped unreserved characters and uppercase the remaining escapes."""
+    def fix(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else '%' + match.group(1).upper()
+    return _ESCAPE.sub(fix, text) if '%' in text else text
+
+
+def _remove_dot_segments(path: str) -> str:
+    """RFC 3986 section 5.2.4, also collapsing empty segments ("a//b" -> "a/b")."""
+    segments = []
+    for segment in path.split('/')[1:]:
+        if segment == '..':
+            if segments:
+                segments.pop()
+        elif segment not in ('.', ''):
+            segments.append(segment)
+    trailing = path.endswith(('/', '/.', '/..')) and segments
+    return '/' + '/'.join(segments) + ('/' if trailing else '')
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """Canonical absolute form of an http(s) link, or None if it is not crawlable.
+
+    Trailing slashes are kept: "/schemes" and "/schemes/" may be different pages.
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+    if ':' in host:
+        host = f'[{host}]'
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+
+    path = _remove_dot_segments(_normalise_escapes(parts.path) or '/')
+    query = ''
+    if parts.query:
+        params = [p for p in parts.query.split('&')
+                  if p and not TRACKING_PARAMS.match(p.split('=', 1)[0])]
+        query = '&'.join(sorted(_normalise_escapes(p) for p in params))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+class BloomFilter:
+    """Approximate set of strings in ``-ln(error_rate) / ln(2)^2`` bits per item."""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, item: str) -> bool:
+        """Add ``item``; True if it was not already (probably) present."""
+        bits = self._bits
+        new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class CrawlFrontier:
+    """FIFO queue of (url, depth) pairs, limited to the start URLs' hosts.
+
+    A URL is marked seen the first time it is offered, so it is queued (or
+    refused) at most once; at most ``max_pages`` URLs are ever queued and none
+    deeper than ``max_depth``.
+    """
+
+    def __init__(self, start_urls: Iterable[str], max_depth: int = 0, max_pages: int = 200,
+                 error_rate: float = 1e-6):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        # Redirect targets are marked seen as well, hence the headroom
+        self.seen = BloomFilter(2 * max_pages, error_rate)
+        self.queued = 0
+        self.duplicates = 0   # links dropped as already seen
+        self.rejected = 0     # off-site, non-http or document links
+        self.blocked = 0      # links the caller's ``allowed`` check refused
+        self._queue: deque = deque()
+        start_urls = [u for u in (normalize_url(u) for u in start_urls) if u]
+        self.hosts: Set[str] = {urlsplit(u).netloc for u in start_urls}
+        for url in start_urls:
+            self.add(url, 0)
+
+    def add(self, url: str, depth: int, base: Optional[str] = None,
+            allowed: Optional[Callable[[str], bool]] = None) -> bool:
+        """Queue a discovered link (resolved against ``base``); True if it was queued.
+
+        ``allowed`` (robots.txt rules) is checked before the link takes a page slot.
+        """
+        if depth > self.max_depth or self.queued >= self.max_pages:
+            return False
+        url = normalize_url(url, base)
+        if url is None:
+            self.rejected += 1
+            return False
+        parts = urlsplit(url)
+        if parts.netloc not in self.hosts or SKIP_EXTENSIONS.search(parts.path):
+            self.rejected += 1
+            return False
+        if not self.seen.add(url):
+            self.duplicates += 1
+            return False
+        if allowed is not None and not allowed(url):
+            self.blocked += 1
+            return False
+        self._queue.append((url, depth))
+        self.queued += 1
+        return True
+
+    def mark_seen(self, url: str):
+        """Record a URL reached some other way (a redirect target)."""
+        url = normalize_url(url)
+        if url:
+            self.seen.add(url)
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        return self._queue.popleft() if self._queue else None
+
+    def __len__(self):
+        return len(self._queue)
+
+
+class RobotsRules:
+    """robots.txt rules for one host."""
+
+    def __init__(self, status: int = 404, body: str = ''):
+        self._parser = RobotFileParser()
+        # Same outcomes as RobotFileParser.read: auth errors forbid the whole
+        # site, a missing file allows it, and a server error forbids it
+        if status in (401, 403):
+            self._parser.disallow_all = True
+        elif 400 <= status < 500:
+            self._parser.allow_all = True
+        elif status >= 500:
+            self._parser.disallow_all = True
+        else:
+            self._parser.parse(body.splitlines())
+
+    def allowed(self, url: str, agent: str = ROBOTS_AGENT) -> bool:
+        return self._parser.can_fetch(agent, url)
+
+    def crawl_delay(self, agent: str = ROBOTS_AGENT) -> Optional[float]:
+        delay = self._parser.crawl_delay(agent)
+        return float(delay) if delay is not None else None
@@ -0,0 +1,106 @@
+"""
+On-disk HTTP cache for incremental re-scraping.
+
+For every URL the cache keeps the HTTP validators (ETag / Last-Modified), a
+SHA-256 of the body, the schemes extracted from it and the links to follow
+from it. The crawler sends conditional requests from those validators; when a
+page comes back 304, or comes back 200 with the same content hash, the stored
+schemes are reused and the page is not parsed again (its stored links keep a
+link-following crawl going).
+
+Entries are keyed by source name as well as URL, and record the parser
+version, so a parser change or the same URL read by a different source
+forces a fresh parse.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+# Bump when extraction logic changes so cached schemes are rebuilt
+PARSER_VERSION = 4
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class PageCache:
+    def __init__(self, root: str, parser_version: int = PARSER_VERSION):
+        self.root = root
+        self.parser_version = parser_version
+        self._index_path = os.path.join(root, 'index.json')
+        os.makedirs(root, exist_ok=True)
+        # "source url" -> {etag, last_modified, hash, schemes, links, fetched_at, parser}
+        self._entries: Dict[str, Dict] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['entries']
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    @staticmethod
+    def _key(source: str, url: str) -> str:
+        return f"{source} {url}"
+
+    def get(self, source: str, url: str) -> Optional[Dict]:
+        entry = self._entries.get(self._key(source, url))
+        if entry and entry.get('parser') == self.parser_version:
+            return entry
+        return None
+
+    def conditional_headers(self, source: str, url: str) -> Dict[str, str]:
+        entry = self.get(source, url)
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def unchanged(self, source: str, url: str, status: int, content: bytes) -> Optional[List[Dict]]:
+        """Cached schemes if the response shows the page has not changed, else None."""
+        entry = self.get(source, url)
+        if entry is None:
+            return None
+        if status == 304 or entry['hash'] == content_hash(content):
+            entry['fetched_at'] = time.time()
+            self._dirty = True
+            return entry['schemes']
+        return None
+
+    def links(self, source: str, url: str) -> List[str]:
+        entry = self.get(source, url)
+        return entry.get('links', []) if entry else []
+
+    def store(self, source: str, url: str, headers: Dict[str, str], content: bytes, schemes: List[Dict],
+              links: Optional[List[str]] = None):
+        headers = {k.lower(): v for k, v in headers.items()}
+        self._entries[self._key(source, url)] = {
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'hash': content_hash(content),
+            'schemes': schemes,
+            'links': links or [],
+            'fetched_at': time.time(),
+            'parser': self.parser_version,
+        }
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.json.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self._entries}, f, ensure_ascii=False)
+        os.replace(tmp, self._index_path)
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,138 @@
+"""
+Targeted HTML parsing for scheme pages.
+
+Pages are parsed once with lxml's C parser, and a single compiled XPath union
+picks out everything the scraper looks at (links, h2-h4 headings and
+classed div/section blocks) in document order, so the tree is walked once
+instead of once per ``find_all``. Text is taken with a compiled XPath that
+skips script/style content, matching ``BeautifulSoup.get_text``.
+
+Scheme detail pages get the same treatment: one XPath pass collects the
+title, the headings that open benefit/eligibility/application/funding
+sections, the paragraphs and list items under them, and every link.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+from lxml import etree
+
+SCHEME_LINK = re.compile(r'scheme|nhdp|chcds', re.I)
+SCHEME_HEADING = re.compile(r'scheme|programme|development', re.I)
+SCHEME_BLOCK_CLASS = re.compile(r'scheme|programme', re.I)
+# Detail page section headings -> scheme fields; the first match wins
+DETAIL_SECTIONS = [
+    ('eligibility', re.compile(r'eligib|who can apply|target group|beneficiar', re.I)),
+    ('applicationProcess', re.compile(r'how to apply|application|procedure', re.I)),
+    ('financialAssistance', re.compile(r'financial|funding|quantum|pattern of assistance|grant', re.I)),
+    ('benefits', re.compile(r'benefit|component|assistance|support|feature', re.I)),
+]
+DOCUMENT_LINK = re.compile(r'\.pdf($|[?#])', re.I)
+
+_TARGETS = etree.XPath(
+    '//a[@href] | //h2 | //h3 | //h4 | //div[@class] | //section[@class]'
+)
+_DETAIL_TARGETS = etree.XPath(
+    '//title | //a[@href] | //*[self::h1 or self::h2 or self::h3 or self::h4 or self::li'
+    ' or self::p[not(ancestor::li)]][not(ancestor::nav or ancestor::header or ancestor::footer)]'
+)
+_TEXT = etree.XPath('.//text()[not(ancestor::script) and not(ancestor::style)]')
+_HEADINGS = {'h2', 'h3', 'h4'}
+_BLOCKS = {'div', 'section'}
+_PARSER = etree.HTMLParser(remove_comments=True, remove_pis=True)
+_STR_PARSER = etree.HTMLParser(remove_comments=True, remove_pis=True, encoding='utf-8')
+
+
+@dataclass
+class ParsedPage:
+    links: List[Tuple[str, str]] = field(default_factory=list)   # (href, text), every link
+    headings: List[str] = field(default_factory=list)            # scheme-like h2-h4 text
+    blocks: List[str] = field(default_factory=list)              # text of scheme/programme blocks
+
+
+@dataclass
+class SchemeDetail:
+    title: str = ''
+    description: str = ''                                        # first paragraph after the title
+    sections: Dict[str, List[str]] = field(default_factory=dict)  # scheme field -> lines
+    documents: List[str] = field(default_factory=list)            # PDF hrefs
+    links: List[Tuple[str, str]] = field(default_factory=list)   # (href, text), every link
+
+
+def element_text(element, separator: str = '') -> str:
+    """Stripped text of an element, like ``get_text(separator, strip=True)``."""
+    return separator.join(s for s in (t.strip() for t in _TEXT(element)) if s)
+
+
+def parse_document(html: Union[bytes, str]):
+    """lxml root element of a page, or None for an empty document."""
+    if not html:
+        return None
+    if isinstance(html, str):
+        return etree.fromstring(html.encode('utf-8'), _STR_PARSER)
+    # Bytes: let lxml pick the encoding from the page's meta charset
+    return etree.fromstring(html, _PARSER)
+
+
+def parse_scheme_page(html: Union[bytes, str]) -> ParsedPage:
+    """Links, scheme headings and scheme blocks of a page, in one pass."""
+    page = ParsedPage()
+    root = parse_document(html)
+    if root is None:
+        return page
+
+    for element in _TARGETS(root):
+        tag = element.tag
+        if tag == 'a':
+            page.links.append((element.get('href'), element_text(element, ' ')))
+        elif tag in _HEADINGS:
+            text = element_text(element, ' ')
+            if SCHEME_HEADING.search(text):
+                page.headings.append(text)
+        elif tag in _BLOCKS and SCHEME_BLOCK_CLASS.search(element.get('class', '')):
+            page.blocks.append(element_text(element))
+    return page
+
+
+def _clean(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def parse_scheme_detail(html: Union[bytes, str]) -> SchemeDetail:
+    """Title, description, recognised sections, documents and links of a scheme page."""
+    detail = SchemeDetail()
+    root = parse_document(html)
+    if root is None:
+        return detail
+
+    page_title = ''
+    section: Optional[List[str]] = None
+    for element in _DETAIL_TARGETS(root):
+        tag = element.tag
+        if tag == 'a':
+            href = element.get('href')
+            detail.links.append((href, _clean(element_text(element, ' '))))
+            if DOCUMENT_LINK.search(href):
+                detail.documents.append(href)
+            continue
+        text = _clean(element_text(element, ' '))
+        if not text:
+            continue
+        if tag == 'title':
+            page_title = text.split('|')[0].strip()
+        elif tag == 'h1':
+            detail.title = detail.title or text
+        elif tag in _HEADINGS:
+            # A heading opens a known section or ends the current one
+            name = next((n for n, pattern in DETAIL_SECTIONS if pattern.search(text)), None)
+            section = detail.sections.setdefault(name, []) if name else None
+        elif (len(element) == 1 and element[0].tag == 'a'
+              and not (element.text or '').strip() and not (element[0].tail or '').strip()):
+            continue   # a bare link ("Download guidelines"), already recorded above
+        elif section is not None:
+            section.append(text)
+        elif tag == 'p' and not detail.description and len(text) > 40:
+            detail.description = text
+    detail.title = detail.title or page_title
+    return detail
@@ -0,0 +1,148 @@
+"""
+Weighted multi-label scheme categorisation.
+
+All category keywords are compiled into one alternation regex shaped as a
+trie (shared prefixes factored out), so the regex engine branches once per
+character instead of trying every keyword at every word start, and a single
+scan over a scheme's text finds every keyword hit for every category. Each
+hit adds its keyword weight to its categories (hits in the scheme name count
+``name_weight`` times), and the scores are normalised into confidences.
+Keywords match at the start of a word and may take a suffix ("loan" matches
+"loans" but not "aloan"). Ties go to the category listed first, which keeps
+the old if/elif precedence.
+
+Batches are scanned as one joined string: one regex pass for many schemes.
+That only saves per-call overhead, which shows with long keyword lists.
+
+Scoring every category costs more than the previous first-match chain, which
+stopped at the first category with a hit: about 2.5x on the shipped 44
+keywords (roughly 10 us per scheme), level with checking every keyword as a
+substring, and far cheaper than both as the lists grow (benchmark_classifier.py).
+Categories change where the chain's list order decided: about half of the
+synthetic schemes get a different top label, mostly because a later category
+scores higher than the first one that matched.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CATEGORY = 'General Support'
+
+# category -> {keyword: weight}; order is the tie-break order
+CATEGORY_KEYWORDS: Dict[str, Dict[str, float]] = {
+    'Cluster Development': {'cluster': 2.0, 'nhdp': 2.0, 'cooperative': 1.5, 'self help group': 1.5,
+                            'group': 1.0, 'producer company': 1.5},
+    'Skill Training': {'training': 2.0, 'skill': 2.0, 'capacity': 1.0, 'guru shishya': 2.0,
+                       'apprentice': 1.5, 'workshop': 0.5, 'stipend': 1.0},
+    'Marketing Support': {'marketing': 2.0, 'exhibition': 1.5, 'fair': 1.0, 'promotion': 1.0,
+                          'shilp bazaar': 2.0, 'e-commerce': 1.5, 'branding': 1.0},
+    'Financial Assistance': {'financial': 1.5, 'loan': 2.0, 'subsidy': 2.0, 'grant': 1.5, 'credit': 1.5,
+                             'mudra': 2.0, 'interest subvention': 2.0, 'seed fund': 1.5},
+    'Infrastructure': {'infrastructure': 2.0, 'building': 1.0, 'facility': 1.5, 'chcds': 2.0,
+                       'common facility': 2.5, 'raw material bank': 1.5},
+    'Women Empowerment': {'women': 2.0, 'woman': 2.0, 'female': 1.5, 'lady': 1.0, 'mahila': 2.0},
+    'Export Promotion': {'export': 2.0, 'international': 1.0, 'global': 0.5, 'overseas': 1.5,
+                         'buyer-seller meet': 1.5},
+}
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation matching exactly ``words``, nested by shared prefix; longer words win."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node: Dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A word ending here is optional so longer words sharing the prefix are tried first
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+class SchemeClassifier:
+    def __init__(self, keywords: Optional[Dict[str, Dict[str, float]]] = None,
+                 default: str = DEFAULT_CATEGORY, name_weight: float = 2.0):
+        self.keywords = keywords or CATEGORY_KEYWORDS
+        self.default = default
+        self.name_weight = name_weight
+        self.categories = list(self.keywords)
+        self._order = {c: i for i, c in enumerate(self.categories)}
+        # keyword -> [(category, weight)]; a keyword may belong to several categories
+        self._hits: Dict[str, List[Tuple[str, float]]] = {}
+        for category, words in self.keywords.items():
+            for word, weight in words.items():
+                self._hits.setdefault(word.lower(), []).append((category, weight))
+        # Text is lowercased before scanning: case-insensitive matching defeats
+        # the regex engine's prefix optimisations
+        self._pattern = re.compile(rf'\b({_trie_pattern(self._hits)})\w*')
+
+    def _add(self, scores: Dict[str, float], seen: set, keyword: str, weight: float):
+        # Each distinct keyword counts once per field
+        if keyword in seen:
+            return
+        seen.add(keyword)
+        for category, w in self._hits[keyword]:
+            scores[category] = scores.get(category, 0.0) + w * weight
+
+    def scores(self, name: str, description: str = '') -> Dict[str, float]:
+        """Raw weighted score per matched category."""
+        # One scan over both fields; matches before the separator are name hits
+        name = name.lower()
+        split = len(name)
+        scores: Dict[str, float] = {}
+        seen: Tuple[set, set] = (set(), set())
+        for match in self._pattern.finditer(f'{name}\n{description.lower()}'):
+            if match.start() < split:
+                self._add(scores, seen[0], match.group(1), self.name_weight)
+            else:
+                self._add(scores, seen[1], match.group(1), 1.0)
+        return scores
+
+    def _rank(self, scores: Dict[str, float], threshold: float, top_k: int) -> List[Tuple[str, float]]:
+        total = sum(scores.values())
+        if not total:
+            return [(self.default, 1.0)]
+        ranked = sorted(scores.items(), key=lambda cs: (-cs[1], self._order[cs[0]]))
+        labels = [(c, round(s / total, 3)) for c, s in ranked if s / total >= threshold]
+        return (labels or [(ranked[0][0], round(ranked[0][1] / total, 3))])[:top_k]
+
+    def classify(self, name: str, description: str = '', threshold: float = 0.2,
+                 top_k: int = 3) -> List[Tuple[str, float]]:
+        """(category, confidence) pairs, most confident first; confidences sum to at most 1."""
+        return self._rank(self.scores(name, description), threshold, top_k)
+
+    def categorize(self, name: str, description: str = '') -> str:
+        return self.classify(name, description, top_k=1)[0][0]
+
+    def classify_batch(self, items: Iterable[Tuple[str, str]], threshold: float = 0.2,
+                       top_k: int = 3) -> List[List[Tuple[str, float]]]:
+        """``classify`` for many (name, description) pairs with one regex scan over all of them."""
+        fields, weights = [], []
+        for name, description in items:
+            # Lowercased before the offsets are taken: lower() can change a string's length
+            fields.extend((name.lower(), (description or '').lower()))
+            weights.extend((self.name_weight, 1.0))
+        if not fields:
+            return []
+        # Join with a separator that no keyword can span, and map match offsets back to fields
+        starts, offset = [], 0
+        for text in fields:
+            starts.append(offset)
+            offset += len(text) + 1
+        scores = [{} for _ in range(len(fields) // 2)]
+        seen = [set() for _ in fields]
+        for match in self._pattern.finditer('\n'.join(fields)):
+            index = bisect_right(starts, match.start()) - 1
+            self._add(scores[index // 2], seen[index], match.group(1), weights[index])
+        return [self._rank(s, threshold, top_k) for s in scores]
+
+
+CLASSIFIER = SchemeClassifier()
@@ -0,0 +1,127 @@
+"""
+Append-only scheme store.
+
+Every scheme gets a stable ID derived from its source and normalised name.
+Each run is diffed against the current state: new schemes are logged as
+``created``, schemes whose content changed as ``updated``, and unchanged
+schemes are not written at all. The log is NDJSON, one change per line with
+an increasing ``seq``, so readers (the ``/api/schemes`` route) only parse the
+bytes appended since their last read and can serve "changes since seq N".
+
+Schemes missing from a run are left alone: a source that timed out or was
+skipped should not delete its schemes. The log is compacted (rewritten with
+one line per live scheme, keeping seqs) once it holds several times more
+lines than schemes; the rewrite replaces the file, which readers detect and
+reload from the start.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, List
+
+CHANGELOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scheme_changes.ndjson')
+
+# Fields that change on every scrape without the scheme itself changing
+VOLATILE_FIELDS = {'id', 'lastUpdated'}
+
+
+def _normalise(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def scheme_id(source: str, name: str) -> str:
+    return hashlib.sha1(f"{_normalise(source)}\x1f{_normalise(name)}".encode('utf-8')).hexdigest()[:16]
+
+
+def content_fingerprint(scheme: Dict) -> str:
+    stable = {k: v for k, v in scheme.items() if k not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class SchemeStore:
+    def __init__(self, path: str = CHANGELOG_PATH, compact_ratio: int = 4):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        # id -> {seq, fingerprint, scheme}
+        self._state: Dict[str, Dict] = {}
+        self.seq = 0
+        self._lines = 0
+        self._replay()
+
+    def _replay(self):
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        valid = 0
+        with f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                valid += len(line)
+                change = json.loads(line)
+                self._state[change['id']] = {
+                    'seq': change['seq'],
+                    'fingerprint': content_fingerprint(change['scheme']),
+                    'scheme': change['scheme'],
+                }
+                self.seq = max(self.seq, change['seq'])
+                self._lines += 1
+        if valid < os.path.getsize(self.path):
+            # Drop a line left half-written by an interrupted run before appending after it
+            os.truncate(self.path, valid)
+
+    def upsert(self, schemes: List[Dict]) -> Dict[str, int]:
+        """Diff ``schemes`` against the store and append the changes; returns counts per outcome."""
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        lines = []
+        for scheme in schemes:
+            sid = scheme.get('id') or scheme_id(scheme.get('source', ''), scheme['name'])
+            scheme = dict(scheme, id=sid)
+            fingerprint = content_fingerprint(scheme)
+            current = self._state.get(sid)
+            if current and current['fingerprint'] == fingerprint:
+                counts['unchanged'] += 1
+                continue
+            op = 'updated' if current else 'created'
+            counts[op] += 1
+            self.seq += 1
+            self._state[sid] = {'seq': self.seq, 'fingerprint': fingerprint, 'scheme': scheme}
+            lines.append(json.dumps({'seq': self.seq, 'op': op, 'id': sid, 'at': now, 'scheme': scheme},
+                                    ensure_ascii=False))
+
+        if lines:
+            # One write per run: readers see whole lines or ignore the unterminated tail
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            self._lines += len(lines)
+        if self._lines > self.compact_ratio * max(len(self._state), 1):
+            self.compact()
+        return counts
+
+    def compact(self):
+        """Rewrite the log with only the latest change per scheme."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.ndjson.tmp')
+        entries = sorted(self._state.items(), key=lambda item: item[1]['seq'])
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for sid, entry in entries:
+                f.write(json.dumps({'seq': entry['seq'], 'op': 'created', 'id': sid,
+                                    'at': entry['scheme'].get('lastUpdated', ''), 'scheme': entry['scheme']},
+                                   ensure_ascii=False) + '\n')
+        os.replace(tmp, self.path)
+        self._lines = len(entries)
+
+    def schemes(self) -> List[Dict]:
+        return [entry['scheme'] for entry in self._state.values()]
+
+    def changes_since(self, seq: int) -> List[Dict]:
+        return [entry['scheme'] for entry in self._state.values() if entry['seq'] > seq]
+
+    def __len__(self):
+        return len(self._state)
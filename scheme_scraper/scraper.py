@@ -5,7 +5,6 @@ Scrapes government websites to collect scheme information for artisans
 """
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import time
 import re
@@ -14,6 +13,15 @@ import logging
 from typing import List, Dict, Optional
 import os
 
+from crawler import USER_AGENT, IndianHandicraftsSource, SchemeSource, crawl_sources, default_sources
+from http_cache import PageCache
+from page_parser import SCHEME_LINK, ParsedPage, SchemeDetail, parse_scheme_page
+from scheme_classifier import CLASSIFIER
+from scheme_store import SchemeStore, scheme_id
+from eligibility import EligibilityIndex, parse_eligibility
+
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.http_cache')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,75 +30,83 @@ class GovernmentSchemeScraper:
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': USER_AGENT
         })
         self.schemes = []
+        self.crawl_report = {}
         
-    def scrape_indian_handicrafts_gov_in(self) -> List[Dict]:
-        """Scrape schemes from indian.handicrafts.gov.in"""
+    def scrape_indian_handicrafts_gov_in(self, max_depth: int = 1, **crawl_options) -> List[Dict]:
+        """Scrape schemes from indian.handicrafts.gov.in, following scheme links to ``max_depth``"""
         try:
             logger.info("Starting to scrape indian.handicrafts.gov.in")
             
-            # Main website URL
-            base_url = "https://indian.handicrafts.gov.in"
-            main_url = f"{base_url}/en"
-            
-            response = self.session.get(main_url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for scheme links in the navigation
-            scheme_links = soup.find_all('a', href=re.compile(r'scheme|nhdp|chcds', re.I))
-            
-            # Also look for scheme-related content in the page
-            scheme_sections = soup.find_all(['h2', 'h3', 'h4'], string=re.compile(r'scheme|programme|development', re.I))
-            
-            logger.info(f"Found {len(scheme_links)} scheme links and {len(scheme_sections)} scheme sections")
-            
-            # Extract schemes from the main page content
-            schemes_found = []
-            
-            # Look for the main schemes mentioned on the page
-            main_schemes = [
-                "National Handicrafts Development Programme (NHDP)",
-                "Comprehensive Handicrafts Cluster Development Scheme (CHCDS)"
-            ]
-            
-            for scheme_name in main_schemes:
-                try:
-                    scheme_info = self.create_scheme_from_name(scheme_name, base_url)
-                    if scheme_info:
-                        schemes_found.append(scheme_info)
-                        logger.info(f"Created scheme: {scheme_info['name']}")
-                except Exception as e:
-                    logger.error(f"Error creating scheme {scheme_name}: {e}")
-                    continue
-            
-            # Also try to find more schemes from the page content
-            scheme_elements = soup.find_all(['div', 'section'], class_=re.compile(r'scheme|programme', re.I))
+            source = IndianHandicraftsSource(max_depth=max_depth)
+            report = crawl_sources([source], self, **crawl_options)[source.name]
+            if report.status == 'error':
+                raise RuntimeError('; '.join(report.errors))
             
-            for element in scheme_elements[:5]:  # Limit to first 5
-                try:
-                    scheme_name = element.get_text(strip=True)
-                    if len(scheme_name) > 20 and 'scheme' in scheme_name.lower():
-                        scheme_info = self.create_scheme_from_name(scheme_name, base_url)
-                        if scheme_info and scheme_info not in schemes_found:
-                            schemes_found.append(scheme_info)
-                            logger.info(f"Created additional scheme: {scheme_info['name']}")
-                except Exception as e:
-                    logger.error(f"Error processing scheme element: {e}")
-                    continue
-            
-            self.schemes = schemes_found
-            logger.info(f"Successfully created {len(self.schemes)} schemes from indian.handicrafts.gov.in")
+            self.schemes = report.schemes
+            logger.info(f"Successfully created {len(self.schemes)} schemes from indian.handicrafts.gov.in "
+                        f"({report.pages} pages)")
             return self.schemes
             
         except Exception as e:
             logger.error(f"Error scraping indian.handicrafts.gov.in: {e}")
             return []
     
-    def create_scheme_from_name(self, scheme_name: str, base_url: str) -> Optional[Dict]:
+    def extract_indian_handicrafts_schemes(self, html, base_url: str) -> List[Dict]:
+        """Extract schemes from an indian.handicrafts.gov.in page"""
+        return self.schemes_from_handicrafts_listing(parse_scheme_page(html), base_url)
+    
+    def schemes_from_handicrafts_listing(self, page: ParsedPage, base_url: str,
+                                         following_links: bool = False) -> List[Dict]:
+        """Schemes named on the indian.handicrafts.gov.in listing page.
+        
+        When the crawler follows the scheme links, schemes come from their detail
+        pages, and the listing only fills in main schemes that have no link.
+        """
+        scheme_links = [(href, text) for href, text in page.links if SCHEME_LINK.search(href)]
+        linked_names = {text.lower() for _, text in scheme_links} if following_links else set()
+        
+        logger.info(f"Found {len(scheme_links)} scheme links and {len(page.headings)} scheme sections")
+        
+        # Extract schemes from the main page content
+        schemes_found = []
+        
+        # Look for the main schemes mentioned on the page
+        main_schemes = [
+            "National Handicrafts Development Programme (NHDP)",
+            "Comprehensive Handicrafts Cluster Development Scheme (CHCDS)"
+        ]
+        
+        for scheme_name in main_schemes:
+            if scheme_name.lower() in linked_names:
+                continue
+            try:
+                scheme_info = self.create_scheme_from_name(scheme_name, base_url)
+                if scheme_info:
+                    schemes_found.append(scheme_info)
+                    logger.info(f"Created scheme: {scheme_info['name']}")
+            except Exception as e:
+                logger.error(f"Error creating scheme {scheme_name}: {e}")
+                continue
+        
+        # Also try to find more schemes from the page content
+        for scheme_name in ([] if following_links else page.blocks[:5]):  # Limit to first 5
+            try:
+                if len(scheme_name) > 20 and 'scheme' in scheme_name.lower():
+                    scheme_info = self.create_scheme_from_name(scheme_name, base_url)
+                    if scheme_info and scheme_info not in schemes_found:
+                        schemes_found.append(scheme_info)
+                        logger.info(f"Created additional scheme: {scheme_info['name']}")
+            except Exception as e:
+                logger.error(f"Error processing scheme element: {e}")
+                continue
+        
+        return schemes_found
+
+    def create_scheme_from_name(self, scheme_name: str, base_url: str,
+                                source: str = 'indian.handicrafts.gov.in') -> Optional[Dict]:
         """Create scheme information based on scheme name"""
         try:
             # Determine category based on name
@@ -181,35 +197,49 @@ class GovernmentSchemeScraper:
                     'officialWebsite': base_url,
                     'aiSummary': f'Government scheme for {category.lower()} support with financial assistance and development programs.',
                     'lastUpdated': time.strftime('%Y-%m-%d'),
-                    'source': 'indian.handicrafts.gov.in'
+                    'source': source
                 }
             
+            scheme_info['id'] = scheme_id(scheme_info['source'], scheme_info['name'])
+            scheme_info['eligibilityCriteria'] = parse_eligibility(scheme_info['eligibility'])
             return scheme_info
             
         except Exception as e:
             logger.error(f"Error creating scheme from name {scheme_name}: {e}")
             return None
     
+    def create_scheme_from_detail(self, detail: SchemeDetail, url: str, base_url: str,
+                                  source: str = 'indian.handicrafts.gov.in') -> Optional[Dict]:
+        """Create scheme information from a parsed scheme detail page"""
+        # Pages without any scheme section (indexes, notices) are not schemes
+        if not detail.title or not detail.sections:
+            return None
+        sections = detail.sections
+        category = self.categorize_scheme(detail.title, ' '.join([detail.description] + sections.get('benefits', [])))
+        description = detail.description or f'Government scheme for {category.lower()} support in the handicrafts sector.'
+        scheme_info = {
+            'name': detail.title,
+            'category': category,
+            'shortDescription': description,
+            'benefits': sections.get('benefits') or self.generate_sample_benefits(category),
+            'eligibility': sections.get('eligibility') or self.generate_sample_eligibility(category),
+            'applicationProcess': sections.get('applicationProcess') or self.generate_sample_application_process(category),
+            'financialAssistance': ' '.join(sections.get('financialAssistance', []))
+                                   or self.generate_sample_financial_assistance(category),
+            'pdfUrl': urljoin(url, detail.documents[0]) if detail.documents else url,
+            'officialWebsite': base_url,
+            'aiSummary': re.split(r'(?<=\.)\s', description, maxsplit=1)[0],
+            'lastUpdated': time.strftime('%Y-%m-%d'),
+            'source': source
+        }
+        scheme_info['id'] = scheme_id(scheme_info['source'], scheme_info['name'])
+        scheme_info['eligibilityCriteria'] = parse_eligibility(scheme_info['eligibility'])
+        return scheme_info
+    
     def categorize_scheme(self, name: str, description: str) -> str:
         """Categorize scheme based on name and description"""
-        text = (name + " " + description).lower()
-        
-        if any(word in text for word in ['cluster', 'group', 'cooperative', 'nhdp']):
-            return 'Cluster Development'
-        elif any(word in text for word in ['training', 'skill', 'capacity']):
-            return 'Skill Training'
-        elif any(word in text for word in ['marketing', 'exhibition', 'fair', 'promotion']):
-            return 'Marketing Support'
-        elif any(word in text for word in ['financial', 'loan', 'subsidy', 'grant']):
-            return 'Financial Assistance'
-        elif any(word in text for word in ['infrastructure', 'building', 'facility', 'chcds']):
-            return 'Infrastructure'
-        elif any(word in text for word in ['women', 'female', 'lady']):
-            return 'Women Empowerment'
-        elif any(word in text for word in ['export', 'international', 'global']):
-            return 'Export Promotion'
-        else:
-            return 'General Support'
+        # One weighted pass over all category keywords; the top-scoring category wins
+        return CLASSIFIER.categorize(name, description)
     
     def generate_sample_benefits(self, category: str) -> List[str]:
         """Generate sample benefits based on category"""
@@ -424,19 +454,20 @@ class GovernmentSchemeScraper:
         except Exception as e:
             logger.error(f"Error saving schemes: {e}")
     
-    def scrape_all_sources(self) -> List[Dict]:
-        """Scrape schemes from all available sources"""
-        all_schemes = []
+    def scrape_all_sources(self, sources: Optional[List[SchemeSource]] = None, **crawl_options) -> List[Dict]:
+        """Scrape schemes from all available sources concurrently"""
+        self.crawl_report = crawl_sources(sources or default_sources(), self, **crawl_options)
         
-        # Scrape from indian.handicrafts.gov.in
-        handicrafts_schemes = self.scrape_indian_handicrafts_gov_in()
-        all_schemes.extend(handicrafts_schemes)
-        
-        # TODO: Add more government websites
-        # - msme.gov.in
-        # - startupindia.gov.in
-        # - pmkisan.gov.in
+        # Sources are crawled in parallel; keep their order and drop duplicate names
+        all_schemes, seen = [], set()
+        for report in self.crawl_report.values():
+            for scheme in report.schemes:
+                key = scheme['name'].strip().lower()
+                if key not in seen:
+                    seen.add(key)
+                    all_schemes.append(scheme)
         
+        self.schemes = all_schemes
         logger.info(f"Total schemes scraped: {len(all_schemes)}")
         return all_schemes
 
@@ -445,15 +476,24 @@ def main():
     scraper = GovernmentSchemeScraper()
     
     try:
-        # Scrape schemes from all sources
-        schemes = scraper.scrape_all_sources()
+        # Scrape schemes from all sources, re-parsing only pages that changed
+        schemes = scraper.scrape_all_sources(cache=PageCache(HTTP_CACHE_DIR))
         
         if schemes:
-            # Save to JSON file
+            # Full snapshot for existing consumers of the JSON file
             scraper.save_schemes()
             
+            # Append only what changed to the scheme change log
+            store = SchemeStore()
+            changes = store.upsert(schemes)
+            
+            # Rebuild the profile matching index over every stored scheme
+            EligibilityIndex.build(store.schemes()).save()
+            
             # Print summary
             print(f"\n✅ Successfully scraped {len(schemes)} schemes!")
+            print(f"   {changes['created']} created, {changes['updated']} updated, "
+                  f"{changes['unchanged']} unchanged")
             print("\n📋 Scheme Categories:")
             categories = {}
             for scheme in schemes:
@@ -463,7 +503,14 @@ def main():
             for cat, count in categories.items():
                 print(f"  • {cat}: {count} schemes")
             
+            print("\n🌐 Sources:")
+            for name, report in scraper.crawl_report.items():
+                print(f"  • {name}: {report.status}, {len(report.schemes)} schemes, "
+                      f"{report.pages} pages ({report.skipped} unchanged, {report.blocked} blocked by robots.txt), "
+                      f"{report.bytes / 1024:.1f} KB in {report.elapsed:.1f}s")
+            
             print(f"\n💾 Schemes saved to: scraped_schemes.json")
+            print(f"   Changes appended to: scheme_changes.ndjson")
             print(f"🚀 Ready to integrate with your marketplace!")
             
         else:
@@ -0,0 +1,81 @@
+"""Tests for eligibility: predicate parsing and the bitset index against the direct predicate check."""
+
+import itertools
+
+import pytest
+
+from eligibility import EligibilityIndex, parse_eligibility, predicate_matches
+
+
+def test_parse_eligibility():
+    predicate = parse_eligibility([
+        'Only women artisans may apply',
+        'Applicants aged 18 to 45 years',
+        'Minimum 2 years of experience in handloom weaving',
+        'Resident of Orissa or the North-East',
+    ])
+    assert predicate['gender'] == 'female' and predicate['preferGender'] is None
+    assert (predicate['ageMin'], predicate['ageMax']) == (18, 45)
+    assert predicate['minExperience'] == 2
+    assert predicate['crafts'] == ['weaving']
+    assert 'odisha' in predicate['states'] and 'assam' in predicate['states']
+
+
+def test_unrecognised_lines_add_nothing():
+    predicate = parse_eligibility(['Open to artisans from all states', 'Must hold a bank account'])
+    assert predicate == parse_eligibility([])
+
+
+SCHEMES = [
+    {'id': 'open', 'name': 'Open scheme', 'eligibility': ['Any registered artisan']},
+    {'id': 'women', 'name': 'Mahila scheme', 'eligibility': ['Only women entrepreneurs']},
+    {'id': 'prefer', 'name': 'Preference scheme', 'eligibility': ['Preference to women artisans']},
+    {'id': 'young', 'name': 'Youth scheme', 'eligibility': ['Age between 18 and 35 years']},
+    {'id': 'senior', 'name': 'Senior scheme', 'eligibility': ['Applicants above 60 years of age']},
+    {'id': 'veteran', 'name': 'Veteran scheme', 'eligibility': ['At least 5 years of experience']},
+    {'id': 'bihar', 'name': 'Bihar painting', 'eligibility': ['Madhubani painters from Bihar']},
+    {'id': 'potters', 'name': 'Potters scheme', 'eligibility': ['Terracotta and pottery artisans of Rajasthan']},
+]
+PROFILES = [dict(zip(('gender', 'age', 'experience', 'state', 'craftType'), values)) for values in
+            itertools.product(['female', 'M', None], [20, 65, None], [1, 10, None],
+                              ['Bihar', 'rajasthan', 'Goa', None], ['Madhubani art', 'Potter', None])]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return EligibilityIndex.build(SCHEMES)
+
+
+def expected(profile):
+    outcome = {'eligible': set(), 'maybe': set()}
+    for s in SCHEMES:
+        result = predicate_matches(parse_eligibility(s['eligibility']), profile)
+        if result:
+            outcome[result].add(s['id'])
+    return outcome
+
+
+def test_index_agrees_with_the_predicates(index):
+    for profile in PROFILES:
+        result = index.match(profile)
+        assert {k: set(v) for k, v in result.items()} == expected(profile), profile
+
+
+def test_round_trip_through_json_gives_the_same_matches(index):
+    loaded = EligibilityIndex.from_json(index.to_json())
+    for profile in PROFILES:
+        assert loaded.match(profile) == index.match(profile)
+
+
+def test_ranking_and_limit(index):
+    profile = {'gender': 'female', 'age': 20, 'experience': 10, 'state': 'Bihar', 'craftType': 'madhubani'}
+    eligible = index.match(profile)['eligible']
+    # Most restrictions first, then by name; a gender preference ranks first within its level
+    assert eligible == ['bihar', 'women', 'veteran', 'young', 'prefer', 'open']
+    assert index.match(profile, limit=2)['eligible'] == eligible[:2]
+
+
+def test_version_mismatch_is_rejected(index):
+    data = dict(index.to_json(), version=0)
+    with pytest.raises(ValueError):
+        EligibilityIndex.from_json(data)
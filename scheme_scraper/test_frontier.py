@@ -0,0 +1,69 @@
+"""Tests for frontier: URL normalisation, the Bloom filter, the crawl frontier and robots.txt handling."""
+
+import pytest
+
+from frontier import BloomFilter, CrawlFrontier, RobotsRules, normalize_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://Example.GOV.in:443/a/./b/../c?utm_source=x&b=2&a=1#top', 'https://example.gov.in/a/c?a=1&b=2'),
+    ('http://example.gov.in:80', 'http://example.gov.in/'),
+    ('http://example.gov.in:8080/x//y/', 'http://example.gov.in:8080/x/y/'),
+    ('http://example.gov.in/%7euser/%2f', 'http://example.gov.in/~user/%2F'),
+    ('http://example.gov.in./schemes', 'http://example.gov.in/schemes'),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_resolves_relative_links_and_rejects_the_rest():
+    assert normalize_url('../list?page=2', 'https://example.gov.in/schemes/a/') == \
+        'https://example.gov.in/schemes/list?page=2'
+    assert normalize_url('mailto:office@example.gov.in') is None
+    assert normalize_url('javascript:void(0)', 'https://example.gov.in/') is None
+    assert normalize_url('http://example.gov.in:99999/') is None
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    urls = [f'https://example.gov.in/scheme/{i}' for i in range(1000)]
+    assert all(bloom.add(url) for url in urls)
+    assert all(url in bloom for url in urls)
+    assert not bloom.add(urls[0])
+    assert len(bloom) == 1000
+    assert sum(f'https://example.gov.in/other/{i}' in bloom for i in range(1000)) <= 1
+
+
+def test_frontier_queues_each_page_once_within_the_site():
+    frontier = CrawlFrontier(['https://example.gov.in/'], max_depth=1)
+    assert frontier.pop() == ('https://example.gov.in/', 0)
+    base = 'https://example.gov.in/'
+    assert frontier.add('/schemes?b=1&a=2', 1, base)
+    assert not frontier.add('/schemes?a=2&b=1#apply', 1, base)
+    assert not frontier.add('https://other.example.com/', 1, base)
+    assert not frontier.add('/guidelines.pdf', 1, base)
+    assert not frontier.add('/deeper', 2, base)
+    assert not frontier.add('/private', 1, base, allowed=lambda url: False)
+    assert (frontier.duplicates, frontier.rejected, frontier.blocked) == (1, 2, 1)
+    assert frontier.pop() == ('https://example.gov.in/schemes?a=2&b=1', 1)
+    assert frontier.pop() is None
+
+
+def test_frontier_respects_the_page_budget_and_redirects():
+    frontier = CrawlFrontier(['https://example.gov.in/'], max_depth=3, max_pages=2)
+    frontier.mark_seen('https://example.gov.in/moved')
+    assert not frontier.add('/moved', 1, 'https://example.gov.in/')
+    assert frontier.add('/a', 1, 'https://example.gov.in/')
+    assert not frontier.add('/b', 1, 'https://example.gov.in/')
+    assert frontier.queued == 2 and len(frontier) == 2
+
+
+def test_robots_rules_follow_the_status_code():
+    body = 'User-agent: scheme-scraper\nDisallow: /admin\nCrawl-delay: 2\n'
+    rules = RobotsRules(200, body)
+    assert rules.allowed('https://example.gov.in/schemes')
+    assert not rules.allowed('https://example.gov.in/admin/users')
+    assert rules.crawl_delay() == 2.0
+    assert RobotsRules(404).allowed('https://example.gov.in/admin')
+    assert not RobotsRules(403).allowed('https://example.gov.in/')
+    assert not RobotsRules(503).allowed('https://example.gov.in/')
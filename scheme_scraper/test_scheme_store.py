@@ -0,0 +1,65 @@
+"""Tests for scheme_store: stable ids, change detection, replay and compaction."""
+
+import json
+
+import pytest
+
+from scheme_store import SchemeStore, scheme_id
+
+
+def scheme(name, **fields):
+    return {'name': name, 'source': 'MSME', 'lastUpdated': '2024-01-01T00:00:00', **fields}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'changes.ndjson')
+
+
+def read_log(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_scheme_id_ignores_case_and_whitespace():
+    assert scheme_id('MSME', 'PM  Vishwakarma ') == scheme_id('msme', 'pm vishwakarma')
+    assert scheme_id('MSME', 'PM Vishwakarma') != scheme_id('KVIC', 'PM Vishwakarma')
+
+
+def test_upsert_logs_only_changes(path):
+    store = SchemeStore(path)
+    assert store.upsert([scheme('A', amount=1), scheme('B')]) == {'created': 2, 'updated': 0, 'unchanged': 0}
+    # A new lastUpdated alone is not a change
+    counts = store.upsert([scheme('A', amount=1, lastUpdated='2024-02-01T00:00:00'), scheme('B', amount=2)])
+    assert counts == {'created': 0, 'updated': 1, 'unchanged': 1}
+    assert [change['op'] for change in read_log(path)] == ['created', 'created', 'updated']
+    assert store.seq == 3
+    assert [s['name'] for s in store.changes_since(2)] == ['B']
+
+
+def test_missing_schemes_are_kept(path):
+    store = SchemeStore(path)
+    store.upsert([scheme('A'), scheme('B')])
+    store.upsert([scheme('A')])
+    assert len(store) == 2
+
+
+def test_replay_restores_state_and_drops_a_torn_line(path):
+    SchemeStore(path).upsert([scheme('A', amount=1)])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"seq": 2, "op": "cre')
+    store = SchemeStore(path)
+    assert store.seq == 1 and store.schemes()[0]['amount'] == 1
+    assert store.upsert([scheme('A', amount=1)])['unchanged'] == 1
+    store.upsert([scheme('B')])
+    assert [change['seq'] for change in read_log(path)] == [1, 2]
+
+
+def test_compaction_keeps_one_line_per_scheme(path):
+    store = SchemeStore(path, compact_ratio=2)
+    for amount in range(4):
+        store.upsert([scheme('A', amount=amount)])
+    log = read_log(path)
+    assert len(log) <= 2
+    assert log[-1]['seq'] == store.seq == 4 and log[-1]['scheme']['amount'] == 3
+    assert SchemeStore(path).schemes() == store.schemes()
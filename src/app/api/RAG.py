@@ -1,16 +1,36 @@
 import os
-import requests
-from typing import Optional, Literal
+import asyncio
+import json
+import time
+import numpy as np
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Literal, Tuple
 from fastapi import FastAPI, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from pydantic import BaseModel, validator
 from langchain_huggingface import HuggingFaceEmbeddings, ChatHuggingFace, HuggingFaceEndpoint
-from langchain.vectorstores.faiss import FAISS
-from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage
 from pathlib import Path
+from urllib.parse import quote
 from dotenv import load_dotenv
 
+from hf_client import HFInferenceClient
+from rag_audio import pipelined_speech
+from rag_cache import SemanticAnswerCache, context_fingerprint
+from rag_index import (
+    BM25Index,
+    dense_search,
+    dense_search_batch,
+    estimate_tokens,
+    mmr_select,
+    pack_to_budget,
+    reciprocal_rank_fusion,
+)
+from rag_metrics import RollingStats
+
 
 # ------------------------------------------------------
 # 1. Config
@@ -22,7 +42,7 @@ if not HF_TOKEN:
     raise RuntimeError("Missing HUGGINGFACEHUB_API_TOKEN environment variable. Set your HF token before starting the API.")
 
 # Directory to persist the FAISS vectorstore
-VECTORSTORE_DIR = Path(_file_).parent / "vectorstore"
+VECTORSTORE_DIR = Path(__file__).parent / "vectorstore"
 VECTORSTORE_DIR.mkdir(parents=True, exist_ok=True)
 
 # ------------------------------------------------------
@@ -61,11 +81,58 @@ documents = [
     "Mumbai is called the City of Dreams because millions come here for opportunities."
 ]
 
-docs = [Document(page_content=text) for text in documents]
+# Metadata used for pre-filtering (see rag_index.FILTER_FIELDS)
+SEED_METADATA = {"doc_type": "fact", "craft_type": "general", "state": "Maharashtra", "language": "en"}
+
+docs = [Document(page_content=text, metadata=dict(SEED_METADATA)) for text in documents]
+
+# Embedding backend: "torch" (sentence-transformers) or "onnx" (see rag_embeddings.py).
+# Both run all-MiniLM-L6-v2, but the vectors are not identical (the int8 graph
+# least of all), so the index records which backend built it; see EMBEDDING_SIGNATURE.
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+EMBEDDING_BATCH_SIZE = int(os.getenv("RAG_EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_QUANTIZED = EMBEDDING_BACKEND == "onnx" and os.getenv("RAG_ONNX_QUANTIZED", "0") == "1"
+if EMBEDDING_BACKEND == "onnx":
+    from rag_embeddings import OnnxEmbeddings
+
+    embedding_model = OnnxEmbeddings(
+        model_dir=os.getenv("RAG_ONNX_MODEL_DIR", str(Path(__file__).parent / "onnx_minilm")),
+        quantized=EMBEDDING_QUANTIZED,
+        num_threads=int(os.getenv("RAG_EMBEDDING_THREADS", "0")) or None,
+        batch_size=EMBEDDING_BATCH_SIZE,
+    )
+else:
+    embedding_model = HuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE},
+    )
+
+# Which embeddings the persisted vectors came from. Query vectors are only
+# comparable to document vectors from the same backend and quantization.
+EMBEDDING_SIGNATURE = {
+    "model": "sentence-transformers/all-MiniLM-L6-v2",
+    "backend": EMBEDDING_BACKEND,
+    "quantized": EMBEDDING_QUANTIZED,
+}
+EMBEDDING_SIGNATURE_PATH = VECTORSTORE_DIR / "embeddings.json"
+
+
+def stored_embedding_signature() -> Optional[Dict[str, Any]]:
+    try:
+        with open(EMBEDDING_SIGNATURE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # an index from before the signature was recorded
+
+
+def save_vectorstore(db: FAISS) -> None:
+    db.save_local(str(VECTORSTORE_DIR))
+    with open(EMBEDDING_SIGNATURE_PATH, "w", encoding="utf-8") as f:
+        json.dump(EMBEDDING_SIGNATURE, f)
 
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
 
 # Try to load an existing vectorstore; if not found, create and persist it.
+# An index built by another backend is re-embedded from its own documents.
 faiss_db: FAISS
 if (VECTORSTORE_DIR / "index.faiss").exists():
     faiss_db = FAISS.load_local(
@@ -73,13 +140,158 @@ if (VECTORSTORE_DIR / "index.faiss").exists():
         embeddings=embedding_model,
         allow_dangerous_deserialization=True,
     )
+    built_with = stored_embedding_signature()
+    if built_with != EMBEDDING_SIGNATURE:
+        print(f"Vectorstore was built with {built_with}, re-embedding with {EMBEDDING_SIGNATURE}")
+        stored_docs = [
+            faiss_db.docstore.search(faiss_db.index_to_docstore_id[i]) for i in range(faiss_db.index.ntotal)
+        ]
+        faiss_db = FAISS.from_documents(stored_docs, embedding_model)
+        save_vectorstore(faiss_db)
 else:
     faiss_db = FAISS.from_documents(docs, embedding_model)
-    faiss_db.save_local(str(VECTORSTORE_DIR))
+    save_vectorstore(faiss_db)
+
+
+def doc_at(position: int) -> Document:
+    return faiss_db.docstore.search(faiss_db.index_to_docstore_id[position])
+
+
+# BM25 index over the same positions as the FAISS index, persisted next to it.
+# Rebuilt whenever it does not cover exactly the documents in the vectorstore.
+BM25_PATH = VECTORSTORE_DIR / "bm25.json"
+bm25_index: Optional[BM25Index] = None
+if BM25_PATH.exists():
+    bm25_index = BM25Index.load(BM25_PATH)
+if bm25_index is None or len(bm25_index) != faiss_db.index.ntotal:
+    stored_docs = [doc_at(i) for i in range(faiss_db.index.ntotal)]
+    bm25_index = BM25Index.build(
+        [d.page_content for d in stored_docs], [d.metadata for d in stored_docs]
+    )
+    bm25_index.save(BM25_PATH)
+
+# Each retriever contributes this many candidates per requested result to RRF
+RRF_CANDIDATE_MULTIPLIER = int(os.getenv("RAG_RRF_CANDIDATE_MULTIPLIER", "4"))
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+RetrievalMode = Literal["hybrid", "dense"]
+
+# Semantic answer cache. Invalidated whenever the document set changes; entries
+# are also keyed on the retrieved context, so edited chunks never serve stale answers.
+answer_cache = SemanticAnswerCache(
+    similarity=float(os.getenv("RAG_CACHE_SIMILARITY", "0.95")),
+    ttl_seconds=float(os.getenv("RAG_CACHE_TTL_SECONDS", "86400")),
+    max_entries=int(os.getenv("RAG_CACHE_MAX_ENTRIES", "2048")),
+)
+answer_cache.bind_corpus(context_fingerprint(doc_at(i) for i in range(faiss_db.index.ntotal)))
+
+
+def add_documents(new_docs: List[Document]) -> None:
+    """Append documents to both indexes, persist them and invalidate the answer cache."""
+    faiss_db.add_documents(new_docs)
+    for d in new_docs:
+        bm25_index.add(d.page_content, d.metadata)
+    save_vectorstore(faiss_db)
+    bm25_index.save(BM25_PATH)
+    answer_cache.bind_corpus(context_fingerprint(doc_at(i) for i in range(faiss_db.index.ntotal)))
+
 
+def retrieve_positions(
+    query: str,
+    k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    retrieval: RetrievalMode = "hybrid",
+    query_vector: Optional[List[float]] = None,
+    dense_hits: Optional[List[Tuple[int, float]]] = None,
+) -> List[int]:
+    """Ranked FAISS row positions for ``query`` (see retrieve_docs).
 
-def retrieve_docs(query: str, k: int = 5):
-    return faiss_db.similarity_search(query, k=k)
+    ``dense_hits`` lets callers that already ran a (batched) FAISS search for
+    the same filters pass its results in instead of searching again.
+    """
+    # Metadata filters shrink the candidate set before either retriever scores it
+    allowed = bm25_index.filter_ids(filters)
+    if allowed is not None and not allowed:
+        return []
+
+    fetch_k = k * RRF_CANDIDATE_MULTIPLIER
+    if dense_hits is not None:
+        dense = dense_hits[:fetch_k]
+    else:
+        if query_vector is None:
+            query_vector = embedding_model.embed_query(query)
+        dense = dense_search(faiss_db.index, query_vector, fetch_k, allowed)
+    if retrieval == "dense":
+        positions = [i for i, _ in dense[:k]]
+    else:
+        lexical = bm25_index.search(query, fetch_k, allowed)
+        fused = reciprocal_rank_fusion([[i for i, _ in dense], [i for i, _ in lexical]], k=RRF_K)
+        positions = [i for i, _ in fused[:k]]
+    return positions
+
+
+def retrieve_docs(
+    query: str,
+    k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    retrieval: RetrievalMode = "hybrid",
+    query_vector: Optional[List[float]] = None,
+) -> List[Document]:
+    positions = retrieve_positions(query, k, filters, retrieval, query_vector)
+    return [doc_at(i) for i in positions]
+
+
+# Context assembly: over-fetch, MMR re-rank, drop near-duplicates, pack to a token budget
+CONTEXT_PACKING = os.getenv("RAG_CONTEXT_PACKING", "1") == "1"
+CONTEXT_OVERFETCH = int(os.getenv("RAG_CONTEXT_OVERFETCH", "3"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1500"))
+MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+DEDUP_THRESHOLD = float(os.getenv("RAG_DEDUP_THRESHOLD", "0.95"))
+
+# Naive (top-k join) vs packed context size per request, exposed on /rag/metrics
+prompt_tokens = RollingStats(window=int(os.getenv("RAG_METRICS_WINDOW", "1000")))
+
+
+def assemble_context(
+    query: str,
+    query_vector: List[float],
+    k: int,
+    filters: Optional[Dict[str, Any]] = None,
+    dense_hits: Optional[List[Tuple[int, float]]] = None,
+) -> List[Document]:
+    positions = retrieve_positions(
+        query, k * CONTEXT_OVERFETCH, filters, query_vector=query_vector, dense_hits=dense_hits
+    )
+    candidates = [doc_at(i) for i in positions]
+    naive_tokens = sum(estimate_tokens(d.page_content) for d in candidates[:k])
+    prompt_tokens.record("context.naive_tokens", naive_tokens)
+    if not CONTEXT_PACKING or not candidates:
+        prompt_tokens.record("context.packed_tokens", naive_tokens)
+        return candidates[:k]
+
+    # Reuse the stored vectors; nothing is re-embedded
+    vectors = np.vstack([faiss_db.index.reconstruct(i) for i in positions])
+    order = mmr_select(query_vector, vectors, k, lambda_mult=MMR_LAMBDA, dedup_threshold=DEDUP_THRESHOLD)
+    ranked = [candidates[i] for i in order]
+    packed = [ranked[i] for i in pack_to_budget([d.page_content for d in ranked], CONTEXT_TOKEN_BUDGET)]
+    prompt_tokens.record("context.packed_tokens", sum(estimate_tokens(d.page_content) for d in packed))
+    return packed
+
+
+def batch_dense_retrieval(
+    queries: List[str],
+    k: int,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[List[float]], List[List[Tuple[int, float]]]]:
+    """Embed all queries in one batch and run a single FAISS search for them.
+
+    Returns the query vectors and, per query, enough dense candidates for
+    assemble_context to skip its own FAISS search.
+    """
+    query_vectors = embedding_model.embed_documents(queries)
+    allowed = bm25_index.filter_ids(filters)
+    fetch_k = k * CONTEXT_OVERFETCH * RRF_CANDIDATE_MULTIPLIER
+    return query_vectors, dense_search_batch(faiss_db.index, query_vectors, fetch_k, allowed)
 
 # ------------------------------------------------------
 # 3. Setup LLM (Qwen via HF API)
@@ -104,52 +316,154 @@ def get_system_prompt(mode: Literal["content", "guide"]) -> str:
     )
 
 
-def rag_answer(query: str, k: int = 5, mode: Literal["content", "guide"] = "guide") -> str:
-    context_docs = retrieve_docs(query, k=k)
+# Time-to-first-token and total latency, per endpoint (exposed on /rag/metrics)
+latency = RollingStats(window=int(os.getenv("RAG_METRICS_WINDOW", "1000")))
+
+
+def prepare_answer(
+    query: str,
+    k: int,
+    mode: Literal["content", "guide"],
+    filters: Optional[Dict[str, Any]],
+    query_vector: Optional[List[float]] = None,
+    dense_hits: Optional[List[Tuple[int, float]]] = None,
+) -> Tuple[List[float], str, list]:
+    """Retrieve context and build the prompt. Returns (query vector, context fingerprint, messages)."""
+    if query_vector is None:
+        query_vector = embedding_model.embed_query(query)
+    context_docs = assemble_context(query, query_vector, k, filters, dense_hits=dense_hits)
     context = "\n---\n".join([d.page_content for d in context_docs])
     messages = [
         SystemMessage(content=get_system_prompt(mode)),
         HumanMessage(content=f"Context:\n{context}\n\nQuestion: {query}")
     ]
+    return query_vector, context_fingerprint(context_docs), messages
+
+
+def rag_answer(
+    query: str,
+    k: int = 5,
+    mode: Literal["content", "guide"] = "guide",
+    filters: Optional[Dict[str, Any]] = None,
+    query_vector: Optional[List[float]] = None,
+    dense_hits: Optional[List[Tuple[int, float]]] = None,
+) -> str:
+    start = time.perf_counter()
+    query_vector, fingerprint, messages = prepare_answer(query, k, mode, filters, query_vector, dense_hits)
+    cached = answer_cache.get(query_vector, mode, fingerprint)
+    if cached is not None:
+        latency.record("text.cached_total_ms", (time.perf_counter() - start) * 1000)
+        return cached
+
     response = chat_model.invoke(messages)
-    return response.content.strip()
+    answer = response.content.strip()
+    if answer:
+        answer_cache.put(query_vector, mode, fingerprint, answer)
+    latency.record("text.total_ms", (time.perf_counter() - start) * 1000)
+    return answer
+
+
+def rag_answer_stream(
+    query: str,
+    k: int = 5,
+    mode: Literal["content", "guide"] = "guide",
+    filters: Optional[Dict[str, Any]] = None,
+    metric_prefix: str = "stream",
+) -> Iterator[str]:
+    """Yield answer tokens as the model produces them.
+
+    A cache hit is yielded as a single chunk. Time-to-first-token and total
+    latency are recorded separately under ``metric_prefix``. Only a stream
+    that ran to the end with a non-empty answer is cached: a client that
+    disconnects closes the generator at a ``yield``, and a model error
+    propagates, so neither reaches the ``put``.
+    """
+    start = time.perf_counter()
+    query_vector, fingerprint, messages = prepare_answer(query, k, mode, filters)
+    cached = answer_cache.get(query_vector, mode, fingerprint)
+    if cached is not None:
+        latency.record(f"{metric_prefix}.cached_total_ms", (time.perf_counter() - start) * 1000)
+        yield cached
+        return
+
+    parts: List[str] = []
+    for chunk in chat_model.stream(messages):
+        if not chunk.content:
+            continue
+        if not parts:
+            latency.record(f"{metric_prefix}.ttft_ms", (time.perf_counter() - start) * 1000)
+        parts.append(chunk.content)
+        yield chunk.content
+
+    latency.record(f"{metric_prefix}.total_ms", (time.perf_counter() - start) * 1000)
+    answer = "".join(parts).strip()
+    if answer:
+        answer_cache.put(query_vector, mode, fingerprint, answer)
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 # ------------------------------------------------------
 # 4. HuggingFace STT (Whisper) + TTS (Kokoro)
 
-def speech_to_text(audio_bytes: bytes, hf_model: str = "openai/whisper-small") -> str:
-    url = f"https://api-inference.huggingface.co/models/{hf_model}"
-    headers = {"Authorization": f"Bearer {HF_TOKEN}"}
-    resp = requests.post(url, headers=headers, data=audio_bytes, timeout=120)
-    resp.raise_for_status()
-    result = resp.json()
-    return result.get("text", str(result))
-
-
-def text_to_speech(text: str, out_path: str = "rag_response.wav", hf_model: str = "hexgrad/Kokoro-82M") -> str:
-    url = f"https://api-inference.huggingface.co/models/{hf_model}"
-    headers = {
-        "Authorization": f"Bearer {HF_TOKEN}",
-        "Accept": "audio/wav",
-        "Content-Type": "application/json"
-    }
-    resp = requests.post(url, headers=headers, json={"inputs": text}, timeout=120)
-    resp.raise_for_status()
-    if "audio" in resp.headers.get("content-type", ""):
-        with open(out_path, "wb") as f:
-            f.write(resp.content)
-        return out_path
-    return resp.text
+# One pooled async client shared by every request (opened/closed with the app)
+hf_client = HFInferenceClient(HF_TOKEN)
+
+
+async def speech_to_text(audio_bytes: bytes, hf_model: str = "openai/whisper-small") -> str:
+    return await hf_client.speech_to_text(audio_bytes, model=hf_model)
+
+
+async def text_to_speech(text: str, hf_model: str = "hexgrad/Kokoro-82M") -> bytes:
+    """Synthesize ``text`` and return the WAV bytes (kept in memory, per request)."""
+    resp = await hf_client.text_to_speech(text, model=hf_model)
+    if "audio" not in resp.headers.get("content-type", ""):
+        raise RuntimeError(f"TTS did not return audio: {resp.text[:200]}")
+    return resp.content
+
+
+# Sentences synthesized concurrently while the answer is still being generated
+TTS_MAX_IN_FLIGHT = int(os.getenv("RAG_TTS_MAX_IN_FLIGHT", "3"))
+
+
+async def speech_answer_audio(transcript: str, k: int, mode: Literal["content", "guide"]):
+    """Stream the spoken answer: sentence N is synthesized while N+1 is generated."""
+    start = time.perf_counter()
+    tokens = iterate_in_threadpool(rag_answer_stream(transcript, k=k, mode=mode, metric_prefix="speech_audio"))
+    first = True
+    async for chunk in pipelined_speech(tokens, text_to_speech, max_in_flight=TTS_MAX_IN_FLIGHT):
+        if first:
+            latency.record("speech_audio.first_audio_ms", (time.perf_counter() - start) * 1000)
+            first = False
+        yield chunk
+    latency.record("speech_audio.audio_total_ms", (time.perf_counter() - start) * 1000)
 
 # ------------------------------------------------------
 # 5. FastAPI app
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await hf_client.start()
+    yield
+    await hf_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class RetrievalFilters(BaseModel):
+    doc_type: Optional[str] = None
+    craft_type: Optional[str] = None
+    state: Optional[str] = None
+    language: Optional[str] = None
 
 
 class TextQuery(BaseModel):
     query: str
     k: Optional[int] = 5
     mode: Literal["content", "guide"] = "guide"
+    filters: Optional[RetrievalFilters] = None
 
     @validator("k")
     def validate_k(cls, v):
@@ -160,10 +474,87 @@ class TextQuery(BaseModel):
 
 @app.post("/rag/text")
 def rag_text(payload: TextQuery):
-    answer = rag_answer(payload.query, k=payload.k or 5, mode=payload.mode)
+    filters = payload.filters.dict(exclude_none=True) if payload.filters else None
+    answer = rag_answer(payload.query, k=payload.k or 5, mode=payload.mode, filters=filters)
     return {"text": answer}
 
 
+@app.post("/rag/text/stream")
+def rag_text_stream(payload: TextQuery):
+    filters = payload.filters.dict(exclude_none=True) if payload.filters else None
+
+    def events() -> Iterator[str]:
+        for token in rag_answer_stream(payload.query, k=payload.k or 5, mode=payload.mode, filters=filters):
+            yield sse_event({"token": token})
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# Upper bounds for /rag/batch
+BATCH_MAX_QUERIES = int(os.getenv("RAG_BATCH_MAX_QUERIES", "32"))
+BATCH_CONCURRENCY = int(os.getenv("RAG_BATCH_CONCURRENCY", "4"))
+
+
+class BatchQuery(BaseModel):
+    queries: List[str]
+    k: Optional[int] = 5
+    mode: Literal["content", "guide"] = "guide"
+    filters: Optional[RetrievalFilters] = None
+
+    @validator("queries")
+    def validate_queries(cls, v):
+        if not v or len(v) > BATCH_MAX_QUERIES:
+            raise ValueError(f"queries must contain between 1 and {BATCH_MAX_QUERIES} items")
+        return v
+
+    @validator("k")
+    def validate_k(cls, v):
+        if v is not None and (v <= 0 or v > 50):
+            raise ValueError("k must be between 1 and 50")
+        return v
+
+
+@app.post("/rag/batch")
+async def rag_batch(payload: BatchQuery):
+    """Answer many queries; results are streamed as NDJSON lines in completion order."""
+    k = payload.k or 5
+    filters = payload.filters.dict(exclude_none=True) if payload.filters else None
+    query_vectors, dense_hits = await run_in_threadpool(batch_dense_retrieval, payload.queries, k, filters)
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def answer_one(i: int) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                text = await run_in_threadpool(
+                    rag_answer, payload.queries[i], k=k, mode=payload.mode, filters=filters,
+                    query_vector=query_vectors[i], dense_hits=dense_hits[i],
+                )
+                return {"index": i, "query": payload.queries[i], "text": text}
+            except Exception as e:
+                return {"index": i, "query": payload.queries[i], "error": str(e)}
+
+    async def results() -> AsyncIterator[str]:
+        tasks = [asyncio.create_task(answer_one(i)) for i in range(len(payload.queries))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.get("/rag/metrics")
+def rag_metrics():
+    return {
+        "latency_ms": latency.summary(),
+        "prompt_tokens": prompt_tokens.summary(),
+        "answer_cache": answer_cache.stats(),
+    }
+
+
 @app.post("/rag/speech")
 async def rag_speech(
     file: UploadFile,
@@ -172,10 +563,32 @@ async def rag_speech(
     return_audio: bool = Form(True),
 ):
     audio_bytes = await file.read()
-    transcript = speech_to_text(audio_bytes)
-    answer = rag_answer(transcript, k=k, mode=mode)
+    transcript = await speech_to_text(audio_bytes)
     if return_audio:
-        out_path = "rag_response.wav"
-        tts_file = text_to_speech(answer, out_path)
-        return JSONResponse({"transcript": transcript, "text": answer, "audio_file": tts_file})
-    return {"transcript": transcript, "text": answer}
\ No newline at end of file
+        # Streamed WAV; the transcript travels in a header since the body is audio
+        return StreamingResponse(
+            speech_answer_audio(transcript, k=k, mode=mode),
+            media_type="audio/wav",
+            headers={"X-Transcript": quote(transcript), "Cache-Control": "no-cache"},
+        )
+    # Retrieval and generation are blocking; keep them off the event loop
+    answer = await run_in_threadpool(rag_answer, transcript, k=k, mode=mode)
+    return {"transcript": transcript, "text": answer}
+
+
+@app.post("/rag/speech/stream")
+async def rag_speech_stream(
+    file: UploadFile,
+    k: int = Form(5),
+    mode: Literal["content", "guide"] = Form("guide"),
+):
+    audio_bytes = await file.read()
+    transcript = await speech_to_text(audio_bytes)
+
+    def events() -> Iterator[str]:
+        yield sse_event({"transcript": transcript}, event="transcript")
+        for token in rag_answer_stream(transcript, k=k, mode=mode, metric_prefix="speech_stream"):
+            yield sse_event({"token": token})
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,102 @@
+"""
+hf_client.py
+Shared async HTTP client for the Hugging Face Inference API (Whisper STT, Kokoro TTS).
+
+One pooled ``httpx.AsyncClient`` is reused for every call so connections are
+kept alive across requests, the number of sockets is bounded, and each
+operation gets its own timeout and retry policy.
+"""
+
+import asyncio
+import os
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+HF_INFERENCE_URL = "https://api-inference.huggingface.co/models"
+
+# Status codes worth retrying: rate limiting and the 503 returned while a model loads
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class OperationPolicy:
+    connect_timeout: float
+    read_timeout: float
+    retries: int
+    backoff: float = 0.5
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+STT_POLICY = OperationPolicy(
+    connect_timeout=float(os.getenv("HF_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("HF_STT_TIMEOUT", "60")),
+    retries=int(os.getenv("HF_STT_RETRIES", "2")),
+)
+TTS_POLICY = OperationPolicy(
+    connect_timeout=float(os.getenv("HF_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("HF_TTS_TIMEOUT", "60")),
+    retries=int(os.getenv("HF_TTS_RETRIES", "2")),
+)
+
+
+class HFInferenceClient:
+    def __init__(
+        self,
+        token: str,
+        base_url: str = HF_INFERENCE_URL,
+        max_connections: int = int(os.getenv("HF_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections: int = int(os.getenv("HF_MAX_KEEPALIVE", "10")),
+    ):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                headers={"Authorization": f"Bearer {self.token}"} if self.token else {},
+            )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, model: str, policy: OperationPolicy, **kwargs) -> httpx.Response:
+        await self.start()
+        url = f"{self.base_url}/{model}"
+        for attempt in range(policy.retries + 1):
+            try:
+                resp = await self._client.post(url, timeout=policy.timeout(), **kwargs)
+                if resp.status_code not in RETRY_STATUS or attempt == policy.retries:
+                    resp.raise_for_status()
+                    return resp
+            except httpx.TransportError:
+                if attempt == policy.retries:
+                    raise
+            # Exponential backoff with jitter so concurrent retries do not align
+            await asyncio.sleep(policy.backoff * (2 ** attempt) * (0.5 + random.random()))
+        raise RuntimeError("unreachable")
+
+    async def speech_to_text(self, audio_bytes: bytes, model: str = "openai/whisper-small") -> str:
+        resp = await self._post(model, STT_POLICY, content=audio_bytes)
+        result = resp.json()
+        return result.get("text", str(result))
+
+    async def text_to_speech(self, text: str, model: str = "hexgrad/Kokoro-82M") -> httpx.Response:
+        return await self._post(
+            model,
+            TTS_POLICY,
+            json={"inputs": text},
+            headers={"Accept": "audio/wav", "Content-Type": "application/json"},
+        )
@@ -0,0 +1,130 @@
+"""
+hf_client_bench.py
+Concurrency benchmark for the Hugging Face STT calls against a local stand-in server.
+
+Compares the old pattern (bare ``requests.post`` per call, one blocking call per
+worker thread) with the shared pooled ``HFInferenceClient``. The stand-in
+server sleeps for ``--latency-ms`` per request and counts TCP connections, so
+the numbers show both throughput and connection reuse. The stand-in is plain
+HTTP on loopback, so the per-connection saving against the real HTTPS endpoint
+(TCP + TLS handshake) is larger than shown here. No HF token needed:
+
+    python hf_client_bench.py --requests 200 --concurrency 20 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import requests
+
+from hf_client import HFInferenceClient
+from rag_metrics import percentile
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    latency_s = 0.05
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency_s)
+        body = json.dumps({"text": "namaste"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # concurrent connects must not overflow the listen backlog
+
+
+def summarize(name: str, latencies: List[float], wall_s: float, connections: int) -> Dict:
+    return {
+        "client": name,
+        "requests": len(latencies),
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(latencies) / wall_s, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "tcp_connections": connections,
+    }
+
+
+def bench_requests(url: str, payload: bytes, n: int, concurrency: int) -> Dict:
+    def call(_):
+        start = time.perf_counter()
+        resp = requests.post(url, data=payload, timeout=120)
+        resp.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    StandInHandler.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, range(n)))
+    return summarize("requests.post", latencies, time.perf_counter() - start, StandInHandler.connections)
+
+
+async def bench_pooled(base_url: str, payload: bytes, n: int, concurrency: int) -> Dict:
+    client = HFInferenceClient("", base_url=base_url, max_connections=concurrency,
+                               max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            start = time.perf_counter()
+            await client.speech_to_text(payload, model="stand-in")
+            return (time.perf_counter() - start) * 1000
+
+    StandInHandler.connections = 0
+    await client.start()
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(call() for _ in range(n)))
+    wall = time.perf_counter() - start
+    await client.aclose()
+    return summarize("HFInferenceClient", list(latencies), wall, StandInHandler.connections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pooled async HF client vs requests.post")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    StandInHandler.latency_s = args.latency_ms / 1000
+    server = StandInServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    payload = b"\0" * (args.payload_kb * 1024)
+
+    results = [
+        bench_requests(f"{base_url}/stand-in", payload, args.requests, args.concurrency),
+        asyncio.run(bench_pooled(base_url, payload, args.requests, args.concurrency)),
+    ]
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
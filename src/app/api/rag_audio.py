@@ -0,0 +1,132 @@
+"""
+rag_audio.py
+Sentence-pipelined, in-memory TTS for /rag/speech.
+
+Answer tokens are cut into sentences as they stream in. Each sentence is sent
+to TTS as soon as it is complete, so synthesis of sentence N overlaps with
+generation (and synthesis) of sentence N+1. The per-sentence WAVs are
+re-emitted as one streamed WAV: a single header, then PCM data in order.
+"""
+
+import asyncio
+import re
+import struct
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+# Size fields of a WAV whose length is unknown up front (accepted by browsers/ffmpeg)
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+class SentenceBuffer:
+    """Accumulates streamed text and releases complete sentences.
+
+    Fragments shorter than ``min_chars`` are merged with the following
+    sentence so abbreviations and one-word sentences do not each cost a TTS call.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buf += text
+        sentences, start = [], 0
+        for m in _SENTENCE_END.finditer(self._buf):
+            candidate = self._buf[start:m.start()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = m.end()
+        self._buf = self._buf[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        tail, self._buf = self._buf.strip(), ""
+        return tail or None
+
+
+def split_wav(data: bytes) -> Tuple[bytes, bytes]:
+    """Return the ``fmt `` chunk payload and the PCM ``data`` payload of a WAV file."""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("TTS response is not a WAV file")
+    fmt, pcm = None, None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        size = struct.unpack("<I", data[offset + 4:offset + 8])[0]
+        body = data[offset + 8:offset + 8 + size]
+        if chunk_id == b"fmt ":
+            fmt = body
+        elif chunk_id == b"data":
+            pcm = body
+        offset += 8 + size + (size & 1)
+    if fmt is None or pcm is None:
+        raise ValueError("WAV response is missing fmt or data chunk")
+    return fmt, pcm
+
+
+def streaming_wav_header(fmt: bytes) -> bytes:
+    return (
+        b"RIFF" + struct.pack("<I", _UNKNOWN_SIZE) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", _UNKNOWN_SIZE)
+    )
+
+
+async def pipelined_speech(
+    tokens: AsyncIterator[str],
+    synthesize: Callable[[str], Awaitable[bytes]],
+    max_in_flight: int = 3,
+    min_chars: int = 20,
+) -> AsyncIterator[bytes]:
+    """Yield one streamed WAV for the text produced by ``tokens``.
+
+    At most ``max_in_flight`` sentences are synthesized concurrently; audio is
+    always emitted in sentence order. The producer takes a slot before it
+    starts a synthesis and the consumer gives it back once it has that
+    sentence's audio, so finished-but-unsent sentences count against the
+    limit as well.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    pending: "asyncio.Queue[Optional[asyncio.Task]]" = asyncio.Queue()
+
+    async def start(sentence: str):
+        await slots.acquire()
+        pending.put_nowait(asyncio.create_task(synthesize(sentence)))
+
+    async def produce():
+        buffer = SentenceBuffer(min_chars=min_chars)
+        try:
+            async for token in tokens:
+                for sentence in buffer.feed(token):
+                    await start(sentence)
+            tail = buffer.flush()
+            if tail:
+                await start(tail)
+        finally:
+            pending.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    fmt = None
+    try:
+        while True:
+            task = await pending.get()
+            if task is None:
+                break
+            audio = await task
+            slots.release()
+            sentence_fmt, pcm = split_wav(audio)
+            if fmt is None:
+                fmt = sentence_fmt
+                yield streaming_wav_header(fmt)
+            elif sentence_fmt != fmt:
+                raise ValueError("TTS returned audio in a different format mid-answer")
+            yield pcm
+        await producer  # surface generation errors
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
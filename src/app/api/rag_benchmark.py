@@ -0,0 +1,252 @@
+"""
+rag_benchmark.py
+Offline retrieval benchmark on synthetic corpora (1k .. 1M documents).
+
+Uses a deterministic hashing embedder, so it runs without a network or HF
+token, and exercises the same pieces as RAG.py: a LangChain FAISS vectorstore
+saved with save_local, the BM25 index from rag_index, dense/hybrid/filtered
+retrieval. For each corpus size it records index build time, on-disk size,
+load time, RSS, query latency percentiles and dense recall@k against exact
+search, and writes everything to a JSON file for regression tracking:
+
+    python rag_benchmark.py --sizes 1000 10000 100000 --out rag_benchmark_results.json
+    python rag_benchmark.py --sizes 1000000 --index ivf --nprobe 16
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag_index import BM25Index, dense_search, reciprocal_rank_fusion, tokenize
+from rag_metrics import percentile
+
+CRAFTS = ["madhubani", "warli", "pattachitra", "kalamkari", "bidriware", "phulkari",
+          "chikankari", "blue pottery", "dhokra", "pashmina", "bandhani", "terracotta"]
+STATES = ["Bihar", "Maharashtra", "Odisha", "Andhra Pradesh", "Karnataka", "Punjab",
+          "Uttar Pradesh", "Rajasthan", "Chhattisgarh", "Kashmir", "Gujarat", "West Bengal"]
+DOC_TYPES = ["scheme", "product", "guide", "faq"]
+LANGUAGES = ["en", "hi"]
+WORDS = ("artisan cluster subsidy loan training design export market exhibition raw material "
+         "workshop cooperative women rural certification portal registration grant tools "
+         "natural dyes handloom weaving painting pottery metal craft festival price order "
+         "shipping packaging catalogue buyer seller photo story heritage village income").split()
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words embedder: each token maps to a fixed random unit vector."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vec = self._cache.get(token)
+        if vec is None:
+            seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vec = np.random.default_rng(seed).standard_normal(self.dim).astype("float32")
+            vec /= np.linalg.norm(vec)
+            self._cache[token] = vec
+        return vec
+
+    def _embed(self, text: str) -> np.ndarray:
+        tokens = tokenize(text)
+        if not tokens:
+            return np.zeros(self.dim, dtype="float32")
+        vec = np.sum([self._token_vector(t) for t in tokens], axis=0)
+        return vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        return np.vstack([self._embed(t) for t in texts])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> Tuple[List[str], List[Dict[str, str]]]:
+    rng = random.Random(seed)
+    texts, metadatas = [], []
+    for i in range(n):
+        craft, state = rng.choice(CRAFTS), rng.choice(STATES)
+        words = " ".join(rng.choices(WORDS, k=rng.randint(8, 24)))
+        texts.append(f"{craft} {words} {state} item{i}")
+        metadatas.append({
+            "doc_type": rng.choice(DOC_TYPES),
+            "craft_type": craft,
+            "state": state,
+            "language": rng.choice(LANGUAGES),
+        })
+    return texts, metadatas
+
+
+def synthetic_queries(texts: List[str], n: int, seed: int = 1) -> List[str]:
+    """Queries are perturbed corpus documents: a random subset of their words."""
+    rng = random.Random(seed)
+    queries = []
+    for text in rng.sample(texts, min(n, len(texts))):
+        words = text.split()
+        queries.append(" ".join(rng.sample(words, max(3, len(words) // 2))))
+    return queries
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS fallback (KiB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def dir_size_mb(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / (1024 * 1024)
+
+
+def build_vectorstore(vectors: np.ndarray, texts, metadatas, embedder, index_type: str, nlist: int) -> FAISS:
+    if index_type == "flat":
+        return FAISS.from_embeddings(list(zip(texts, vectors.tolist())), embedder, metadatas=metadatas)
+
+    quantizer = faiss.IndexFlatL2(vectors.shape[1])
+    index = faiss.IndexIVFFlat(quantizer, vectors.shape[1], min(nlist, len(vectors) // 39 or 1))
+    index.train(vectors)
+    index.add(vectors)
+    ids = [str(i) for i in range(len(texts))]
+    docstore = InMemoryDocstore({i: Document(page_content=t, metadata=m) for i, t, m in zip(ids, texts, metadatas)})
+    return FAISS(embedder, index, docstore, dict(enumerate(ids)))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    return {f"p{q}": round(percentile(samples_ms, q), 3) for q in (50, 95, 99)}
+
+
+def bench_size(n: int, args, embedder: HashEmbeddings) -> Dict:
+    texts, metadatas = synthetic_corpus(n, seed=args.seed)
+    queries = synthetic_queries(texts, args.queries, seed=args.seed + 1)
+    result: Dict = {"docs": n, "index": args.index}
+
+    vectors, result["embed_s"] = timed(embedder.embed_matrix, texts)
+    db, result["faiss_build_s"] = timed(build_vectorstore, vectors, texts, metadatas, embedder, args.index, args.nlist)
+    bm25, result["bm25_build_s"] = timed(BM25Index.build, texts, metadatas)
+
+    workdir = Path(tempfile.mkdtemp(prefix="rag_bench_"))
+    try:
+        db.save_local(str(workdir))
+        bm25.save(workdir / "bm25.json")
+        result["disk_mb"] = {
+            "faiss": round(dir_size_mb(workdir) - (workdir / "bm25.json").stat().st_size / 2**20, 2),
+            "bm25": round((workdir / "bm25.json").stat().st_size / 2**20, 2),
+        }
+        del db, bm25
+        rss_before = rss_mb()
+        db, result["faiss_load_s"] = timed(
+            FAISS.load_local, str(workdir), embeddings=embedder, allow_dangerous_deserialization=True
+        )
+        bm25, result["bm25_load_s"] = timed(BM25Index.load, workdir / "bm25.json")
+        result["rss_mb"] = {"after_load": round(rss_mb(), 1), "load_delta": round(rss_mb() - rss_before, 1)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.index == "ivf":
+        faiss.extract_index_ivf(db.index).nprobe = args.nprobe
+
+    # Ground truth: exact L2 search over the same vectors
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    query_vectors = embedder.embed_matrix(queries)
+    _, truth = exact.search(query_vectors, args.k)
+
+    dense_ms, hybrid_ms, filtered_ms, recalls = [], [], [], []
+    for qi, query in enumerate(queries):
+        qv = query_vectors[qi]
+        start = time.perf_counter()
+        dense = dense_search(db.index, qv, args.k)
+        dense_ms.append((time.perf_counter() - start) * 1000)
+        recalls.append(len({i for i, _ in dense} & set(truth[qi].tolist())) / args.k)
+
+        start = time.perf_counter()
+        d = dense_search(db.index, qv, args.k * 4)
+        lex = bm25.search(query, args.k * 4)
+        reciprocal_rank_fusion([[i for i, _ in d], [i for i, _ in lex]])[:args.k]
+        hybrid_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        allowed = bm25.filter_ids({"state": metadatas[qi % n]["state"], "language": "en"})
+        d = dense_search(db.index, qv, args.k * 4, allowed)
+        lex = bm25.search(query, args.k * 4, allowed)
+        reciprocal_rank_fusion([[i for i, _ in d], [i for i, _ in lex]])[:args.k]
+        filtered_ms.append((time.perf_counter() - start) * 1000)
+
+    result[f"dense_recall@{args.k}"] = round(float(np.mean(recalls)), 4)
+    result["query_ms"] = {
+        "dense": latency_summary(dense_ms),
+        "hybrid": latency_summary(hybrid_ms),
+        "hybrid_filtered": latency_summary(filtered_ms),
+    }
+    for key in ("embed_s", "faiss_build_s", "bm25_build_s", "faiss_load_s", "bm25_load_s"):
+        result[key] = round(result[key], 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAG retrieval benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding size (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--index", choices=["flat", "ivf"], default="flat")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=str, default="rag_benchmark_results.json")
+    args = parser.parse_args()
+
+    embedder = HashEmbeddings(dim=args.dim)
+    results = []
+    for n in args.sizes:
+        print(f"[bench] {n} docs ...", flush=True)
+        results.append(bench_size(n, args, embedder))
+        print(json.dumps(results[-1]), flush=True)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "faiss": getattr(faiss, "__version__", "unknown"),
+        "cpu_count": os.cpu_count(),
+        "params": vars(args),
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+rag_cache.py
+Semantic answer cache for the RAG service.
+
+Entries are keyed on (mode, retrieved-context fingerprint) and matched on the
+cosine similarity of the query embedding, so paraphrases of a cached question
+that retrieve the same context reuse the cached answer instead of paying for
+another LLM generation.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vector, dtype="float32")
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+def context_fingerprint(docs: Iterable[Any]) -> str:
+    """Stable hash of the retrieved context (content and metadata, in order)."""
+    h = hashlib.sha256()
+    for d in docs:
+        h.update(d.page_content.encode("utf-8"))
+        h.update(repr(sorted((d.metadata or {}).items())).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+@dataclass
+class _Entry:
+    vector: np.ndarray
+    bucket: Tuple[str, str]
+    answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """Thread-safe TTL + LRU cache matched by query-embedding similarity."""
+
+    def __init__(self, similarity: float = 0.95, ttl_seconds: float = 86400, max_entries: int = 2048):
+        self.similarity = similarity
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.corpus_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, str], List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def bind_corpus(self, version: str) -> None:
+        """Drop every entry when the underlying document set changes."""
+        with self._lock:
+            if version != self.corpus_version:
+                self._clear_locked()
+                self.corpus_version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_locked()
+
+    def get(self, query_vector: Sequence[float], mode: str, fingerprint: str) -> Optional[str]:
+        q = _unit(query_vector)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_sim = None, self.similarity
+            for entry_id in list(self._buckets.get((mode, fingerprint), ())):
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl_seconds:
+                    self._remove_locked(entry_id)
+                    continue
+                sim = float(np.dot(q, entry.vector))
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id].answer
+
+    def put(self, query_vector: Sequence[float], mode: str, fingerprint: str, answer: str) -> None:
+        bucket = (mode, fingerprint)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(_unit(query_vector), bucket, answer, time.monotonic())
+            self._buckets.setdefault(bucket, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "corpus_version": self.corpus_version,
+            }
+
+    def _remove_locked(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._buckets[entry.bucket]
+        ids.remove(entry_id)
+        if not ids:
+            del self._buckets[entry.bucket]
+
+    def _clear_locked(self) -> None:
+        self._entries.clear()
+        self._buckets.clear()
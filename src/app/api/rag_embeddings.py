@@ -0,0 +1,198 @@
+"""
+rag_embeddings.py
+ONNX Runtime CPU backend for the sentence-transformers/all-MiniLM-L6-v2 embeddings.
+
+Same model, same vectors (mean pooling + L2 normalization), but run through
+onnxruntime with an optional int8 dynamically-quantized graph, a configurable
+thread count and batch size. It implements the LangChain ``Embeddings``
+interface, so RAG.py can swap it in for ``HuggingFaceEmbeddings``.
+
+    # one-off export (needs torch + transformers, like the default backend)
+    python rag_embeddings.py export --out onnx_minilm --quantize
+
+    # retrieval quality and throughput vs the PyTorch backend
+    python rag_embeddings.py check --model-dir onnx_minilm --quantized
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_FILE = "model.onnx"
+QUANTIZED_FILE = "model_quantized.onnx"
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = False,
+        num_threads: Optional[int] = None,
+        batch_size: int = 64,
+        max_length: int = 256,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = Path(model_dir) / (QUANTIZED_FILE if quantized else ONNX_FILE)
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX model not found: {model_path} (run `python rag_embeddings.py export`)")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or 0  # 0 lets onnxruntime pick
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        feeds = {name: encoded[name].astype("int64") for name in self.input_names if name in encoded}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization (as sentence-transformers does)
+        mask = encoded["attention_mask"][:, :, None].astype("float32")
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.session.get_outputs()[0].shape[-1]), dtype="float32")
+        # Batch texts of similar length together to minimise padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [
+            self._embed_batch([texts[i] for i in order[start:start + self.batch_size]])
+            for start in range(0, len(order), self.batch_size)
+        ]
+        by_length = np.vstack(batches).astype("float32")
+        out = np.empty_like(by_length)
+        out[order] = by_length
+        return out
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+def export_onnx(out_dir: str, quantize: bool = False, model_name: str = MODEL_NAME) -> None:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {"batch": 0, "sequence": 1}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in names),
+            str(out / ONNX_FILE),
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{n: dynamic for n in names}, "last_hidden_state": dynamic},
+            opset_version=14,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(out / ONNX_FILE), str(out / QUANTIZED_FILE), weight_type=QuantType.QInt8)
+    print(f"Exported {model_name} to {out}")
+
+
+def check(args) -> bool:
+    """Compare retrieval quality and throughput of the ONNX backend against PyTorch."""
+    import faiss
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from rag_benchmark import synthetic_corpus, synthetic_queries
+
+    texts, _ = synthetic_corpus(args.docs, seed=0)
+    queries = synthetic_queries(texts, args.queries, seed=1)
+
+    reference = HuggingFaceEmbeddings(model_name=MODEL_NAME, encode_kwargs={"batch_size": args.batch_size})
+    candidate = OnnxEmbeddings(args.model_dir, quantized=args.quantized,
+                               num_threads=args.threads, batch_size=args.batch_size)
+
+    start = time.perf_counter()
+    ref_docs = np.asarray(reference.embed_documents(texts), dtype="float32")
+    ref_s = time.perf_counter() - start
+    start = time.perf_counter()
+    onnx_docs = candidate.embed_matrix(texts)
+    onnx_s = time.perf_counter() - start
+
+    ref_q = np.asarray(reference.embed_documents(queries), dtype="float32")
+    onnx_q = candidate.embed_matrix(queries)
+
+    def top_k(doc_vectors, query_vectors):
+        index = faiss.IndexFlatL2(doc_vectors.shape[1])
+        index.add(doc_vectors)
+        return index.search(query_vectors, args.k)[1]
+
+    ref_top, onnx_top = top_k(ref_docs, ref_q), top_k(onnx_docs, onnx_q)
+    overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ref_top, onnx_top)])
+    cosine = float(np.mean(np.sum(ref_docs * onnx_docs, axis=1)))
+
+    report = {
+        "docs": len(texts),
+        "quantized": args.quantized,
+        "threads": args.threads,
+        "batch_size": args.batch_size,
+        "torch_docs_per_s": round(len(texts) / ref_s, 1),
+        "onnx_docs_per_s": round(len(texts) / onnx_s, 1),
+        "speedup": round(ref_s / onnx_s, 2),
+        "mean_cosine_to_torch": round(cosine, 5),
+        f"top{args.k}_overlap": round(float(overlap), 4),
+    }
+    passed = cosine >= args.min_cosine and overlap >= args.min_overlap
+    report["passed"] = passed
+    print(json.dumps(report, indent=2))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX embedding backend tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="Export the model to ONNX (optionally int8-quantized)")
+    p_export.add_argument("--out", default="onnx_minilm")
+    p_export.add_argument("--quantize", action="store_true")
+
+    p_check = sub.add_parser("check", help="Compare against the PyTorch backend")
+    p_check.add_argument("--model-dir", default="onnx_minilm")
+    p_check.add_argument("--quantized", action="store_true")
+    p_check.add_argument("--threads", type=int, default=os.cpu_count())
+    p_check.add_argument("--batch-size", type=int, default=64)
+    p_check.add_argument("--docs", type=int, default=2000)
+    p_check.add_argument("--queries", type=int, default=100)
+    p_check.add_argument("--k", type=int, default=5)
+    p_check.add_argument("--min-cosine", type=float, default=0.98)
+    p_check.add_argument("--min-overlap", type=float, default=0.9)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.out, quantize=args.quantize)
+    elif not check(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+rag_eval.py
+Compare dense-only and hybrid (BM25 + dense, RRF) retrieval on labelled queries.
+Run from this directory with the same environment as the RAG service:
+
+    python rag_eval.py --k 5
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List, Tuple
+
+from RAG import retrieve_docs
+from rag_metrics import percentile
+
+# (query, substring that identifies the relevant seed document)
+LABELLED_QUERIES: List[Tuple[str, str]] = [
+    ("Which goddess is the city named after?", "Mumbā Devī"),
+    ("What did the British call the city?", "Bombay"),
+    ("Dabbawalas tiffin deliveries", "Dabbawalas"),
+    ("Antilia", "Antilia"),
+    ("Why is Marine Drive called the Queen's Necklace?", "Queen’s Necklace"),
+    ("When was the BSE established?", "BSE"),
+    ("Catherine of Braganza dowry", "Catherine of Braganza"),
+    ("Which UNESCO site is a railway terminus?", "CST"),
+    ("Dharavi small-scale industries", "Dharavi"),
+    ("How many people use the suburban railway every day?", "Suburban Railway"),
+    ("Bandra-Worli Sea Link", "Bandra-Worli"),
+    ("Ganesh Chaturthi celebrations", "Ganesh Chaturthi"),
+]
+
+
+def evaluate(retrieval: str, k: int) -> Dict[str, float]:
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for query, expected in LABELLED_QUERIES:
+        start = time.perf_counter()
+        results = retrieve_docs(query, k=k, retrieval=retrieval)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        rank = next((i for i, d in enumerate(results, start=1) if expected in d.page_content), None)
+        if rank is not None:
+            hits += 1
+            reciprocal_ranks.append(1.0 / rank)
+        else:
+            reciprocal_ranks.append(0.0)
+
+    return {
+        f"hit@{k}": hits / len(LABELLED_QUERIES),
+        "mrr": sum(reciprocal_ranks) / len(reciprocal_ranks),
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense vs hybrid retrieval comparison")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    report = {mode: evaluate(mode, args.k) for mode in ("dense", "hybrid")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+rag_index.py
+Lexical (BM25) and metadata indexes kept next to the FAISS vectorstore,
+plus the dense search and reciprocal-rank fusion used for hybrid retrieval.
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+
+# Metadata fields that can be used to pre-filter the corpus before scoring
+FILTER_FIELDS = ("doc_type", "craft_type", "state", "language")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _normalize_value(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class BM25Index:
+    """Inverted BM25 index over the same document positions as the FAISS index.
+
+    Position ``i`` here is row ``i`` of the FAISS index, so both retrievers
+    speak the same ids and can be fused without a lookup table.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+        # field -> value -> positions, used for metadata pre-filtering
+        self.metadata_index: Dict[str, Dict[str, Set[int]]] = {f: {} for f in FILTER_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts: Iterable[str], metadatas: Iterable[Optional[Dict[str, Any]]]) -> "BM25Index":
+        index = cls()
+        for text, metadata in zip(texts, metadatas):
+            index.add(text, metadata)
+        return index
+
+    def add(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        position = len(self.doc_lengths)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[position] = tf
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+        for field in FILTER_FIELDS:
+            value = (metadata or {}).get(field)
+            if value is not None:
+                self.metadata_index[field].setdefault(_normalize_value(value), set()).add(position)
+        return position
+
+    def filter_ids(self, filters: Optional[Dict[str, Any]]) -> Optional[Set[int]]:
+        """Resolve metadata filters to the allowed positions.
+
+        Fields are ANDed, a list of values for one field is ORed. Returns
+        ``None`` when no filter is active (the whole corpus is allowed).
+        """
+        allowed: Optional[Set[int]] = None
+        for field, value in (filters or {}).items():
+            if value is None or value == []:
+                continue
+            if field not in self.metadata_index:
+                raise ValueError(f"Unsupported filter field: {field}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            matched: Set[int] = set()
+            for v in values:
+                matched |= self.metadata_index[field].get(_normalize_value(v), set())
+            allowed = matched if allowed is None else allowed & matched
+            if not allowed:
+                return set()
+        return allowed
+
+    def search(self, query: str, k: int, allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        n_docs = len(self.doc_lengths)
+        if n_docs == 0:
+            return []
+        avg_len = self.total_length / n_docs or 1.0
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, tf in postings.items():
+                if allowed is not None and position not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / avg_len)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_lengths": self.doc_lengths,
+            "postings": {term: list(p.items()) for term, p in self.postings.items()},
+            "metadata_index": {
+                field: {value: sorted(ids) for value, ids in values.items()}
+                for field, values in self.metadata_index.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        index = cls(k1=payload["k1"], b=payload["b"])
+        index.doc_lengths = payload["doc_lengths"]
+        index.total_length = sum(index.doc_lengths)
+        index.postings = {term: dict(map(tuple, p)) for term, p in payload["postings"].items()}
+        for field, values in payload["metadata_index"].items():
+            index.metadata_index[field] = {value: set(ids) for value, ids in values.items()}
+        return index
+
+
+def dense_search_batch(
+    index: "faiss.Index",
+    query_vectors: Sequence[Sequence[float]],
+    k: int,
+    allowed: Optional[Set[int]] = None,
+) -> List[List[Tuple[int, float]]]:
+    """Nearest neighbours of many queries in one FAISS call, restricted to ``allowed``."""
+    q = np.asarray(query_vectors, dtype="float32")
+    if allowed is None:
+        distances, ids = index.search(q, min(k, index.ntotal))
+    else:
+        if not allowed:
+            return [[] for _ in range(len(q))]
+        selector = faiss.IDSelectorBatch(np.fromiter(allowed, dtype="int64", count=len(allowed)))
+        # IVF indexes only accept IVF search parameters; keep their nprobe
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        distances, ids = index.search(q, min(k, len(allowed)), params=params)
+    return [
+        [(int(i), float(d)) for i, d in zip(row_ids, row_distances) if i != -1]
+        for row_ids, row_distances in zip(ids, distances)
+    ]
+
+
+def dense_search(
+    index: "faiss.Index",
+    query_vector: Sequence[float],
+    k: int,
+    allowed: Optional[Set[int]] = None,
+) -> List[Tuple[int, float]]:
+    """Nearest neighbours of one query, restricted to ``allowed`` inside FAISS."""
+    return dense_search_batch(index, [query_vector], k, allowed)[0]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Merge ranked id lists with RRF: score(d) = sum(1 / (k + rank(d)))."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking, start=1):
+            fused[position] = fused.get(position, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap prompt-token estimate (~4 characters per token for English text)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def mmr_select(
+    query_vector: Sequence[float],
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    dedup_threshold: float = 0.95,
+) -> List[int]:
+    """Maximal marginal relevance over candidate rows, dropping near-duplicates.
+
+    Returns indices into ``candidate_vectors`` in selection order. A candidate
+    whose cosine similarity to an already selected one is at least
+    ``dedup_threshold`` is discarded outright.
+    """
+    if len(candidate_vectors) == 0:
+        return []
+    vectors = np.asarray(candidate_vectors, dtype="float32")
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    q = np.asarray(query_vector, dtype="float32")
+    q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+    relevance = vectors @ q
+    # Highest similarity of each candidate to anything already selected
+    redundancy = np.full(len(vectors), -np.inf, dtype="float32")
+    available = np.ones(len(vectors), dtype=bool)
+    selected: List[int] = []
+
+    while len(selected) < k and available.any():
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * penalty
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+
+        sims = vectors @ vectors[best]
+        redundancy = np.maximum(redundancy, sims)
+        available &= sims < dedup_threshold
+    return selected
+
+
+def pack_to_budget(texts: Sequence[str], token_budget: int) -> List[int]:
+    """Greedily keep texts (in the given priority order) that fit in ``token_budget``."""
+    kept, used = [], 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if used + cost <= token_budget:
+            kept.append(i)
+            used += cost
+    return kept
@@ -0,0 +1,44 @@
+"""
+rag_metrics.py
+Rolling latency and prompt-size statistics for the RAG service endpoints.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class RollingStats:
+    """Keeps the last ``window`` samples per metric and summarizes them."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, value: float) -> None:
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(value)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        return {
+            name: {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for name, values in snapshot.items()
+            if values
+        }
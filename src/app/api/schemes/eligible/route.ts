@@ -0,0 +1,255 @@
+import { NextRequest, NextResponse } from "next/server";
+import { cookies } from "next/headers";
+import { promises as fs } from "fs";
+import path from "path";
+import { db } from "@/lib/db";
+
+interface EligibilityCriteria {
+  gender: string | null;
+  preferGender: string | null;
+  ageMin: number | null;
+  ageMax: number | null;
+  minExperience: number | null;
+  states: string[];
+  crafts: string[];
+}
+
+interface IndexedScheme {
+  name: string;
+  category: string | null;
+  shortDescription: string | null;
+  officialWebsite: string | null;
+  criteria: EligibilityCriteria;
+  restrictions: number;
+}
+
+type Dimension = 'gender' | 'age' | 'experience' | 'state' | 'craft';
+type Steps = [number, string][];  // [from value, hex mask]: the mask applies up to the next entry
+
+// Shape of scheme_scraper/eligibility_index.json, written by EligibilityIndex.to_json.
+// Masks are hex bitsets; bit i is ids[i], and ids are in ranking order.
+interface EligibilityIndexFile {
+  version: number;
+  ids: string[];
+  schemes: Record<string, IndexedScheme>;
+  all: string;
+  levels: string[];
+  restricted: Record<Dimension, string>;
+  gender: Record<string, string>;
+  preferGender: Record<string, string>;
+  states: Record<string, string>;
+  crafts: Record<string, string>;
+  maxAge: number;
+  allowedByAge: Steps;
+  allowedByExperience: Steps;
+  normalise: {
+    gender: Record<string, string>;
+    state: Record<string, string>;
+    craft: Record<string, string>;
+    craftPattern: string;
+  };
+}
+
+interface Profile {
+  gender: string | null;
+  age: number | null;
+  state: string | null;
+  craftType: string | null;
+  experience: number | null;
+}
+
+const INDEX_PATH = process.env.SCHEME_ELIGIBILITY_INDEX_PATH
+  || path.join(process.cwd(), 'scheme_scraper', 'eligibility_index.json');
+const INDEX_VERSION = 2;
+const ZERO = BigInt(0);
+
+const toMask = (hex: string) => BigInt('0x' + hex);
+const toMasks = (postings: Record<string, string>) => {
+  const masks: Record<string, bigint> = {};
+  for (const [key, hex] of Object.entries(postings)) masks[key] = toMask(hex);
+  return masks;
+};
+
+interface LoadedIndex {
+  mtimeMs: number;
+  ids: string[];
+  schemes: Record<string, IndexedScheme>;
+  all: bigint;
+  levels: bigint[];
+  restricted: Record<string, bigint>;
+  gender: Record<string, bigint>;
+  preferGender: Record<string, bigint>;
+  states: Record<string, bigint>;
+  crafts: Record<string, bigint>;
+  maxAge: number;
+  allowedByAge: [number, bigint][];
+  allowedByExperience: [number, bigint][];
+  normalise: EligibilityIndexFile['normalise'];
+  craftPattern: RegExp;
+}
+
+// Decoded once per file version
+let loaded: LoadedIndex | null = null;
+
+async function loadIndex(): Promise<LoadedIndex> {
+  const stat = await fs.stat(INDEX_PATH);
+  if (loaded && loaded.mtimeMs === stat.mtimeMs) {
+    return loaded;
+  }
+  const index: EligibilityIndexFile = JSON.parse(await fs.readFile(INDEX_PATH, 'utf8'));
+  if (index.version !== INDEX_VERSION) {
+    throw new Error(`eligibility index version ${index.version}, expected ${INDEX_VERSION}`);
+  }
+  const steps = (s: Steps) => s.map(([from, hex]) => [from, toMask(hex)] as [number, bigint]);
+  loaded = {
+    mtimeMs: stat.mtimeMs,
+    ids: index.ids,
+    schemes: index.schemes,
+    all: toMask(index.all),
+    levels: index.levels.map(toMask),
+    restricted: toMasks(index.restricted),
+    gender: toMasks(index.gender),
+    preferGender: toMasks(index.preferGender),
+    states: toMasks(index.states),
+    crafts: toMasks(index.crafts),
+    maxAge: index.maxAge,
+    allowedByAge: steps(index.allowedByAge),
+    allowedByExperience: steps(index.allowedByExperience),
+    normalise: index.normalise,
+    craftPattern: new RegExp(index.normalise.craftPattern),
+  };
+  return loaded;
+}
+
+// Ids of the set bits, in bit (ranking) order
+function decode(ids: string[], bits: bigint): string[] {
+  if (bits === ZERO) return [];
+  const binary = bits.toString(2);
+  const out: string[] = [];
+  for (let i = binary.length - 1; i >= 0; i--) {
+    if (binary[i] === '1') out.push(ids[binary.length - 1 - i]);
+  }
+  return out;
+}
+
+function stepMask(steps: [number, bigint][], value: number): bigint {
+  let mask = ZERO;
+  for (const [from, m] of steps) {
+    if (from > value) break;
+    mask = m;
+  }
+  return mask;
+}
+
+// Same lookups as EligibilityIndex.match in scheme_scraper/eligibility.py; the
+// normalisation tables come from the index file
+function matchProfile(index: LoadedIndex, profile: Profile, limit: number | null) {
+  const { normalise } = index;
+  let gender: string | null = null;
+  if (profile.gender) {
+    const value = profile.gender.trim().toLowerCase();
+    gender = normalise.gender[value] ?? value;
+  }
+  let state: string | null = null;
+  if (profile.state) {
+    const value = profile.state.replace(/\s+/g, ' ').trim().toLowerCase();
+    state = normalise.state[value] ?? value;
+  }
+  let craft: string | null = null;
+  if (profile.craftType) {
+    const match = index.craftPattern.exec(profile.craftType.toLowerCase());
+    craft = match ? normalise.craft[match[1]] : profile.craftType.trim().toLowerCase();
+  }
+
+  const allowed: Record<Dimension, bigint | null> = {
+    gender: gender === null ? null : index.gender[gender] ?? ZERO,
+    age: profile.age === null ? null
+      : stepMask(index.allowedByAge, Math.min(Math.max(Math.floor(profile.age), 0), index.maxAge)),
+    experience: profile.experience === null ? null
+      : stepMask(index.allowedByExperience, Math.floor(profile.experience)),
+    state: state === null ? null : index.states[state] ?? ZERO,
+    craft: craft === null ? null : index.crafts[craft] ?? ZERO,
+  };
+
+  let excluded = ZERO;
+  let maybe = ZERO;
+  for (const [dimension, restricted] of Object.entries(index.restricted)) {
+    const allow = allowed[dimension as Dimension];
+    if (allow === null) maybe |= restricted;
+    else excluded |= restricted & ~allow;
+  }
+  maybe &= ~excluded;
+  const eligible = index.all & ~excluded & ~maybe;
+
+  // Within a restriction level, schemes preferring the profile's gender come first
+  const preferred = gender ? index.preferGender[gender] ?? ZERO : ZERO;
+  const ranked: string[] = [];
+  for (const level of index.levels) {
+    const inLevel = eligible & level;
+    ranked.push(...decode(index.ids, inLevel & preferred), ...decode(index.ids, inLevel & ~preferred));
+    if (limit && ranked.length >= limit) break;
+  }
+  const total = eligible.toString(2).split('1').length - 1;
+  return { eligible: limit ? ranked.slice(0, limit) : ranked, maybe: decode(index.ids, maybe), total };
+}
+
+function numberParam(value: string | null): number | null {
+  if (value === null || value === '') return null;
+  const parsed = Number(value);
+  return Number.isFinite(parsed) ? parsed : null;
+}
+
+export async function GET(req: NextRequest) {
+  try {
+    const cookieStore = await cookies();
+    const userId = cookieStore.get("session_user")?.value;
+    if (!userId) {
+      return NextResponse.json({ success: false, message: "Not authenticated" }, { status: 401 });
+    }
+
+    const user = await db.user.findUnique({
+      where: { id: userId },
+      select: { gender: true, age: true, state: true, craftType: true, experience: true },
+    });
+    if (!user) {
+      return NextResponse.json({ success: false, message: "Not authenticated" }, { status: 401 });
+    }
+
+    // Query parameters let the signed-in artisan try other values than the stored profile
+    const { searchParams } = new URL(req.url);
+    const profile: Profile = {
+      gender: searchParams.get('gender') ?? user.gender,
+      age: numberParam(searchParams.get('age')) ?? user.age,
+      state: searchParams.get('state') ?? user.state,
+      craftType: searchParams.get('craftType') ?? user.craftType,
+      experience: numberParam(searchParams.get('experience')) ?? user.experience,
+    };
+
+    let index: LoadedIndex;
+    try {
+      index = await loadIndex();
+    } catch {
+      return NextResponse.json(
+        { success: false, message: 'Eligibility index not built yet. Run the scheme scraper.' },
+        { status: 503 }
+      );
+    }
+
+    const limit = numberParam(searchParams.get('limit'));
+    const { eligible, maybe, total } = matchProfile(index, profile, limit);
+    const describe = (id: string) => ({ id, ...index.schemes[id] });
+    return NextResponse.json({
+      success: true,
+      eligible: eligible.map(describe),
+      maybe: maybe.map(describe),
+      total,
+    });
+
+  } catch (error) {
+    console.error('Error matching schemes:', error);
+    return NextResponse.json({
+      success: false,
+      message: 'Error matching schemes to profile'
+    }, { status: 500 });
+  }
+}
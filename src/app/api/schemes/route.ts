@@ -1,4 +1,6 @@
 import { NextRequest, NextResponse } from "next/server";
+import { promises as fs } from "fs";
+import path from "path";
 
 interface Scheme {
   id: string;
@@ -13,6 +15,79 @@ interface Scheme {
   officialWebsite: string;
   aiSummary: string;
   lastUpdated: string;
+  source?: string;
+}
+
+interface SchemeChange {
+  seq: number;
+  op: 'created' | 'updated';
+  id: string;
+  at: string;
+  scheme: Scheme;
+}
+
+// Append-only NDJSON change log written by scheme_scraper/scheme_store.py
+const CHANGELOG_PATH = process.env.SCHEME_CHANGELOG_PATH
+  || path.join(process.cwd(), 'scheme_scraper', 'scheme_changes.ndjson');
+
+// In-memory index over the change log. Each request only parses the bytes
+// appended since the previous read; a replaced file (compaction) is reloaded.
+const schemeIndex = {
+  ino: 0,
+  offset: 0,
+  seq: 0,
+  byId: new Map<string, { seq: number; scheme: Scheme }>(),
+};
+let pendingSync: Promise<boolean> | null = null;
+
+async function readNewChanges(): Promise<boolean> {
+  let stat;
+  try {
+    stat = await fs.stat(CHANGELOG_PATH);
+  } catch {
+    return false;
+  }
+
+  if (stat.ino !== schemeIndex.ino || stat.size < schemeIndex.offset) {
+    schemeIndex.ino = stat.ino;
+    schemeIndex.offset = 0;
+    schemeIndex.seq = 0;
+    schemeIndex.byId.clear();
+  }
+  if (stat.size === schemeIndex.offset) {
+    return true;
+  }
+
+  const handle = await fs.open(CHANGELOG_PATH, 'r');
+  try {
+    const buffer = Buffer.alloc(stat.size - schemeIndex.offset);
+    const { bytesRead } = await handle.read(buffer, 0, buffer.length, schemeIndex.offset);
+    // Stop at the last complete line; a run may still be writing the tail
+    const end = buffer.lastIndexOf(0x0a, bytesRead - 1);
+    if (end < 0) {
+      return true;
+    }
+    for (const line of buffer.toString('utf8', 0, end).split('\n')) {
+      if (!line) continue;
+      const change: SchemeChange = JSON.parse(line);
+      schemeIndex.byId.set(change.id, { seq: change.seq, scheme: change.scheme });
+      schemeIndex.seq = Math.max(schemeIndex.seq, change.seq);
+    }
+    schemeIndex.offset += end + 1;
+  } finally {
+    await handle.close();
+  }
+  return true;
+}
+
+function syncSchemeIndex(): Promise<boolean> {
+  // Concurrent requests share one read so no change is applied twice
+  if (!pendingSync) {
+    pendingSync = readNewChanges().finally(() => {
+      pendingSync = null;
+    });
+  }
+  return pendingSync;
 }
 
 // Real schemes data from indian.handicrafts.gov.in
@@ -290,7 +365,37 @@ const realSchemes: Scheme[] = [
 
 export async function GET(req: NextRequest) {
   try {
-    // Return real schemes data from indian.handicrafts.gov.in
+    if (await syncSchemeIndex()) {
+      const { searchParams } = new URL(req.url);
+      const id = searchParams.get('id');
+      const since = Number(searchParams.get('since') || 0);
+
+      if (id) {
+        const entry = schemeIndex.byId.get(id);
+        if (!entry) {
+          return NextResponse.json(
+            { success: false, message: 'Scheme not found' },
+            { status: 404 }
+          );
+        }
+        return NextResponse.json({ success: true, scheme: entry.scheme, seq: entry.seq });
+      }
+
+      // ?since=<seq> returns only schemes created or updated after that change
+      const schemes: Scheme[] = [];
+      schemeIndex.byId.forEach((entry) => {
+        if (entry.seq > since) schemes.push(entry.scheme);
+      });
+      return NextResponse.json({
+        success: true,
+        schemes,
+        total: schemes.length,
+        seq: schemeIndex.seq,
+        message: since ? `Schemes changed since ${since}` : 'Scraped government schemes'
+      });
+    }
+
+    // No scraper output yet: return real schemes data from indian.handicrafts.gov.in
     return NextResponse.json({
       success: true,
       schemes: realSchemes,
@@ -0,0 +1,76 @@
+"""Tests for rag_cache: similarity matching, context buckets, TTL, LRU and corpus binding."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import rag_cache
+from rag_cache import SemanticAnswerCache, context_fingerprint
+
+
+def doc(text, **metadata):
+    return SimpleNamespace(page_content=text, metadata=metadata)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rag_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_paraphrase_with_the_same_context_hits():
+    cache = SemanticAnswerCache(similarity=0.95)
+    cache.put([1.0, 0.0, 0.1], "text", "ctx", "answer")
+    assert cache.get([2.0, 0.0, 0.15], "text", "ctx") == "answer"  # scale does not matter
+    assert cache.get([0.0, 1.0, 0.0], "text", "ctx") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_are_bucketed_by_mode_and_context():
+    cache = SemanticAnswerCache()
+    cache.put([1.0, 0.0], "text", "ctx", "answer")
+    assert cache.get([1.0, 0.0], "audio", "ctx") is None
+    assert cache.get([1.0, 0.0], "text", "other-ctx") is None
+
+
+def test_best_match_wins():
+    cache = SemanticAnswerCache(similarity=0.9)
+    cache.put([1.0, 0.3], "text", "ctx", "close")
+    cache.put([1.0, 0.0], "text", "ctx", "exact")
+    assert cache.get([1.0, 0.0], "text", "ctx") == "exact"
+
+
+def test_expired_entries_are_dropped(clock):
+    cache = SemanticAnswerCache(ttl_seconds=60)
+    cache.put([1.0, 0.0], "text", "ctx", "answer")
+    clock[0] += 61
+    assert cache.get([1.0, 0.0], "text", "ctx") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.put([1.0, 0.0, 0.0], "text", "a", "A")
+    cache.put([0.0, 1.0, 0.0], "text", "b", "B")
+    assert cache.get([1.0, 0.0, 0.0], "text", "a") == "A"  # "a" is now the most recent
+    cache.put([0.0, 0.0, 1.0], "text", "c", "C")
+    assert cache.get([0.0, 1.0, 0.0], "text", "b") is None
+    assert cache.get([1.0, 0.0, 0.0], "text", "a") == "A"
+
+
+def test_binding_a_new_corpus_clears_the_cache():
+    cache = SemanticAnswerCache()
+    cache.bind_corpus("v1")
+    cache.put([1.0, 0.0], "text", "ctx", "answer")
+    cache.bind_corpus("v1")
+    assert cache.get([1.0, 0.0], "text", "ctx") == "answer"
+    cache.bind_corpus("v2")
+    assert cache.get([1.0, 0.0], "text", "ctx") is None
+
+
+def test_context_fingerprint_covers_content_metadata_and_order():
+    a, b = doc("Warli art", state="Maharashtra"), doc("Bidriware", state="Karnataka")
+    assert context_fingerprint([a, b]) == context_fingerprint([doc("Warli art", state="Maharashtra"), b])
+    assert context_fingerprint([a, b]) != context_fingerprint([b, a])
+    assert context_fingerprint([a]) != context_fingerprint([doc("Warli art", state="Gujarat")])
@@ -0,0 +1,110 @@
+"""Tests for rag_index: BM25 + metadata filtering, dense search, fusion and context selection."""
+
+import faiss
+import numpy as np
+import pytest
+
+from rag_index import (
+    BM25Index,
+    dense_search,
+    dense_search_batch,
+    estimate_tokens,
+    mmr_select,
+    pack_to_budget,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+TEXTS = [
+    "Madhubani painting from Bihar uses natural dyes.",
+    "Blue pottery of Jaipur is glazed with a quartz paste.",
+    "Pashmina shawls are woven in Kashmir.",
+    "Madhubani artists paint festivals and village life.",
+]
+METADATA = [
+    {"doc_type": "craft", "craft_type": "painting", "state": "Bihar", "language": "en"},
+    {"doc_type": "craft", "craft_type": "pottery", "state": "Rajasthan", "language": "en"},
+    {"doc_type": "scheme", "craft_type": "textile", "state": "Jammu and Kashmir", "language": "en"},
+    {"doc_type": "craft", "craft_type": "painting", "state": "Bihar", "language": "hi"},
+]
+
+
+@pytest.fixture
+def bm25():
+    return BM25Index.build(TEXTS, METADATA)
+
+
+def test_tokenize_lowercases_and_drops_punctuation():
+    assert tokenize("Blue Pottery, Jaipur!") == ["blue", "pottery", "jaipur"]
+
+
+def test_bm25_ranks_documents_containing_the_query_terms(bm25):
+    hits = bm25.search("madhubani painting", k=10)
+    assert [position for position, _ in hits][:2] == [0, 3]
+    assert all(position in (0, 3) for position, _ in hits)
+
+
+def test_filters_and_fields_or_values(bm25):
+    assert bm25.filter_ids(None) is None
+    assert bm25.filter_ids({"state": "bihar"}) == {0, 3}
+    assert bm25.filter_ids({"state": "Bihar", "language": "EN"}) == {0}
+    assert bm25.filter_ids({"craft_type": ["pottery", "textile"]}) == {1, 2}
+    assert bm25.filter_ids({"state": "Goa"}) == set()
+    assert bm25.filter_ids({"state": None, "language": []}) is None
+    with pytest.raises(ValueError):
+        bm25.filter_ids({"price": "low"})
+
+
+def test_search_is_restricted_to_allowed_positions(bm25):
+    hits = bm25.search("madhubani", k=10, allowed={3})
+    assert [position for position, _ in hits] == [3]
+
+
+def test_save_and_load_round_trip(bm25, tmp_path):
+    path = tmp_path / "bm25.json"
+    bm25.save(path)
+    loaded = BM25Index.load(path)
+    assert len(loaded) == len(bm25)
+    assert loaded.search("pashmina kashmir", k=3) == bm25.search("pashmina kashmir", k=3)
+    assert loaded.filter_ids({"doc_type": "scheme"}) == {2}
+
+
+def test_add_appends_at_the_next_position(bm25):
+    assert bm25.add("Dhokra metal casting", {"craft_type": "metal"}) == len(TEXTS)
+    assert bm25.filter_ids({"craft_type": "metal"}) == {len(TEXTS)}
+
+
+def _flat_index(vectors):
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+
+def test_dense_search_respects_the_allowed_set():
+    vectors = np.eye(4, dtype="float32")
+    index = _flat_index(vectors)
+    assert dense_search(index, vectors[2], k=1)[0][0] == 2
+    hits = dense_search(index, vectors[2], k=4, allowed={0, 1})
+    assert sorted(position for position, _ in hits) == [0, 1]
+
+
+def test_dense_search_batch_with_an_empty_allowed_set():
+    index = _flat_index(np.eye(3, dtype="float32"))
+    assert dense_search_batch(index, np.eye(3, dtype="float32")[:2], k=2, allowed=set()) == [[], []]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60)
+    assert [position for position, _ in fused] == [1, 3, 2]
+
+
+def test_mmr_drops_near_duplicates():
+    candidates = np.array([[1.0, 0.0], [0.999, 0.01], [0.0, 1.0]], dtype="float32")
+    assert mmr_select([1.0, -0.2], candidates, k=3) == [0, 2]
+    assert mmr_select([1.0, 0.0], np.zeros((0, 2), dtype="float32"), k=3) == []
+
+
+def test_pack_to_budget_keeps_priority_order_within_the_budget():
+    texts = ["a" * 40, "b" * 400, "c" * 20]  # 10, 100 and 5 tokens
+    assert estimate_tokens(texts[0]) == 10
+    assert pack_to_budget(texts, token_budget=20) == [0, 2]